@@ -1,17 +1,18 @@
 class Node:
     """Base class for all AST nodes."""
-    pass
+    __slots__ = ()
 
 class Expression(Node):
     """Base class for all expressions."""
-    pass
+    __slots__ = ()
 
 class Statement(Node):
     """Base class for all statements."""
-    pass
+    __slots__ = ()
 
 class Program(Node):
     """Represents the entire program."""
+    __slots__ = ('statements',)
     def __init__(self, statements):
         self.statements = statements
 
@@ -20,6 +21,7 @@ class Program(Node):
 
 class Number(Expression):
     """Represents a number literal."""
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
     
@@ -27,11 +29,13 @@ class Number(Expression):
         return f"Number({self.value})"
 
 class Float(Expression):
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
 
 class String(Expression):
     """Represents a string literal."""
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
 
@@ -40,6 +44,7 @@ class String(Expression):
 
 class Boolean(Expression):
     """Represents a boolean literal."""
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
 
@@ -47,6 +52,7 @@ class Boolean(Expression):
         return f"Boolean({self.value})"
 
 class Variable(Expression):
+    __slots__ = ('name',)
     def __init__(self, name):
         self.name = name
     
@@ -55,6 +61,7 @@ class Variable(Expression):
 
 class BinaryOp(Expression):
     """Represents a binary operation."""
+    __slots__ = ('left', 'op', 'right')
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
@@ -65,6 +72,7 @@ class BinaryOp(Expression):
 
 class UnaryOp(Expression):
     """Represents a unary operation (e.g., +x, -x)."""
+    __slots__ = ('operator', 'operand')
     def __init__(self, operator, operand):
         self.operator = operator
         self.operand = operand
@@ -74,6 +82,7 @@ class UnaryOp(Expression):
 
 class Assignment(Statement):
     """Represents a variable assignment."""
+    __slots__ = ('name', 'value')
     def __init__(self, name, value):
         self.name = name
         self.value = value
@@ -83,6 +92,7 @@ class Assignment(Statement):
 
 class Print(Node):
     """Represents a print statement."""
+    __slots__ = ('expressions',)
     def __init__(self, expressions):
         self.expressions = expressions
     
@@ -92,6 +102,7 @@ class Print(Node):
 # Future extensions (for handling complex programs)
 class IfStatement(Statement):
     """Represents an if statement."""
+    __slots__ = ('condition', 'body', 'else_body')
     def __init__(self, condition, body, else_body=None):
         self.condition = condition
         self.body = body
@@ -102,6 +113,7 @@ class IfStatement(Statement):
 
 class WhileLoop(Statement):
     """Represents a while loop."""
+    __slots__ = ('condition', 'body')
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
@@ -111,6 +123,7 @@ class WhileLoop(Statement):
 
 class ForLoop(Statement):
     """Represents a for loop."""
+    __slots__ = ('var_name', 'iterable', 'body')
     def __init__(self, var_name, iterable, body):
         self.var_name = var_name
         self.iterable = iterable
@@ -121,6 +134,7 @@ class ForLoop(Statement):
 
 class RangeCall(Expression):
     """Represents a range() function call."""
+    __slots__ = ('start', 'end', 'step')
     def __init__(self, start, end=None, step=None):
         self.start = start
         self.end = end
@@ -131,6 +145,7 @@ class RangeCall(Expression):
 
 class FunctionDef(Statement):
     """Represents a function definition."""
+    __slots__ = ('name', 'params', 'body')
     def __init__(self, name, params, body):
         self.name = name
         self.params = params
@@ -141,6 +156,7 @@ class FunctionDef(Statement):
 
 class FunctionCall(Expression):
     """Represents a function call."""
+    __slots__ = ('name', 'args')
     def __init__(self, name, args):
         self.name = name
         self.args = args
@@ -150,6 +166,7 @@ class FunctionCall(Expression):
 
 class Return(Statement):
     """Represents a return statement."""
+    __slots__ = ('value',)
     def __init__(self, value):
         self.value = value
 
@@ -157,11 +174,13 @@ class Return(Statement):
         return f"Return({self.value})"
 
 class List(Expression):
+    __slots__ = ('elements',)
     def __init__(self, elements):
         self.elements = elements
 
 class ListAccess(Expression):
     """Represents a list access."""
+    __slots__ = ('list_expr', 'index')
     def __init__(self, list_expr, index):
         self.list_expr = list_expr
         self.index = index
@@ -171,6 +190,7 @@ class ListAccess(Expression):
 
 class ListAssignment(Statement):
     """Represents a list assignment."""
+    __slots__ = ('list_expr', 'index', 'value')
     def __init__(self, list_expr, index, value):
         self.list_expr = list_expr
         self.index = index
@@ -179,10 +199,56 @@ class ListAssignment(Statement):
     def __repr__(self):
         return f"ListAssignment({self.list_expr}, {self.index}, {self.value})"
 
+class ParallelAssignment(Statement):
+    """Represents a tuple assignment like 'a, b = b, a': all values are evaluated before any target is assigned."""
+    __slots__ = ('targets', 'values')
+    def __init__(self, targets, values):
+        self.targets = targets
+        self.values = values
+
+    def __repr__(self):
+        return f"ParallelAssignment({self.targets}, {self.values})"
+
 class LenCall(Expression):
     """Represents a len() function call."""
+    __slots__ = ('arg',)
     def __init__(self, arg):
         self.arg = arg
 
     def __repr__(self):
         return f"LenCall({self.arg})"
+
+class MethodCall(Expression):
+    """Represents a method call such as 'items.append(value)'."""
+    __slots__ = ('obj', 'method', 'args')
+    def __init__(self, obj, method, args):
+        self.obj = obj
+        self.method = method
+        self.args = args
+
+    def __repr__(self):
+        return f"MethodCall({self.obj}, {self.method}, {self.args})"
+
+class Scope:
+    """Identifies the scope of one comprehension, which binds its variable; copies of the node share it."""
+    __slots__ = ()
+    def __deepcopy__(self, memo):
+        return self
+
+class ListComprehension(Expression):
+    """Represents '[element for var_name in iterable if condition]', or the same generator passed to a call.
+
+    As in Python 3, var_name is bound in the comprehension's own `scope`:
+    the element and condition see it, the iterable and the code around it
+    do not.
+    """
+    __slots__ = ('element', 'var_name', 'iterable', 'condition', 'scope')
+    def __init__(self, element, var_name, iterable, condition=None):
+        self.element = element
+        self.var_name = var_name
+        self.iterable = iterable
+        self.condition = condition
+        self.scope = Scope()
+
+    def __repr__(self):
+        return f"ListComprehension({self.element}, {self.var_name}, {self.iterable}, {self.condition})"
@@ -0,0 +1,85 @@
+"""Transpile many Python files in parallel.
+
+Usage: python batch.py [-j WORKERS] [--no-cache] [--cache-dir DIR] PATH [PATH ...]
+
+Each PATH is a Python file or a directory searched recursively for .py files.
+Every source is transpiled in a worker process and its C++ is written next to
+it with a .cpp extension. Failures are reported per file and do not stop the
+rest of the batch.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import TranspileCache
+from main import transpile_file, add_cache_arguments
+
+def collect_sources(paths):
+    """Expand the given files and directories into a sorted list of .py files."""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+                sources.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".py"))
+        else:
+            sources.append(path)
+    return sources
+
+def output_path(source):
+    """Return the path of the .cpp file written beside `source`."""
+    return os.path.splitext(source)[0] + ".cpp"
+
+def transpile_job(source, cache_dir=None):
+    """Transpile one file in a worker; return (source, seconds, error or None, cache hit)."""
+    cache = TranspileCache(cache_dir) if cache_dir is not None else None
+    start = time.perf_counter()
+    try:
+        cached = transpile_file(source, output_path(source), cache)
+    except Exception as e:
+        return source, time.perf_counter() - start, f"{type(e).__name__}: {e}", False
+    return source, time.perf_counter() - start, None, cached
+
+def transpile_batch(sources, workers=None, cache_dir=None, report=print):
+    """Transpile `sources` across a process pool and return the per-file results.
+
+    With a `cache_dir`, unchanged sources are served from the cache, which is
+    trimmed back to its size limit once the batch is done.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(transpile_job, source, cache_dir) for source in sources]
+        for future in as_completed(futures):
+            source, elapsed, error, cached = future.result()
+            results.append((source, elapsed, error, cached))
+            if error is not None:
+                report(f"FAILED {elapsed * 1000:8.1f} ms  {source}: {error}")
+            else:
+                report(f"{'cached' if cached else 'ok':6} {elapsed * 1000:8.1f} ms  {source}")
+    if cache_dir is not None:
+        TranspileCache(cache_dir).evict()
+    return results
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Transpile many Python files to C++ in parallel.")
+    arg_parser.add_argument("paths", nargs="+", help="Python files or directories to transpile")
+    arg_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                            help="number of worker processes (default: CPU count)")
+    add_cache_arguments(arg_parser)
+    args = arg_parser.parse_args(argv)
+
+    sources = collect_sources(args.paths)
+    start = time.perf_counter()
+    results = transpile_batch(sources, args.workers, None if args.no_cache else args.cache_dir)
+    elapsed = time.perf_counter() - start
+
+    failures = [result for result in results if result[2] is not None]
+    cached = sum(1 for result in results if result[3])
+    print(f"\n{len(results) - len(failures)} succeeded ({cached} from cache), {len(failures)} failed "
+          f"in {elapsed:.2f}s (workers: {args.workers})")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
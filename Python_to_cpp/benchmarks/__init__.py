@@ -0,0 +1,4 @@
+"""Benchmarks for the Python to C++ transpiler.
+
+Run them from the Python_to_cpp directory, e.g. ``python -m benchmarks.memory``.
+"""
@@ -0,0 +1,201 @@
+"""Count the heap allocations of compiled programs with and without the list storage tuning.
+
+Usage: python -m benchmarks.allocations [--scale 1] [--repeat 3] [--cxx g++] [--cxxflags=-O2]
+
+Each kernel is transpiled with the optimizer twice: with lists="plain"
+(lists copied wherever Python binds or passes them, appends left to grow
+the vector on their own) and "tuned" (the default: reserve() before loops
+that append, moves and swaps out of lists at their last use, rows bound by
+reference). Both are compiled with a replacement operator new that counts
+every allocation and its size and reports them when the program exits.
+Both must print what CPython prints. The best wall time of `repeat` runs
+is shown next to the counts.
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+
+from lexer import Lexer
+from parser import Parser
+from codegen import CodeGenerator
+from optimizer import optimize
+from benchmarks.compiled_speed import compile_cpp, time_binary
+from benchmarks.kernels import time_python
+
+
+# Appended to the generated program; the report goes to stderr so stdout can still be compared.
+COUNTING_ALLOCATOR = '''
+static size_t py_allocations = 0;
+static size_t py_allocated_bytes = 0;
+
+void* operator new(size_t size) {
+    ++py_allocations;
+    py_allocated_bytes += size;
+    if (void* p = malloc(size ? size : 1)) return p;
+    throw bad_alloc();
+}
+
+void operator delete(void* p) noexcept { free(p); }
+void operator delete(void* p, size_t) noexcept { free(p); }
+
+static struct AllocationReport {
+    ~AllocationReport() { fprintf(stderr, "allocations %zu %zu\\n", py_allocations, py_allocated_bytes); }
+} py_allocation_report;
+'''
+
+# A list built with append() in a loop whose trip count is known.
+APPEND = '''def build(n, k):
+    out = []
+    for i in range(n):
+        out.append((i * k) % 1000)
+    return out
+
+def main():
+    total = 0
+    for r in range({rounds}):
+        a = build({size}, r + 1)
+        total = (total + a[r % len(a)] + len(a)) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Rows built separately and appended: each row can be moved in rather than copied.
+ROWS = '''def build_rows(n, m, k):
+    rows = []
+    for i in range(n):
+        row = [(i + j * k) % 10 for j in range(m)]
+        rows.append(row)
+    return rows
+
+def main():
+    total = 0
+    for r in range({rounds}):
+        rows = build_rows({side}, {side}, r)
+        last = rows[len(rows) - 1]
+        total = (total + last[r % len(last)] + len(rows)) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Reading every row of a grid; each one is copied unless bound by reference.
+ROW_SUMS = '''def grid_total(grid):
+    total = 0
+    for row in grid:
+        total = (total + sum(row)) % 1000003
+    return total
+
+def main():
+    grid = [[(i * j) % 100 for j in range({side})] for i in range({side})]
+    total = 0
+    for r in range({rounds}):
+        total = (total + grid_total(grid) + r) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Double buffering: the new generation replaces the old one, which is dead.
+STENCIL = '''def smooth(cur, steps):
+    n = len(cur)
+    nxt = []
+    for s in range(steps):
+        nxt = [(cur[(i + n - 1) % n] + cur[i] * 2 + cur[(i + 1) % n]) % 1000 for i in range(n)]
+        cur = nxt
+    return cur
+
+def main():
+    a = [(i * 7919) % 1000 for i in range({size})]
+    a = smooth(a, {rounds})
+    print(a[0], a[len(a) - 1])
+
+if __name__ == "__main__":
+    main()
+'''
+
+# A list passed to a function that rebinds its parameter, and replaced by the result.
+PASS_THROUGH = '''def shift(a, k):
+    a = [(x + k) % 1000 for x in a]
+    return a
+
+def main():
+    data = [(i * 7919) % 1000 for i in range({size})]
+    for r in range({rounds}):
+        data = shift(data, r)
+    print(data[0], data[len(data) - 1])
+
+if __name__ == "__main__":
+    main()
+'''
+
+# name -> (Python source, list size at scale 1, repetitions at scale 1).
+KERNELS = {
+    'append': (APPEND, 100_000, 50),
+    'rows': (ROWS, 300, 50),
+    'row_sums': (ROW_SUMS, 300, 200),
+    'stencil': (STENCIL, 100_000, 100),
+    'pass_through': (PASS_THROUGH, 100_000, 100),
+}
+
+LISTS = ('plain', 'tuned')
+
+
+def transpile(source, lists):
+    ast = Parser(Lexer(source).iter_tokens()).parse()
+    optimize(ast)
+    return CodeGenerator(lists=lists).generate(ast)
+
+
+def count_allocations(binary):
+    """Run `binary` once; return (allocations, bytes allocated) from its report."""
+    result = subprocess.run([binary], check=True, capture_output=True, text=True)
+    _, count, size = result.stderr.splitlines()[-1].split()
+    return int(count), int(size)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--scale', type=float, default=1, help='multiplier for list sizes and repetitions')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--cxxflags', default='-O2')
+    args = arg_parser.parse_args()
+
+    cxxflags = shlex.split(args.cxxflags)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (template, size, rounds) in KERNELS.items():
+            size = max(1, int(size * args.scale))
+            source = template.format(size=size, side=size, rounds=max(1, int(rounds * args.scale)))
+            path = os.path.join(directory, f'{name}.py')
+            with open(path, 'w') as f:
+                f.write(source)
+            python_time, expected = time_python(path, args.repeat)
+            print(f"{name:13} python {python_time:7.3f}s")
+            plain = None
+            for lists in LISTS:
+                binary = compile_cpp(transpile(source, lists) + COUNTING_ALLOCATOR, directory, f'{name}-{lists}',
+                                     args.cxx, cxxflags)
+                cpp_time, output = time_binary(binary, args.repeat)
+                count, allocated = count_allocations(binary)
+                status = 'ok' if output == expected else 'MISMATCH'
+                failures += status != 'ok'
+                if plain is None:
+                    plain = count, allocated
+                    relative = ''
+                else:
+                    relative = f"  ({count / plain[0]:.2f}x the allocations, {allocated / max(plain[1], 1):.2f}x the bytes)"
+                print(f"  {lists:6} c++ {cpp_time:7.3f}s  {count:9} allocations  {allocated / 2**20:9.1f} MiB"
+                      f"  {status}{relative}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Measure code generator throughput (AST nodes/second) on a large synthetic AST.
+
+Usage: python -m benchmarks.codegen_speed [--size 2000] [--depth 12] [--repeat 5]
+
+The nested-loops shape times one statement inside --depth nested loops,
+whose analysis must not grow exponentially with the depth.
+"""
+import argparse
+import time
+
+from lexer import Lexer
+from parser import Parser
+from codegen import CodeGenerator
+from visitor import walk
+from benchmarks.synthetic import generate_program
+from benchmarks.parser_speed import generate as generate_expressions
+
+
+def expression_program(statements):
+    """Return a main() made of deeply nested expression assignments."""
+    body = generate_expressions('nested', 30, statements)
+    return 'def main():\n' + ''.join(f'    {line}\n' for line in body.splitlines())
+
+
+def nested_loop_program(depth):
+    """Return a main() that counts in one statement inside `depth` nested range() loops."""
+    lines = ['def main():', '    t = 0']
+    for level in range(depth):
+        lines.append('    ' * (level + 1) + f'for i{level} in range(2):')
+    lines.append('    ' * (depth + 1) + 't = t + 1')
+    lines.append('    print(t)')
+    return ''.join(f'{line}\n' for line in lines)
+
+
+SHAPES = {
+    'kernels': lambda args: generate_program(args.size),
+    'expressions': lambda args: expression_program(args.size),
+    'nested': lambda args: nested_loop_program(args.depth),
+}
+
+
+def best_time(ast, repeat):
+    """Return the fastest of `repeat` code generation runs over `ast`."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        CodeGenerator().generate(ast)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size', type=int, default=2000, help='functions / statements per program')
+    arg_parser.add_argument('--depth', type=int, default=12, help='loops nested in the nested shape')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    for shape, build in SHAPES.items():
+        ast = Parser(Lexer(build(args)).iter_tokens()).parse()
+        nodes = sum(1 for _ in walk(ast))
+        elapsed = best_time(ast, args.repeat)
+        print(f"{shape:11}: {nodes} nodes in {elapsed:.3f}s, {nodes / elapsed:,.0f} nodes/s")
+
+
+if __name__ == '__main__':
+    main()
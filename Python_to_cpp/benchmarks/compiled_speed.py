@@ -0,0 +1,151 @@
+"""Compare the run time of C++ generated with and without the AST optimizer.
+
+Usage: python -m benchmarks.compiled_speed [--n 100000000] [--repeat 3] [--cxx g++] [--cxxflags=-O2]
+
+Each kernel is transpiled twice and compiled, together with a hand-written
+C++ version of it, with the same compiler and flags. Every binary is run
+`repeat` times and the best wall time is reported; all of them must print
+the same result.
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+
+from lexer import Lexer
+from parser import Parser
+from codegen import CodeGenerator
+from optimizer import optimize
+
+
+ARITHMETIC = '''def kernel(n, out):
+    total = 0
+    for i in range(n):
+        total = (total + (i * 8 + 0) % 16 * 1 + i % 4 - (2 * 3 - 6)) % 1024
+        out[0] = total
+
+def main():
+    out = [0]
+    kernel({n}, out)
+    print(out[0])
+'''
+
+ARITHMETIC_CPP = '''#include <bits/stdc++.h>
+using namespace std;
+
+int main() {{
+    int total = 0;
+    for (int i = 0; i < {n}; i++) {{
+        total = (total + (i & 1) * 8 + (i & 3)) & 1023;
+    }}
+    cout << total << " " << endl;
+    return 0;
+}}
+'''
+
+# Loop conditions and bodies that recompute len(arr) and repeated subexpressions.
+ARRAY = '''def kernel(arr, n, out):
+    total = 0
+    i = 0
+    while i < n * len(arr) - 1:
+        j = i % len(arr)
+        arr[j] = (arr[j] * 31 + (i % 1000 + 1) * (i % 1000 + 1) + len(arr) * 7) % 1000003
+        total = (total + arr[j]) % 1000003
+        out[0] = total
+        i = i + 1
+
+def main():
+    arr = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9, 3]
+    out = [0]
+    kernel(arr, {rounds}, out)
+    print(out[0])
+'''
+
+ARRAY_CPP = '''#include <bits/stdc++.h>
+using namespace std;
+
+int main() {{
+    vector<int> arr = {{3, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, 8, 9, 7, 9, 3}};
+    const int size = arr.size();
+    const int limit = {rounds} * size - 1;
+    int total = 0;
+    for (int i = 0; i < limit; i++) {{
+        int j = i % size;
+        int k = i % 1000 + 1;
+        arr[j] = (arr[j] * 31 + k * k + size * 7) % 1000003;
+        total = (total + arr[j]) % 1000003;
+    }}
+    cout << total << " " << endl;
+    return 0;
+}}
+'''
+
+# name -> (Python source, equivalent hand-written C++), both formatted with n and rounds (n / 16).
+KERNELS = {
+    'arithmetic': (ARITHMETIC, ARITHMETIC_CPP),
+    'array': (ARRAY, ARRAY_CPP),
+}
+
+
+def transpile(source, optimized):
+    """Return the C++ for `source`, optionally running the optimizer first."""
+    ast = Parser(Lexer(source).iter_tokens()).parse()
+    if optimized:
+        optimize(ast)
+    return CodeGenerator().generate(ast)
+
+
+def compile_cpp(code, directory, name, cxx='g++', cxxflags=('-O2',)):
+    """Write `code` to `directory` and compile it; return the path of the binary."""
+    source = os.path.join(directory, f'{name}.cpp')
+    binary = os.path.join(directory, name)
+    with open(source, 'w') as f:
+        f.write(code)
+    subprocess.run([cxx, *cxxflags, '-o', binary, source], check=True)
+    return binary
+
+
+def time_binary(binary, repeat):
+    """Run `binary` `repeat` times; return (best seconds, its stdout)."""
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([binary], check=True, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        output = result.stdout
+    return best, output
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--n', type=int, default=100_000_000, help='kernel iterations')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--cxxflags', default='-O2')
+    args = arg_parser.parse_args()
+
+    cxxflags = shlex.split(args.cxxflags)
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (source, handwritten) in KERNELS.items():
+            source = source.format(n=args.n, rounds=args.n // 16)
+            variants = {
+                'plain': transpile(source, False),
+                'optimized': transpile(source, True),
+                'handwritten': handwritten.format(n=args.n, rounds=args.n // 16),
+            }
+            results = {}
+            for label, code in variants.items():
+                binary = compile_cpp(code, directory, f'{name}_{label}', args.cxx, cxxflags)
+                results[label] = time_binary(binary, args.repeat)
+                print(f"{name:10} {label:11}: {results[label][0]:.3f}s  output {results[label][1].strip()!r}")
+            if len({output for _, output in results.values()}) != 1:
+                raise SystemExit(f'{name}: the binaries printed different results')
+            print(f"{name:10} speedup    : {results['plain'][0] / results['optimized'][0]:.2f}x over plain, "
+                  f"{results['handwritten'][0] / results['optimized'][0]:.2f}x of hand-written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Time list comprehensions and sum() over million-element lists in CPython and as compiled C++.
+
+Usage: python -m benchmarks.comprehensions [--scale 1] [--repeat 3] [--cxx g++] [--opt O2 O3]
+
+The kernels cover the shapes the comprehension lowering distinguishes: a
+map over a list (std::transform into a vector sized up front), a map over
+range(0, n) (an indexed fill marked free of dependences), a filter (a
+reserved vector filled with push_back), sum() of a generator (one fused
+loop, no temporary list) and sum() of a list (std::accumulate). Inputs
+are built inside each program from a comprehension over range(), so the
+sources stay small at any size. Each is run with the current interpreter,
+transpiled with the optimizer, compiled at every level and run; all must
+print the same. With g++ the loops it reports as vectorized are counted too.
+"""
+import argparse
+import os
+import shlex
+import sys
+import tempfile
+
+from benchmarks.compiled_speed import compile_cpp, time_binary, transpile
+from benchmarks.kernels import time_python
+from benchmarks.range_loops import vectorized_loops
+
+
+MAP_LIST = '''def main():
+    a = [(i * 7919) % 1000 for i in range({size})]
+    total = 0
+    for round in range({rounds}):
+        b = [x * 3 + round for x in a]
+        total = (total + b[round] + b[len(b) - 1]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+MAP_RANGE = '''def main():
+    total = 0
+    for round in range({rounds}):
+        a = [(i * 7919 + round) % 1000 for i in range({size})]
+        total = (total + a[round] + a[len(a) - 1]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+FILTER = '''def main():
+    a = [(i * 7919) % 1000 for i in range({size})]
+    total = 0
+    for round in range({rounds}):
+        b = [x for x in a if x % 7 == round % 7]
+        total = (total + len(b)) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# The generator is summed in one loop; no list of squares is built.
+SUM_GENERATOR = '''def main():
+    a = [(i * 7919) % 1000 for i in range({size})]
+    total = 0
+    for round in range({rounds}):
+        total = (total + sum(x * x + round for x in a)) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+SUM_LIST = '''def main():
+    a = [(i * 7919) % 1000 for i in range({size})]
+    total = 0
+    for round in range({rounds}):
+        a[round] = round
+        total = (total + sum(a)) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# name -> (Python source, input size at scale 1, repetitions at scale 1).
+KERNELS = {
+    'map_list': (MAP_LIST, 1_000_000, 20),
+    'map_range': (MAP_RANGE, 1_000_000, 20),
+    'filter': (FILTER, 1_000_000, 20),
+    'sum_generator': (SUM_GENERATOR, 1_000_000, 20),
+    'sum_list': (SUM_LIST, 1_000_000, 20),
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--scale', type=float, default=1, help='multiplier for input sizes and repetitions')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--opt', nargs='+', default=['O2', 'O3'], help='optimization levels')
+    args = arg_parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (template, size, rounds) in KERNELS.items():
+            source = template.format(size=max(1, int(size * args.scale)), rounds=max(1, int(rounds * args.scale)))
+            path = os.path.join(directory, f'{name}.py')
+            with open(path, 'w') as f:
+                f.write(source)
+            python_time, expected = time_python(path, args.repeat)
+            code = transpile(source, True)
+            print(f"{name:13} python {python_time:7.3f}s")
+            for opt in args.opt:
+                cxxflags = shlex.split(f'-{opt}')
+                binary = compile_cpp(code, directory, f'{name}-{opt}', args.cxx, cxxflags)
+                cpp_time, output = time_binary(binary, args.repeat)
+                status = 'ok' if output == expected else 'MISMATCH'
+                failures += status != 'ok'
+                vectorized = vectorized_loops(args.cxx, cxxflags, directory, name, code)
+                detail = '' if vectorized is None else f"  {vectorized} loops vectorized"
+                print(f"  -{opt:3} c++ {cpp_time:7.3f}s  speedup {python_time / cpp_time:7.1f}x  {status}{detail}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Check that the optimizer preserves the value of every expression in a corpus.
+
+Usage: python -m benchmarks.fold_equivalence [--samples 200] [--seed 0]
+
+Each expression is the body of `f(x, y, b)`, called with an int, a float and
+a bool so type inference can type it. The expression is evaluated with Python
+semantics before and after optimization for random arguments; any difference
+in value or type is reported and makes the script exit with status 1.
+"""
+import argparse
+import copy
+import math
+import operator
+import random
+import sys
+
+from lexer import Lexer
+from parser import Parser
+from ast_nodes import Boolean, BinaryOp, Float, Number, String, UnaryOp, Variable
+from optimizer import optimize
+
+
+CORPUS = [
+    '1 + 2 * 3',
+    '7 / 2',
+    '-7 % 3',
+    '-7 // 2',
+    '7 // -2.0',
+    'x // 0',
+    '2 * 3 - 10 / 4',
+    '1 / 0',
+    '2147483647 + 1',
+    '1 < 2',
+    '3 == 3.0',
+    'not 0',
+    'not not b',
+    'not not x',
+    '- -x',
+    '- -y',
+    '- -b',
+    '+x',
+    '+b',
+    'x + 0',
+    '0 + x',
+    'y + 0',
+    'b + 0',
+    'x + 0.0',
+    'x - 0',
+    'y - 0',
+    'x * 1',
+    '1 * x',
+    'y * 1',
+    'x * 1.0',
+    'b * 1',
+    'x * 2',
+    '8 * x',
+    'x * 1024',
+    'y * 2',
+    'x % 2',
+    'x % 16',
+    'x % 6',
+    'x // 1',
+    'x // 4',
+    'x // 6',
+    'y // 2',
+    'b // 2',
+    '(x + 1) * 4 % 8',
+    'not x < 3',
+    'not y < 3',
+    'not (x == 5)',
+    'True and x',
+    'False and x',
+    '0 or x',
+    '3 or x',
+    'x and 0',
+    '(x * 1 + 0) * (2 + 2)',
+    '(1 + 2) * x % (4 * 4)',
+    '"ab" + "cd"',
+]
+
+OPERATORS = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv,
+    '//': operator.floordiv, '%': operator.mod, '<<': operator.lshift, '>>': operator.rshift, '&': operator.and_,
+    '<': operator.lt, '>': operator.gt, '<=': operator.le, '>=': operator.ge,
+    '==': operator.eq, '!=': operator.ne,
+}
+
+
+def evaluate(node, env):
+    """Evaluate an expression AST with Python semantics."""
+    if isinstance(node, (Number, Float, Boolean, String)):
+        return node.value
+    if isinstance(node, Variable):
+        return env[node.name]
+    if isinstance(node, UnaryOp):
+        value = evaluate(node.operand, env)
+        return not value if node.operator == 'not' else -value if node.operator == '-' else +value
+    if isinstance(node, BinaryOp):
+        left = evaluate(node.left, env)
+        if node.op == 'and':
+            return left and evaluate(node.right, env)
+        if node.op == 'or':
+            return left or evaluate(node.right, env)
+        return OPERATORS[node.op](left, evaluate(node.right, env))
+    raise TypeError(f"cannot evaluate {node!r}")
+
+
+def outcome(node, env):
+    """Return (type name, value) of evaluating `node`, or the exception it raises."""
+    try:
+        value = evaluate(node, env)
+    except ArithmeticError as e:
+        return type(e).__name__, None
+    if isinstance(value, float) and math.isnan(value):
+        return 'float', 'nan'
+    return type(value).__name__, value
+
+
+def parse_function(expression):
+    source = f'def f(x, y, b):\n    return {expression}\n\ndef main():\n    print(f(3, 1.5, True))\n'
+    return Parser(Lexer(source).iter_tokens()).parse()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--samples', type=int, default=200, help='random argument tuples per expression')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    envs = [{'x': 0, 'y': -0.0, 'b': False}, {'x': -1, 'y': 0.5, 'b': True}]
+    envs += [{'x': rng.randint(-1000, 1000), 'y': rng.uniform(-1e3, 1e3), 'b': rng.random() < 0.5}
+             for _ in range(args.samples)]
+
+    failures = 0
+    rewritten = 0
+    for expression in CORPUS:
+        program = parse_function(expression)
+        original = copy.deepcopy(program.statements[0].body[0].value)
+        optimized = optimize(program).statements[0].body[0].value
+        rewritten += repr(optimized) != repr(original) or type(optimized) is not type(original)
+        for env in envs:
+            before, after = outcome(original, env), outcome(optimized, env)
+            if before != after:
+                failures += 1
+                print(f"MISMATCH {expression!r} with {env}: {before} became {after} ({optimized!r})")
+                break
+    print(f"{len(CORPUS)} expressions, {rewritten} rewritten, {failures} mismatched, {len(envs)} samples each")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
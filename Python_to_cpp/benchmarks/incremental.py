@@ -0,0 +1,88 @@
+"""Time re-transpiling a large module after small edits, from scratch and incrementally.
+
+Usage: python -m benchmarks.incremental [--functions 5000] [--repeat 3]
+
+The module is the synthetic kernel program (about 11 lines per function).
+Each edit is applied to the previous version; the C++ from the incremental
+transpiler must be identical to transpiling the edited module from scratch,
+otherwise the script exits with status 1.
+
+Full transpiles report the best of `repeat` runs; each incremental one runs
+once, since it has to start from the state of the previous version.
+"""
+import argparse
+import sys
+import time
+
+from lexer import Lexer
+from parser import Parser
+from codegen import CodeGenerator
+from optimizer import optimize
+from incremental import IncrementalTranspiler
+from benchmarks.synthetic import generate_program
+
+
+def transpile(source):
+    """Transpile `source` from scratch, as main.py does."""
+    return CodeGenerator().generate(optimize(Parser(Lexer(source).iter_tokens()).parse()))
+
+
+def edits(functions):
+    """Yield (description, function of source -> edited source)."""
+    middle = functions // 2
+    yield 'body of one function', lambda source: source.replace(
+        f'def kernel_{middle}(arr, low, high):\n    total = 0',
+        f'def kernel_{middle}(arr, low, high):\n    total = 1')
+    yield 'return type of a called function', lambda source: source.replace(
+        'def kernel_0(arr, low, high):\n    total = 0\n    pivot = arr[high]\n    i = low - 1',
+        'def kernel_0(arr, low, high):\n    total = 0\n    pivot = arr[high]\n    i = low - 1.5')
+    yield 'new function', lambda source: source.replace(
+        'def main():', 'def extra(n):\n    return n * 2\n\ndef main():')
+    yield 'new call', lambda source: source.replace(
+        '    kernel_0(arr, 0, len(arr) - 1)\n', '    kernel_0(arr, 0, len(arr) - 1)\n    print(extra(3))\n')
+    yield 'no change', lambda source: source
+
+
+def best_time(function, repeat):
+    """Return (fastest time, result) of `repeat` calls of `function`."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--functions', type=int, default=5000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    source = generate_program(args.functions)
+    print(f"module: {source.count(chr(10))} lines, {args.functions + 1} functions")
+    transpiler = IncrementalTranspiler()
+    elapsed, _ = best_time(lambda: transpile(source), 1)
+    start = time.perf_counter()
+    transpiler.transpile(source)
+    print(f"{'initial':34} full {elapsed:7.3f}s  incremental {time.perf_counter() - start:7.3f}s")
+
+    failures = 0
+    for description, edit in edits(args.functions):
+        edited = edit(source)
+        full_time, expected = best_time(lambda: transpile(edited), args.repeat)
+        # Each incremental run builds on the state left by the previous version.
+        start = time.perf_counter()
+        output = transpiler.transpile(edited)
+        incremental_time = time.perf_counter() - start
+        status = 'ok' if output == expected else 'MISMATCH'
+        failures += status != 'ok'
+        stats = ', '.join(f"{key} {value}" for key, value in transpiler.stats.items())
+        print(f"{description:34} full {full_time:7.3f}s  incremental {incremental_time:7.3f}s  "
+              f"{full_time / incremental_time:6.1f}x  {status}  ({stats})")
+        source = edited
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
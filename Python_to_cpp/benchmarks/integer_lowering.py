@@ -0,0 +1,155 @@
+"""Compare the C++ int lowerings: proven ranges against all-native and all-checked arithmetic.
+
+Usage: python -m benchmarks.integer_lowering [--scale 1] [--repeat 3] [--cxx g++] [--cxxflags=-O2] [--seed 0] [--only NAME ...]
+
+Every kernel of benchmarks.kernels, plus some that are heavy on integer
+arithmetic, is transpiled with the optimizer three times: with
+integers="native" (plain C++ int arithmetic, as before range analysis),
+"ranges" (the default: checked or widened only where the range analysis
+cannot prove the native result right) and "checked" (every operation
+checked and floored). All three are compiled with the same flags and run.
+Ranges and checked must print what CPython prints; native is expected to
+differ on the kernels that overflow or divide negative numbers, which is
+what the other two are for. The time of each is shown relative to native.
+"""
+import argparse
+import math
+import os
+import random
+import shlex
+import sys
+import tempfile
+
+from lexer import Lexer
+from parser import Parser
+from codegen import CodeGenerator
+from optimizer import optimize
+from benchmarks.compiled_speed import compile_cpp, time_binary
+from benchmarks.kernels import KERNELS, render, time_python
+
+
+# A polynomial hash whose intermediate products exceed 32 bits.
+HASHING = '''def digest(data, rounds):
+    h = 0
+    for r in range(rounds):
+        for i in range(len(data)):
+            h = (h * 31 + data[i] - 500) % 1000000007
+    return h
+
+def main():
+    data = {data}
+    print(digest(data, {rounds}))
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Floor division and modulo of negative numbers, which C++ truncates.
+FLOORING = '''def spread(data, out, shift):
+    for i in range(len(data)):
+        v = data[i] - shift
+        out[i] = v // 7 + v % 7
+
+def main():
+    data = {data}
+    out = {zeros}
+    total = 0
+    for round in range({rounds}):
+        spread(data, out, round % 1000)
+        for i in range(len(out)):
+            total = (total + out[i]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Values stay within an int, but nothing short of running it shows that. Starting
+# points are kept below 113383, the first whose trajectory leaves a C++ int, so that
+# native arithmetic terminates at any scale.
+COLLATZ = '''def steps(n):
+    count = 0
+    while n != 1:
+        if n % 2 == 0:
+            n = n // 2
+        else:
+            n = 3 * n + 1
+        count = count + 1
+    return count
+
+def main():
+    total = 0
+    for i in range({rounds}):
+        total = total + steps(i % 100000 + 1)
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# name -> (Python source, input size at scale 1, repetitions at scale 1).
+INTEGER_KERNELS = {
+    'hashing': (HASHING, 10_000, 100),
+    'flooring': (FLOORING, 10_000, 100),
+    'collatz': (COLLATZ, 1, 100_000),
+}
+
+LOWERINGS = ('native', 'ranges', 'checked')
+
+
+def transpile(source, integers):
+    ast = Parser(Lexer(source).iter_tokens()).parse()
+    optimize(ast)
+    return CodeGenerator(integers=integers).generate(ast)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--scale', type=float, default=1, help='multiplier for input sizes and repetitions')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--cxxflags', default='-O2')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--only', nargs='*', choices=[*KERNELS, *INTEGER_KERNELS],
+                            help='kernels to run (default: all)')
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cxxflags = shlex.split(args.cxxflags)
+    ratios = {lowering: [] for lowering in LOWERINGS[1:]}
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (template, size, rounds) in {**KERNELS, **INTEGER_KERNELS}.items():
+            if args.only and name not in args.only:
+                continue
+            source = render(template, max(1, int(size * args.scale)), max(1, int(rounds * args.scale)), rng)
+            path = os.path.join(directory, f'{name}.py')
+            with open(path, 'w') as f:
+                f.write(source)
+            python_time, expected = time_python(path, args.repeat)
+            print(f"{name:15} python  {python_time:7.3f}s")
+            native_time = None
+            for lowering in LOWERINGS:
+                binary = compile_cpp(transpile(source, lowering), directory, f'{name}-{lowering}', args.cxx, cxxflags)
+                cpp_time, output = time_binary(binary, args.repeat)
+                matched = output.split() == expected.split()
+                if lowering == 'native':
+                    native_time = cpp_time
+                    relative = ''
+                    status = 'ok' if matched else 'differs from CPython'
+                else:
+                    ratios[lowering].append(cpp_time / native_time)
+                    relative = f"{cpp_time / native_time:5.2f}x native"
+                    status = 'ok' if matched else 'MISMATCH'
+                    failures += not matched
+                print(f"  {lowering:8} c++  {cpp_time:7.3f}s  {relative:12}  {status}")
+
+    print()
+    for lowering, values in ratios.items():
+        mean = math.exp(sum(math.log(value) for value in values) / len(values))
+        print(f"{lowering:8} geometric mean {mean:5.2f}x the time of native over {len(values)} kernels")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
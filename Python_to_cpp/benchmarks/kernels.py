@@ -0,0 +1,221 @@
+"""Time classic kernels in CPython against the C++ the transpiler generates for them.
+
+Usage: python -m benchmarks.kernels [--scale 1] [--repeat 3] [--cxx g++] [--cxxflags=-O2] [--seed 0]
+
+Each kernel is a complete Python program whose input arrays are written out
+as literals by this harness (the language has no list repetition). It is run
+with the current interpreter, then transpiled with the optimizer, compiled
+and run; both must print the same checksums. The best of `repeat` wall
+times is reported for each, process start-up included.
+"""
+import argparse
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.compiled_speed import compile_cpp, time_binary, transpile
+
+
+INSERTION_SORT = '''def insertion_sort(arr):
+    for i in range(1, len(arr)):
+        key = arr[i]
+        j = i - 1
+        while j >= 0 and arr[j] > key:
+            arr[j + 1] = arr[j]
+            j = j - 1
+        arr[j + 1] = key
+
+def checksum(arr):
+    total = 0
+    for i in range(len(arr)):
+        total = (total * 31 + arr[i]) % 1000003
+    return total
+
+def main():
+    arr = {data}
+    insertion_sort(arr)
+    print(arr[0], arr[len(arr) - 1], checksum(arr))
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Quicksort exercises recursion and the swap lowering.
+QUICK_SORT = '''def partition(arr, low, high):
+    pivot = arr[high]
+    i = low - 1
+    for j in range(low, high):
+        if arr[j] <= pivot:
+            i = i + 1
+            arr[i], arr[j] = arr[j], arr[i]
+    arr[i + 1], arr[high] = arr[high], arr[i + 1]
+    return i + 1
+
+def quick_sort(arr, low, high):
+    if low < high:
+        pi = partition(arr, low, high)
+        quick_sort(arr, low, pi - 1)
+        quick_sort(arr, pi + 1, high)
+
+def main():
+    for round in range({rounds}):
+        arr = {data}
+        quick_sort(arr, 0, len(arr) - 1)
+    total = 0
+    for i in range(len(arr)):
+        total = (total * 31 + arr[i]) % 1000003
+    print(arr[0], arr[len(arr) - 1], total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+PREFIX_SUMS = '''def prefix_sums(arr):
+    for i in range(1, len(arr)):
+        arr[i] = (arr[i] + arr[i - 1]) % 1000003
+
+def main():
+    arr = {data}
+    for round in range({rounds}):
+        prefix_sums(arr)
+    print(arr[len(arr) - 1])
+
+if __name__ == "__main__":
+    main()
+'''
+
+SIEVE = '''def sieve(flags):
+    count = 0
+    for i in range(2, len(flags)):
+        if flags[i] == 1:
+            count = count + 1
+            j = i + i
+            while j < len(flags):
+                flags[j] = 0
+                j = j + i
+    return count
+
+def main():
+    flags = {ones}
+    print(sieve(flags))
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Rotates each run of three elements; the tuple assignment lowers to swaps.
+ROTATE = '''def rotate_triples(arr):
+    for i in range(0, len(arr) - 2, 3):
+        arr[i], arr[i + 1], arr[i + 2] = arr[i + 1], arr[i + 2], arr[i]
+
+def main():
+    arr = {data}
+    for round in range({rounds}):
+        rotate_triples(arr)
+        arr[0], arr[len(arr) - 1] = arr[len(arr) - 1], arr[0]
+    total = 0
+    for i in range(len(arr)):
+        total = (total * 31 + arr[i]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Square matrices stored row-major in flat lists.
+MATRIX_MULTIPLY = '''def matmul(a, b, c, n):
+    for i in range(n):
+        for j in range(n):
+            total = 0
+            for k in range(n):
+                total = (total + a[i * n + k] * b[k * n + j]) % 1000003
+            c[i * n + j] = total
+
+def main():
+    a = {data}
+    b = {data}
+    c = {zeros}
+    matmul(a, b, c, {side})
+    total = 0
+    for i in range(len(c)):
+        total = (total + c[i]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# name -> (Python source, input size at scale 1, repetitions at scale 1).
+KERNELS = {
+    'insertion_sort': (INSERTION_SORT, 2_000, 1),
+    'quick_sort': (QUICK_SORT, 5_000, 20),
+    'prefix_sums': (PREFIX_SUMS, 10_000, 100),
+    'sieve': (SIEVE, 200_000, 1),
+    'rotate': (ROTATE, 10_000, 100),
+    'matmul': (MATRIX_MULTIPLY, 80, 1),
+}
+
+
+def render(source, size, rounds, rng):
+    """Fill a kernel template with literal input lists of `size` elements."""
+    side = size
+    if '{side}' in source:
+        size = side * side
+    return source.format(
+        data='[' + ', '.join(str(rng.randrange(1000)) for _ in range(size)) + ']',
+        ones='[' + ', '.join('1' for _ in range(size)) + ']',
+        zeros='[' + ', '.join('0' for _ in range(size)) + ']',
+        side=side,
+        rounds=rounds,
+    )
+
+
+def time_python(path, repeat):
+    """Run `path` with this interpreter `repeat` times; return (best seconds, its stdout)."""
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, path], check=True, capture_output=True, text=True)
+        best = min(best, time.perf_counter() - start)
+        output = result.stdout
+    return best, output
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--scale', type=float, default=1, help='multiplier for input sizes and repetitions')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--cxxflags', default='-O2')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--only', nargs='*', choices=KERNELS, help='kernels to run (default: all)')
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cxxflags = shlex.split(args.cxxflags)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (template, size, rounds) in KERNELS.items():
+            if args.only and name not in args.only:
+                continue
+            source = render(template, max(1, int(size * args.scale)), max(1, int(rounds * args.scale)), rng)
+            path = os.path.join(directory, f'{name}.py')
+            with open(path, 'w') as f:
+                f.write(source)
+            python_time, expected = time_python(path, args.repeat)
+            binary = compile_cpp(transpile(source, True), directory, name, args.cxx, cxxflags)
+            cpp_time, output = time_binary(binary, args.repeat)
+            status = 'ok' if output.split() == expected.split() else 'MISMATCH'
+            failures += status != 'ok'
+            print(f"{name:15} python {python_time:7.3f}s  c++ {cpp_time:7.3f}s  "
+                  f"speedup {python_time / cpp_time:7.1f}x  {status} {output.strip()!r}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Measure memory used per token and per AST node.
+
+Usage: python -m benchmarks.memory [--functions N]
+"""
+import argparse
+import gc
+import tracemalloc
+
+from lexer import Lexer
+from parser import Parser
+from visitor import walk
+from benchmarks.synthetic import generate_program
+
+
+def measure(build):
+    """Return (result, bytes still allocated after calling `build`)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--functions', type=int, default=500)
+    args = arg_parser.parse_args()
+
+    source = generate_program(functions=args.functions)
+    tokens, token_bytes = measure(lambda: Lexer(source).tokenize())
+    ast, ast_bytes = measure(lambda: Parser(Lexer(source).iter_tokens()).parse())
+    node_count = sum(1 for _ in walk(ast))
+
+    print(f"source:  {len(source)} bytes")
+    print(f"tokens:  {len(tokens)} tokens, {token_bytes} bytes, {token_bytes / len(tokens):.1f} bytes/token")
+    print(f"ast:     {node_count} nodes, {ast_bytes} bytes, {ast_bytes / node_count:.1f} bytes/node")
+
+
+if __name__ == '__main__':
+    main()
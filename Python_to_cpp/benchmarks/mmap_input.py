@@ -0,0 +1,92 @@
+"""Compare reading the whole source into memory with the memory-mapped, chunked lexer.
+
+Usage: python -m benchmarks.mmap_input [--size-mb 100] [--path FILE] [--heap]
+
+Each mode runs in a fresh subprocess so its peak memory is measured in
+isolation. Peak RSS also counts the mapped file pages, which the kernel can
+drop at will; --heap additionally traces the peak Python heap (slower). The
+token streams of both modes are also compared for identity.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from lexer import Lexer
+from benchmarks.synthetic import write_sized_program
+
+MODES = ('read', 'mmap')
+
+
+def lex(path, mode):
+    """Lex `path` with the given mode and return the number of tokens."""
+    if mode == 'read':
+        with open(path, 'r') as f:
+            lexer = Lexer(f.read())
+    else:
+        lexer = Lexer.from_file(path)
+    return sum(1 for _ in lexer.iter_tokens())
+
+
+def run_mode(path, mode, heap):
+    """Lex in this process and print tokens, seconds, peak RSS and peak heap (KiB)."""
+    if heap:
+        tracemalloc.start()
+    start = time.perf_counter()
+    count = lex(path, mode)
+    elapsed = time.perf_counter() - start
+    peak_heap = tracemalloc.get_traced_memory()[1] // 1024 if heap else -1
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(count, elapsed, peak_rss, peak_heap)
+
+
+def same_tokens(path):
+    """Return True if both modes produce identical token streams."""
+    with open(path, 'r') as f:
+        expected = Lexer(f.read()).iter_tokens()
+        actual = Lexer.from_file(path).iter_tokens()
+        for a, b in zip(expected, actual):
+            if (a.type, a.value, a.line, a.column) != (b.type, b.value, b.line, b.column):
+                return False
+    return next(expected, None) is None and next(actual, None) is None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--size-mb', type=float, default=100)
+    arg_parser.add_argument('--path', help='existing source file to lex instead of a synthetic one')
+    arg_parser.add_argument('--heap', action='store_true', help='also trace the peak Python heap')
+    arg_parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.mode:
+        run_mode(args.path, args.mode, args.heap)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if path is None:
+            path = os.path.join(tmp, 'synthetic.py')
+            write_sized_program(path, int(args.size_mb * 1024 * 1024))
+        print(f"input: {path} ({os.path.getsize(path) / 2**20:.1f} MiB)")
+
+        for mode in MODES:
+            command = [sys.executable, '-m', 'benchmarks.mmap_input', '--path', path, '--mode', mode]
+            if args.heap:
+                command.append('--heap')
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            count, elapsed, peak_rss, peak_heap = output.split()
+            line = f"{mode:5}: {int(count)} tokens in {float(elapsed):.2f}s, peak RSS {int(peak_rss) / 1024:.1f} MiB"
+            if args.heap:
+                line += f", peak heap {int(peak_heap) / 1024:.1f} MiB"
+            print(line)
+
+        print(f"identical token streams: {same_tokens(path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Measure parser throughput (tokens/second) on expression-heavy and deeply nested programs.
+
+Usage: python -m benchmarks.parser_speed [--depth 40] [--statements 2000] [--repeat 5]
+"""
+import argparse
+import time
+
+from lexer import Lexer
+from parser import Parser
+
+OPERATORS = ['+', '*', '-', '%', '<', '+', '/', '>=']
+
+
+def nested_expression(depth, seed):
+    """Return a fully parenthesized expression nested `depth` levels deep."""
+    expr = f"v{seed % 7}"
+    for level in range(depth):
+        operator = OPERATORS[(seed + level) % len(OPERATORS)]
+        expr = f"(arr[i{level % 3}] {operator} {expr})" if level % 2 else f"({expr} {operator} {level + 1})"
+    return expr
+
+
+def flat_expression(length, seed):
+    """Return a long unparenthesized chain mixing every precedence level."""
+    terms = [f"v{(seed + n) % 7}" if n % 3 else str(n + 1) for n in range(length)]
+    parts = [terms[0]]
+    for n, term in enumerate(terms[1:]):
+        parts.append(OPERATORS[(seed + n) % len(OPERATORS)])
+        parts.append(term)
+    return ' '.join(parts)
+
+
+SHAPES = {
+    'nested': nested_expression,
+    'flat': flat_expression,
+}
+
+
+def generate(shape, size, statements):
+    """Return a program of `statements` assignments of the given expression shape."""
+    build = SHAPES[shape]
+    return ''.join(f"x{n} = {build(size, n)}\n" for n in range(statements))
+
+
+def nested_blocks(depth, statements):
+    """Return a program of `statements` if statements, each nesting `depth` indented blocks."""
+    lines = []
+    for n in range(statements):
+        for level in range(depth):
+            lines.append(f"{'    ' * level}if v{level % 7} < {n + level}:")
+        lines.append(f"{'    ' * depth}x{n} = {n}")
+    return ''.join(line + '\n' for line in lines)
+
+
+def best_time(tokens, repeat):
+    """Return the fastest of `repeat` parses of `tokens`."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Parser(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--depth', type=int, default=40, help='nesting depth / chain length of each expression')
+    arg_parser.add_argument('--statements', type=int, default=2000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    programs = {shape: generate(shape, args.depth, args.statements) for shape in SHAPES}
+    programs['blocks'] = nested_blocks(args.depth, args.statements)
+    for shape, source in programs.items():
+        tokens = Lexer(source).tokenize()
+        elapsed = best_time(tokens, args.repeat)
+        print(f"{shape:7}: {len(tokens)} tokens in {elapsed:.3f}s, {len(tokens) / elapsed:,.0f} tokens/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Time print-heavy programs in CPython and as compiled C++, with buffered and per-line flushed output.
+
+Usage: python -m benchmarks.printing [--scale 1] [--repeat 3] [--cxx g++] [--cxxflags=-O2]
+
+Each kernel prints one line per iteration: ints, floats, bools or short
+lists. It is run with the current interpreter, transpiled with the
+optimizer and compiled twice: as generated, with output going through the
+buffered py_print() runtime, and with that runtime swapped for the one
+print used to be, a `cout << ...` per argument and `endl` at the end of
+each line. The generated program must print exactly what CPython prints;
+the flushed one is only timed, since iostreams format floats and bools
+differently. Output goes to a file, as it would when redirected.
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+from codegen import OUTPUT_RUNTIME
+from benchmarks.compiled_speed import compile_cpp, transpile
+
+
+# Stands in for OUTPUT_RUNTIME: what print() generated before the buffered writer.
+ENDL_RUNTIME = '''template <typename T>
+ostream& operator<<(ostream& os, const vector<T>& v) {
+    os << "[";
+    for (size_t i = 0; i < v.size(); ++i) {
+        os << v[i];
+        if (i + 1 < v.size()) os << ", ";
+    }
+    return os << "]";
+}
+
+inline void py_print() {
+    cout << endl;
+}
+
+template <typename First, typename... Rest>
+void py_print(const First& first, const Rest&... rest) {
+    cout << first;
+    ((cout << " " << rest), ...);
+    cout << endl;
+}'''
+
+INTS = '''def main():
+    for i in range({lines}):
+        print(i, i * 7919 % 1000, -i)
+
+if __name__ == "__main__":
+    main()
+'''
+
+FLOATS = '''def main():
+    x = 0.0
+    for i in range({lines}):
+        x = x + 0.1
+        print(x, i / 7, i * 0.5)
+
+if __name__ == "__main__":
+    main()
+'''
+
+BOOLS = '''def main():
+    for i in range({lines}):
+        print(i % 2 == 0, i % 3 == 0, i)
+
+if __name__ == "__main__":
+    main()
+'''
+
+LISTS = '''def main():
+    a = [1, 2, 3, 4, 5, 6, 7, 8]
+    for i in range({lines}):
+        a[i % 8] = i
+        print(a)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# name -> (Python source, lines printed at scale 1).
+KERNELS = {
+    'ints': (INTS, 1_000_000),
+    'floats': (FLOATS, 500_000),
+    'bools': (BOOLS, 1_000_000),
+    'lists': (LISTS, 500_000),
+}
+
+
+def time_to_file(command, path, repeat):
+    """Run `command` `repeat` times with stdout sent to `path`; return (best seconds, output)."""
+    best = float('inf')
+    for _ in range(repeat):
+        with open(path, 'w') as f:
+            start = time.perf_counter()
+            subprocess.run(command, check=True, stdout=f)
+            best = min(best, time.perf_counter() - start)
+    with open(path) as f:
+        return best, f.read()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--scale', type=float, default=1, help='multiplier for the number of lines printed')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--cxxflags', default='-O2')
+    args = arg_parser.parse_args()
+
+    cxxflags = shlex.split(args.cxxflags)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, 'stdout.txt')
+        for name, (template, lines) in KERNELS.items():
+            source = template.format(lines=max(1, int(lines * args.scale)))
+            path = os.path.join(directory, f'{name}.py')
+            with open(path, 'w') as f:
+                f.write(source)
+            python_time, expected = time_to_file([sys.executable, path], output_path, args.repeat)
+            code = transpile(source, True)
+            buffered = compile_cpp(code, directory, f'{name}-buffered', args.cxx, cxxflags)
+            flushed = compile_cpp(code.replace(OUTPUT_RUNTIME, ENDL_RUNTIME), directory, f'{name}-endl', args.cxx,
+                                  cxxflags)
+            buffered_time, output = time_to_file([buffered], output_path, args.repeat)
+            endl_time, _ = time_to_file([flushed], output_path, args.repeat)
+            status = 'ok' if output == expected else 'MISMATCH'
+            failures += status != 'ok'
+            print(f"{name:7} python {python_time:7.3f}s  endl {endl_time:7.3f}s  buffered {buffered_time:7.3f}s"
+                  f"  speedup {python_time / buffered_time:5.1f}x ({endl_time / buffered_time:5.1f}x over endl)"
+                  f"  {status}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Time numeric range() loops in CPython and as compiled C++ at several -O levels.
+
+Usage: python -m benchmarks.range_loops [--scale 1] [--repeat 3] [--cxx g++] [--opt O2 O3] [--seed 0]
+
+The kernels cover the shapes the range-loop lowering distinguishes:
+element-wise loops it marks as free of dependences between iterations,
+a loop-carried recurrence it must not mark, a downward loop with a
+negative step, a strided one, and one whose step is only known at run
+time. Each is run with the current interpreter, transpiled with the
+optimizer, compiled at every level and run; all must print the same.
+With g++ the loops it reports as vectorized are counted too.
+"""
+import argparse
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.compiled_speed import compile_cpp, time_binary, transpile
+from benchmarks.kernels import render, time_python
+
+
+ELEMENTWISE = '''def axpy(a, b, c, k):
+    for i in range(len(a)):
+        c[i] = (a[i] * k + b[i]) % 1000003
+
+def main():
+    a = {data}
+    b = {data}
+    c = {zeros}
+    for round in range({rounds}):
+        axpy(a, b, c, round)
+        axpy(c, b, a, 3)
+    total = 0
+    for i in range(len(a)):
+        total = (total + a[i]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Each element depends on the previous one, so the loop must not be marked.
+RECURRENCE = '''def smooth(a):
+    for i in range(1, len(a)):
+        a[i] = (a[i] + a[i - 1] * 3) % 1000003
+
+def main():
+    a = {data}
+    for round in range({rounds}):
+        smooth(a)
+    print(a[len(a) - 1])
+
+if __name__ == "__main__":
+    main()
+'''
+
+DOWNWARD = '''def suffix_max(a, out):
+    best = 0
+    for i in range(len(a) - 1, -1, -1):
+        if a[i] > best:
+            best = a[i]
+        out[i] = best
+
+def main():
+    a = {data}
+    out = {zeros}
+    total = 0
+    for round in range({rounds}):
+        a[round % len(a)] = round % 1000
+        suffix_max(a, out)
+        total = (total + out[0] + out[len(out) - 1]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+STRIDED = '''def scale_thirds(a, k):
+    for i in range(0, len(a), 3):
+        a[i] = (a[i] * k) % 1000003
+
+def main():
+    a = {data}
+    for round in range({rounds}):
+        scale_thirds(a, 3)
+        scale_thirds(a, 5)
+    total = 0
+    for i in range(len(a)):
+        total = (total * 31 + a[i]) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# The step is a parameter, so its sign is tested when the loop starts.
+RUNTIME_STEP = '''def walk(a, start, stop, step):
+    total = 0
+    for i in range(start, stop, step):
+        total = (total * 7 + a[i]) % 1000003
+    return total
+
+def main():
+    a = {data}
+    total = 0
+    for round in range({rounds}):
+        total = (total + walk(a, 0, len(a), 1) + walk(a, len(a) - 1, -1, -1) + walk(a, 1, len(a), 2)) % 1000003
+    print(total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# name -> (Python source, input size at scale 1, repetitions at scale 1).
+KERNELS = {
+    'elementwise': (ELEMENTWISE, 10_000, 100),
+    'recurrence': (RECURRENCE, 10_000, 100),
+    'downward': (DOWNWARD, 10_000, 100),
+    'strided': (STRIDED, 10_000, 100),
+    'runtime_step': (RUNTIME_STEP, 10_000, 50),
+}
+
+
+def vectorized_loops(cxx, cxxflags, directory, name, code):
+    """Number of loops g++ reports vectorizing in `code`, or None for other compilers."""
+    if os.path.basename(cxx) != 'g++':
+        return None
+    source = os.path.join(directory, f'{name}-vec.cpp')
+    with open(source, 'w') as f:
+        f.write(code)
+    result = subprocess.run([cxx, *cxxflags, '-fopt-info-vec-optimized', '-c', '-o', os.devnull, source],
+                            check=True, capture_output=True, text=True)
+    # Loops with several versions are reported once per version; count each line once.
+    return len({line.split(': ')[0] for line in result.stderr.splitlines() if 'loop vectorized' in line})
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--scale', type=float, default=1, help='multiplier for input sizes and repetitions')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--opt', nargs='+', default=['O2', 'O3'], help='optimization levels')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (template, size, rounds) in KERNELS.items():
+            source = render(template, max(1, int(size * args.scale)), max(1, int(rounds * args.scale)), rng)
+            path = os.path.join(directory, f'{name}.py')
+            with open(path, 'w') as f:
+                f.write(source)
+            python_time, expected = time_python(path, args.repeat)
+            code = transpile(source, True)
+            marked = code.count('    PY_IVDEP')
+            print(f"{name:13} python {python_time:7.3f}s  ({marked} loop{'s' * (marked != 1)} marked independent)")
+            for opt in args.opt:
+                cxxflags = shlex.split(f'-{opt}')
+                binary = compile_cpp(code, directory, f'{name}-{opt}', args.cxx, cxxflags)
+                cpp_time, output = time_binary(binary, args.repeat)
+                status = 'ok' if output == expected else 'MISMATCH'
+                failures += status != 'ok'
+                vectorized = vectorized_loops(args.cxx, cxxflags, directory, name, code)
+                detail = '' if vectorized is None else f"  {vectorized} loops vectorized"
+                print(f"  -{opt:3} c++ {cpp_time:7.3f}s  speedup {python_time / cpp_time:7.1f}x  {status}{detail}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""Check small programs that were once transpiled wrongly against CPython.
+
+Usage: python -m benchmarks.regressions [--cxx g++] [--cxxflags=-O2] [--only NAME ...]
+
+Each program is run with the current interpreter, transpiled with and
+without the optimizer, compiled and run. The C++ program must print what
+CPython prints. A program that CPython runs to the end but whose values
+do not fit a C++ int lists the exception the C++ program must stop with
+instead: what it printed before that must still match the start of
+CPython's output. A program in KNOWN_DIFFERENCES lists what the C++
+program prints where the transpiler knowingly departs from Python, so
+that the difference stays documented and any change to it is noticed.
+Any other outcome is reported and makes the script exit with status 1.
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.compiled_speed import compile_cpp, transpile
+
+
+# Fibonacci by tuple assignment: the temporary holding the old `a` is added without a check.
+FIBONACCI = '''def fib(n):
+    a, b = 0, 1
+    for i in range(n):
+        a, b = b, a + b
+    return a
+
+def main():
+    print(fib(40))
+    print(fib(50))
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Invariant products moved out of loops: a long long cut down to an int temporary, and a
+# checked multiplication run although its branch or loop never is.
+HOISTING = '''def wide(a, b, n):
+    for i in range(n):
+        print(a * b + i)
+
+def untaken(a, b, n, flag):
+    total = 0
+    for i in range(n):
+        if flag:
+            total = total + a * b
+    return total
+
+def repeated(a, b, n):
+    total = 0
+    for i in range(n):
+        total = total + a * b
+    return total
+
+def main():
+    wide(100000, 100000, 2)
+    print(untaken(100000, 100000, 3, False))
+    print(repeated(100000, 100000, 0))
+    print(repeated(1000, 1000, 3))
+
+if __name__ == "__main__":
+    main()
+'''
+
+# A list parameter rebound and then changed: only the new list may change, not the caller's.
+REBINDING = '''def reset(xs):
+    xs = [0, 0]
+    xs[0] = 5
+    return xs
+
+def fill(xs, n):
+    xs[0] = n
+
+def main():
+    a = [1, 2]
+    b = reset(a)
+    print(a, b)
+    fill(a, 7)
+    print(a)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Lists a function changes in place, passed as values that are not variables.
+TEMPORARY_ARGUMENTS = '''def setfirst(xs, v):
+    xs[0] = v
+    return xs[0] + len(xs)
+
+def make():
+    return [1, 2, 3]
+
+def first_row(rows):
+    return setfirst(rows[0], 3)
+
+def main():
+    print(setfirst([0], 1))
+    print(setfirst(make(), 5))
+    grid = [[1, 2], [3, 4]]
+    print(first_row(grid), grid)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# A comprehension variable named like a list local: Python binds it in the comprehension only.
+COMPREHENSION_SCOPE = '''def main():
+    c = [1, 2]
+    d = [c * 2 for c in range(3)]
+    e = [len(c) for c in [[1], [2, 3]]]
+    total = sum(c * c for c in range(100))
+    print(c, d, e, total)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# range() steps that carry an int counter past INT_MAX or INT_MIN after the last iteration.
+RANGE_OVERFLOW = '''def count(start, end, step):
+    n = 0
+    for i in range(start, end, step):
+        n = n + 1
+    return n
+
+def main():
+    print(len([i for i in range(2147483640, 2147483647, 3)]))
+    for i in range(-2147483640, -2147483648, -5):
+        print(i)
+    print(count(2147483600, 2147483647, 7), count(-2147483600, -2147483648, -9), count(10, 0, -3))
+
+if __name__ == "__main__":
+    main()
+'''
+
+# sum() of a generator whose terms need a long long: printed, the total fits in 64 bits.
+WIDE_SUM = '''def main():
+    n = 100000
+    print(sum(i * i for i in range(n)))
+    print(sum([i * 3 for i in range(n) if i % 2 == 0]) + 1)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Values rotated between variables in a loop: the analysis of the loop has to settle.
+ROTATION = '''def rotate_while():
+    a = 0
+    b = 0
+    i = 0
+    while i < 3:
+        t = a
+        a = b
+        b = t + 1
+        i += 1
+    print(a, b)
+
+def rotate_for():
+    a = 0
+    b = 0
+    for i in range(3):
+        a, b = b, a + 1
+    print(a, b)
+
+def main():
+    rotate_while()
+    rotate_for()
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Arithmetic and comparisons on len() of an empty list, which go below zero.
+SIGNED_LEN = '''def main():
+    a = []
+    b = [1, 2, 3]
+    print(len(a) - 3)
+    print(len(a) - 1 < 0, 0 < len(a) - 1)
+    print(len(b) - len(a) - 4, -len(b))
+    print((len(a) - 3) // 2, (len(a) - 3) % 2)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# Multiplications by powers of two, strength-reduced to shifts, of negative values.
+NEGATIVE_SHIFT = '''def scale(x):
+    return x * 8
+
+def main():
+    total = 0
+    for i in range(-5, 5):
+        total = total + i * 4 + 32 * i
+    print(total, scale(-3), scale(7))
+    for i in range(4):
+        print(i * 2)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# sum() of list literals, the empty one included.
+LITERAL_SUM = '''def main():
+    print(sum([]))
+    print(sum([1, 2]), sum([1.5, 2.0]))
+    x = sum([]) + 1
+    print(x)
+
+if __name__ == "__main__":
+    main()
+'''
+
+# A variable holding both ints and floats is a double, so its int values print as floats.
+MIXED_NUMBERS = '''def sq(x):
+    return x * x
+
+def main():
+    x = 1
+    print(x)
+    x = 2.5
+    print(x, sq(3), sq(1.5))
+
+if __name__ == "__main__":
+    main()
+'''
+
+# name -> (Python source, exception the C++ program raises where CPython carries on, or None).
+PROGRAMS = {
+    'fibonacci': (FIBONACCI, 'overflow_error'),
+    'hoisting': (HOISTING, None),
+    'rebinding': (REBINDING, None),
+    'temporary_arguments': (TEMPORARY_ARGUMENTS, None),
+    'comprehension_scope': (COMPREHENSION_SCOPE, None),
+    'range_overflow': (RANGE_OVERFLOW, None),
+    'wide_sum': (WIDE_SUM, None),
+    'rotation': (ROTATION, None),
+    'signed_len': (SIGNED_LEN, None),
+    'negative_shift': (NEGATIVE_SHIFT, None),
+    'literal_sum': (LITERAL_SUM, None),
+}
+
+# name -> (Python source, what the C++ program prints instead of CPython's output).
+KNOWN_DIFFERENCES = {
+    'mixed_numbers': (MIXED_NUMBERS, '1.0\n2.5 9.0 2.25\n'),
+}
+
+
+def run(command):
+    """Run `command`; return (exit status, stdout, stderr)."""
+    result = subprocess.run(command, capture_output=True, text=True)
+    return result.returncode, result.stdout, result.stderr
+
+
+def check(expected, outcome, raises):
+    """Describe how the C++ `outcome` differs from CPython's `expected` (None if it does not)."""
+    status, output, errors = outcome
+    if raises is None:
+        if status != 0:
+            return f"exited with status {status}: {errors.strip().splitlines()[-1:]}"
+        return None if output == expected else f"printed {output!r}, expected {expected!r}"
+    if status == 0 or raises not in errors:
+        return f"did not raise {raises} (status {status}, printed {output!r})"
+    return None if expected.startswith(output) else f"printed {output!r} before raising, expected {expected!r}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--cxx', default='g++')
+    arg_parser.add_argument('--cxxflags', default='-O2')
+    arg_parser.add_argument('--only', nargs='+', help='names of the programs to check')
+    args = arg_parser.parse_args()
+
+    cxxflags = shlex.split(args.cxxflags)
+    failures = 0
+    cases = [(name, source, raises, None) for name, (source, raises) in PROGRAMS.items()]
+    cases += [(name, source, None, prints) for name, (source, prints) in KNOWN_DIFFERENCES.items()]
+    with tempfile.TemporaryDirectory() as directory:
+        for name, source, raises, prints in cases:
+            if args.only and name not in args.only:
+                continue
+            path = os.path.join(directory, f'{name}.py')
+            with open(path, 'w') as f:
+                f.write(source)
+            status, expected, errors = run([sys.executable, path])
+            if status != 0:
+                print(f"{name:20} CPython failed: {errors.strip().splitlines()[-1:]}")
+                failures += 1
+                continue
+            for optimized in (True, False):
+                binary = compile_cpp(transpile(source, optimized), directory, f'{name}-{int(optimized)}', args.cxx,
+                                     cxxflags)
+                problem = check(expected if prints is None else prints, run([binary]), raises)
+                failures += problem is not None
+                label = 'optimized' if optimized else 'plain'
+                print(f"{name:20} {label:9}  {'ok' if problem is None else 'FAIL ' + problem}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Run a corpus of Python programs under CPython and as transpiled C++, and compare.
+
+Usage: python -m benchmarks.runtime [--cxx g++ clang++] [--opt O0 O2 O3] [--repeat 3] [--scale 1] [--output results.json] [PATH ...]
+
+Each PATH is a Python file or a directory searched recursively for .py
+files; without any, the corpus is my.py plus the kernels of
+benchmarks.kernels rendered at --scale. Every program is run with the
+current interpreter, transpiled with transpile_python_to_cpp (as main.py
+does, uncached), compiled with each available compiler at each -O level,
+and run. Its stdout must be exactly what CPython printed (list printing,
+number formatting and all); a mismatch shows the first differing line.
+The best of `repeat` wall times is reported for each run, process start-up
+included, together with the speedup over CPython and its geometric mean
+over the programs that matched.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from batch import collect_sources
+from main import transpile_python_to_cpp
+from benchmarks.compiled_speed import time_binary
+from benchmarks.kernels import KERNELS, render, time_python
+
+
+def default_corpus(directory, scale, seed=0):
+    """Write the kernels into `directory`; return them with my.py as the corpus."""
+    rng = random.Random(seed)
+    paths = ['my.py']
+    for name, (template, size, rounds) in KERNELS.items():
+        path = os.path.join(directory, f'{name}.py')
+        with open(path, 'w') as f:
+            f.write(render(template, max(1, int(size * scale)), max(1, int(rounds * scale)), rng))
+        paths.append(path)
+    return paths
+
+
+def transpile(path, output_file):
+    """Transpile `path` through the main.py driver; return its error message, or None."""
+    progress = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(progress):
+            transpile_python_to_cpp(path, output_file)
+    except SystemExit:
+        return progress.getvalue().strip().splitlines()[-1]
+    return None
+
+
+def first_difference(expected, output):
+    """Describe the first line where `output` differs from `expected`."""
+    expected_lines = expected.splitlines()
+    output_lines = output.splitlines()
+    for number, (want, got) in enumerate(zip(expected_lines, output_lines), 1):
+        if want != got:
+            return f"line {number}: expected {want!r}, got {got!r}"
+    return f"expected {len(expected_lines)} lines, got {len(output_lines)}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('paths', nargs='*', help='Python programs or directories (default: built-in corpus)')
+    arg_parser.add_argument('--cxx', nargs='+', default=['g++', 'clang++'], help='compilers to use if installed')
+    arg_parser.add_argument('--opt', nargs='+', default=['O0', 'O2', 'O3'], help='optimization levels')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--scale', type=float, default=1, help='size multiplier for the built-in corpus')
+    arg_parser.add_argument('--output', help='write the results to this JSON file')
+    args = arg_parser.parse_args()
+
+    compilers = [cxx for cxx in args.cxx if shutil.which(cxx)]
+    if not compilers:
+        print(f"none of {', '.join(args.cxx)} is installed", file=sys.stderr)
+        return 2
+    configs = [(cxx, opt) for cxx in compilers for opt in args.opt]
+    results = {}
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        paths = collect_sources(args.paths) if args.paths else default_corpus(directory, args.scale)
+        for path in paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            try:
+                python_time, expected = time_python(path, args.repeat)
+            except subprocess.CalledProcessError as e:
+                results[path] = {'error': e.stderr}
+                failures += 1
+                print(f"{name:20} PYTHON FAILED: {e.stderr.strip().splitlines()[-1]}")
+                continue
+            result = results[path] = {'python': python_time, 'cpp': {}}
+            print(f"{name:20} python {python_time:8.3f}s")
+            cpp_file = os.path.join(directory, f'{name}.cpp')
+            error = transpile(path, cpp_file)
+            if error is not None:
+                result['error'] = error
+                failures += 1
+                print(f"  TRANSPILE FAILED: {error}")
+                continue
+            for cxx, opt in configs:
+                binary = os.path.join(directory, f'{name}-{cxx}-{opt}')
+                compiled = subprocess.run([cxx, f'-{opt}', '-o', binary, cpp_file], capture_output=True, text=True)
+                config = f'{cxx} -{opt}'
+                if compiled.returncode != 0:
+                    result['cpp'][config] = {'error': compiled.stderr}
+                    failures += 1
+                    print(f"  {config:14} COMPILE FAILED: {compiled.stderr.strip().splitlines()[0]}")
+                    continue
+                cpp_time, output = time_binary(binary, args.repeat)
+                matched = output == expected
+                failures += not matched
+                result['cpp'][config] = {'seconds': cpp_time, 'speedup': python_time / cpp_time, 'matched': matched}
+                status = 'ok' if matched else f"MISMATCH {first_difference(expected, output)}"
+                print(f"  {config:14} c++ {cpp_time:8.3f}s  speedup {python_time / cpp_time:7.1f}x  {status}")
+
+    print()
+    for cxx, opt in configs:
+        config = f'{cxx} -{opt}'
+        speedups = [result['cpp'][config]['speedup'] for result in results.values()
+                    if result.get('cpp', {}).get(config, {}).get('matched')]
+        if speedups:
+            mean = math.exp(sum(math.log(speedup) for speedup in speedups) / len(speedups))
+            print(f"{config:14} geometric mean speedup {mean:7.1f}x over {len(speedups)} matching programs")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
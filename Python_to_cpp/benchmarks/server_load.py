@@ -0,0 +1,133 @@
+"""Load-test the transpile server with concurrent, pipelined clients.
+
+Usage: python -m benchmarks.server_load [--clients 8] [--requests 200] [--window 16] [--functions 20] [--workers N] [--spawn 10]
+
+Starts server.py on a temporary Unix socket (or uses --address PATH or
+HOST:PORT) and has each client thread send `requests` synthetic modules,
+keeping up to `window` of them in flight. Reports the overall throughput,
+the client-side latency percentiles and the server's own counters. For
+comparison, the same module is also transpiled `spawn` times by starting
+`python main.py` per file, as the build tools did before.
+"""
+import argparse
+import collections
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from client import TranspileClient
+from benchmarks.synthetic import generate_program
+
+
+def parse_address(address):
+    """A Unix socket path, or a (host, port) pair for HOST:PORT."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def start_server(socket_path, workers):
+    """Start server.py on `socket_path` and wait until it accepts connections."""
+    command = [sys.executable, 'server.py', '--socket', socket_path]
+    if workers:
+        command += ['--workers', str(workers)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # The server prints its address once it is listening.
+    process.stdout.readline()
+    return process
+
+
+def run_client(address, sources, window, latencies, failures):
+    """Send `sources` over one connection, recording each request's latency."""
+    with TranspileClient(address) as client:
+        sent = collections.deque()
+        for source in sources:
+            if len(sent) == window:
+                receive(client, sent, latencies, failures)
+            sent.append((client.send(source=source), time.perf_counter()))
+        while sent:
+            receive(client, sent, latencies, failures)
+
+
+def receive(client, sent, latencies, failures):
+    request_id, start = sent.popleft()
+    response = client.receive(request_id)
+    latencies.append(time.perf_counter() - start)
+    if not response['ok']:
+        failures.append(response['error'])
+
+
+def time_spawn(source, count, directory):
+    """Return the mean seconds for `count` runs of main.py, one process per file."""
+    input_file = os.path.join(directory, 'input.py')
+    with open(input_file, 'w') as f:
+        f.write(source)
+    start = time.perf_counter()
+    for _ in range(count):
+        subprocess.run([sys.executable, 'main.py', '--no-cache', input_file, os.path.join(directory, 'output.cpp')],
+                       check=True, capture_output=True)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--address', help='use a running server at PATH or HOST:PORT')
+    arg_parser.add_argument('--workers', type=int, help='worker processes of the started server')
+    arg_parser.add_argument('--clients', type=int, default=8)
+    arg_parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    arg_parser.add_argument('--window', type=int, default=16, help='requests in flight per client')
+    arg_parser.add_argument('--functions', type=int, default=20, help='functions per synthetic module')
+    arg_parser.add_argument('--spawn', type=int, default=10, help='main.py runs to compare against (0 to skip)')
+    args = arg_parser.parse_args()
+
+    # Distinct modules, so nothing on the way can serve a repeat from a cache.
+    sources = [generate_program(args.functions).replace('kernel_', f'k{n}_') for n in range(args.requests)]
+    with tempfile.TemporaryDirectory() as directory:
+        server = None
+        if args.address:
+            address = parse_address(args.address)
+        else:
+            address = os.path.join(directory, 'server.sock')
+            server = start_server(address, args.workers)
+        try:
+            latencies = []
+            failures = []
+            threads = [threading.Thread(target=run_client, args=(address, sources, args.window, latencies, failures))
+                       for _ in range(args.clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            with TranspileClient(address) as client:
+                stats = client.stats()
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+        total = len(latencies)
+        quantiles = statistics.quantiles(latencies, n=100) if total > 1 else latencies * 99
+        print(f"{args.clients} clients x {args.requests} requests, window {args.window}, "
+              f"{args.functions} functions per module")
+        print(f"throughput {total / elapsed:8.1f} requests/s  ({total} in {elapsed:.2f}s, {len(failures)} failed)")
+        print(f"latency    p50 {quantiles[49] * 1000:7.1f} ms  p99 {quantiles[98] * 1000:7.1f} ms  "
+              f"max {max(latencies) * 1000:7.1f} ms")
+        server_latency = stats['latency_ms']
+        print(f"server     {stats['requests_per_second']:8.1f} requests/s over its uptime, "
+              f"transpile p50 {server_latency['p50']:.1f} ms  p99 {server_latency['p99']:.1f} ms")
+        if args.spawn:
+            per_file = time_spawn(sources[0], args.spawn, directory)
+            print(f"main.py    {per_file * 1000:7.1f} ms per file with a process each "
+                  f"({1 / per_file:.1f} files/s, server is {total / elapsed * per_file:.1f}x)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
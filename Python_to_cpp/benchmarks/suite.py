@@ -0,0 +1,155 @@
+"""Time every pipeline stage on synthetic programs and gate on a stored baseline.
+
+Usage: python -m benchmarks.suite [--scale 1] [--repeat 3] [--shapes ...] [--output results.json] [--baseline baseline.json] [--threshold 0.10]
+
+Programs of each shape (deep expressions, many functions, one long loop,
+a large list literal) are generated at a size set by --scale. The lexer,
+parser, optimizer and code generator are timed separately, each the best
+of `repeat` runs on the previous stage's output, and their peak traced
+memory is measured in one extra run under tracemalloc. Throughput is
+tokens/s for the lexer and AST nodes/s for the other stages.
+
+The results are written as JSON with --output. With --baseline, each
+stage's time is compared against the same stage in that file, and the
+script exits with status 1 if any is more than `threshold` slower.
+"""
+import argparse
+import copy
+import datetime
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from lexer import Lexer
+from parser import Parser
+from optimizer import optimize
+from codegen import CodeGenerator
+from visitor import walk
+from benchmarks.parser_speed import generate as generate_expressions
+from benchmarks.synthetic import generate_program, generate_long_loop, generate_large_list
+
+
+# shape -> function of scale returning the program source.
+SHAPES = {
+    'deep_expressions': lambda scale: generate_expressions('nested', 40, int(1000 * scale)),
+    'many_functions': lambda scale: generate_program(int(1000 * scale)),
+    'long_loop': lambda scale: generate_long_loop(int(2000 * scale)),
+    'large_list': lambda scale: generate_large_list(int(200_000 * scale)),
+}
+
+# stage -> (function of the previous stage's output, whether it needs a fresh copy of that output).
+STAGES = {
+    'lex': (lambda source: Lexer(source).tokenize(), False),
+    'parse': (lambda tokens: Parser(tokens).parse(), False),
+    'optimize': (optimize, True),
+    'codegen': (lambda ast: CodeGenerator().generate(ast), False),
+}
+
+
+def best_time(stage, data, copies, repeat):
+    """Return (fastest time, result) of `repeat` runs of `stage` on `data`."""
+    best = float('inf')
+    for _ in range(repeat):
+        if copies:
+            data_copy = copy.deepcopy(data)
+        start = time.perf_counter()
+        result = stage(data_copy if copies else data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(stage, data, copies):
+    """Return the peak bytes traced while `stage` runs on `data`."""
+    if copies:
+        data = copy.deepcopy(data)
+    tracemalloc.start()
+    try:
+        stage(data)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_shape(source, repeat):
+    """Time and measure every stage on `source`; return the shape's results."""
+    result = {'source_bytes': len(source), 'stages': {}}
+    data = source
+    for name, (stage, copies) in STAGES.items():
+        elapsed, output = best_time(stage, data, copies, repeat)
+        stats = {'seconds': elapsed, 'peak_bytes': peak_memory(stage, data, copies)}
+        if name == 'lex':
+            result['tokens'] = len(output)
+            stats['tokens_per_second'] = len(output) / elapsed
+        else:
+            ast = output if name != 'codegen' else data
+            stats['nodes_per_second'] = sum(1 for _ in walk(ast)) / elapsed
+        result['stages'][name] = stats
+        if name != 'codegen':
+            data = output
+    result['nodes'] = sum(1 for _ in walk(data))
+    return result
+
+
+def compare(results, baseline, threshold):
+    """Return (shape, stage, baseline seconds, seconds) for each stage over `threshold` slower."""
+    regressions = []
+    for shape, result in results['shapes'].items():
+        previous = baseline['shapes'].get(shape)
+        if previous is None:
+            continue
+        for stage, stats in result['stages'].items():
+            before = previous['stages'].get(stage)
+            if before is not None and stats['seconds'] > before['seconds'] * (1 + threshold):
+                regressions.append((shape, stage, before['seconds'], stats['seconds']))
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--scale', type=float, default=1, help='multiplier for program sizes')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--shapes', nargs='*', choices=SHAPES, help='shapes to run (default: all)')
+    arg_parser.add_argument('--output', help='write the results to this JSON file')
+    arg_parser.add_argument('--baseline', help='JSON results to compare against')
+    arg_parser.add_argument('--threshold', type=float, default=0.10,
+                            help='fraction a stage may be slower than the baseline (default: 0.10)')
+    args = arg_parser.parse_args()
+
+    results = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'shapes': {},
+    }
+    for shape, build in SHAPES.items():
+        if args.shapes and shape not in args.shapes:
+            continue
+        result = results['shapes'][shape] = run_shape(build(args.scale), args.repeat)
+        print(f"{shape:16} {result['source_bytes']:>10} bytes {result['tokens']:>9} tokens {result['nodes']:>9} nodes")
+        for stage, stats in result['stages'].items():
+            rate = stats.get('tokens_per_second') or stats['nodes_per_second']
+            unit = 'tokens/s' if 'tokens_per_second' in stats else 'nodes/s'
+            print(f"  {stage:9} {stats['seconds']:8.3f}s {rate:>12,.0f} {unit:8} "
+                  f"peak {stats['peak_bytes'] / 2 ** 20:8.1f} MiB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for shape, stage, before, after in regressions:
+            print(f"REGRESSION {shape}/{stage}: {before:.3f}s -> {after:.3f}s ({after / before - 1:+.0%})")
+        if regressions:
+            return 1
+        print(f"no stage more than {args.threshold:.0%} slower than {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Generators for synthetic Python programs used by the benchmarks."""
+
+FUNCTION_TEMPLATE = '''def kernel_{n}(arr, low, high):
+    total = 0
+    pivot = arr[high]
+    i = low - 1
+    for j in range(low, high):
+        if arr[j] <= pivot:
+            i += 1
+            total = total + arr[j] * 2 - (i % 3)
+    arr[low] = total
+    return i + 1
+
+'''
+
+MAIN_TEMPLATE = '''def main():
+    arr = [{elements}]
+    print("Result:", arr)
+    kernel_0(arr, 0, len(arr) - 1)
+    print("Result:", arr)
+
+'''
+
+
+def iter_program(functions=100, list_size=16):
+    """Yield the source of a program with `functions` copies of a small loop kernel, piece by piece."""
+    for n in range(functions):
+        yield FUNCTION_TEMPLATE.format(n=n)
+    yield MAIN_TEMPLATE.format(elements=', '.join(str((n * 7) % 101) for n in range(list_size)))
+
+
+def generate_program(functions=100, list_size=16):
+    """Return the source of a program with `functions` copies of a small loop kernel."""
+    return ''.join(iter_program(functions, list_size))
+
+
+def functions_for_size(target_bytes):
+    """Return how many kernels make a program at least `target_bytes` long."""
+    return max(1, target_bytes // len(FUNCTION_TEMPLATE.format(n=0)) + 1)
+
+
+def write_sized_program(path, target_bytes):
+    """Write a program of at least `target_bytes` to `path` without building it in memory."""
+    with open(path, 'w') as f:
+        f.writelines(iter_program(functions=functions_for_size(target_bytes)))
+
+
+def generate_long_loop(statements=1000):
+    """Return a program whose main() is one loop with `statements` statements in its body."""
+    lines = ['def main():', '    arr = [3, 1, 4, 1, 5, 9, 2, 6]', '    total = 0', '    for i in range(1000):']
+    for n in range(statements):
+        lines.append(f'        total = (total + arr[(i + {n}) % len(arr)] * {n % 13 + 1}) % 1000003')
+    lines.append('    print(total)')
+    return ''.join(line + '\n' for line in lines)
+
+
+def generate_large_list(elements=100_000):
+    """Return a program whose main() builds one list literal of `elements` integers."""
+    items = ', '.join(str((n * 7919) % 100_003) for n in range(elements))
+    return f'def main():\n    arr = [{items}]\n    print(arr[0], len(arr))\n'
@@ -0,0 +1,98 @@
+"""Content-addressed on-disk cache of transpilation results."""
+import functools
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "python_to_cpp")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+@functools.lru_cache(maxsize=None)
+def transpiler_version():
+    """Hash of the transpiler's own sources, so changing any of them invalidates the cache."""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as f:
+            digest.update(os.path.basename(path).encode())
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def replace_atomically(path, fill):
+    """Have `fill(tmp_path)` write a temporary file beside `path`, then move it over `path`.
+
+    An error while filling it leaves `path` as it was rather than truncated.
+    The file gets the permissions a newly created one would.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        os.close(fd)
+        fill(tmp_path)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class TranspileCache:
+    """Stores generated C++ keyed by a hash of the source bytes, transpiler version and options.
+
+    Entries are evicted least recently used first once the cache grows past
+    `max_bytes`; a hit refreshes the entry's modification time.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, input_file, options=None):
+        """Return the cache key for a source file transpiled with `options`."""
+        digest = hashlib.sha256()
+        digest.update(transpiler_version().encode())
+        digest.update(repr(sorted((options or {}).items())).encode())
+        with open(input_file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def path(self, key):
+        """Return the file that holds the entry for `key`."""
+        return os.path.join(self.cache_dir, key[:2], key + ".cpp")
+
+    def fetch(self, key, output_file):
+        """Copy a cached result to `output_file`; return False on a miss."""
+        path = self.path(key)
+        try:
+            replace_atomically(output_file, lambda tmp_path: shutil.copyfile(path, tmp_path))
+        except FileNotFoundError:
+            return False
+        os.utime(path)
+        return True
+
+    def store(self, key, output_file):
+        """Copy the generated `output_file` into the cache, replacing any entry atomically."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        replace_atomically(path, lambda tmp_path: shutil.copyfile(output_file, tmp_path))
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, "*", "*.cpp")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,96 @@
+"""Client for the transpile server (see server.py).
+
+    with TranspileClient() as client:
+        code = client.transpile(source)
+        for code in client.transpile_many(sources):
+            ...
+
+Addresses are a Unix socket path or a (host, port) pair.
+"""
+import collections
+import json
+import socket
+
+from server import DEFAULT_SOCKET, PIPELINE_DEPTH
+
+class TranspileError(Exception):
+    """The server could not transpile a source; the message is the server's error."""
+
+class TranspileClient:
+    """A connection to a transpile server; not safe to share between threads."""
+
+    def __init__(self, address=DEFAULT_SOCKET, timeout=None):
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address, timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(address)
+        self.responses = self.sock.makefile("rb")
+        self.next_id = 0
+
+    def send(self, **request):
+        """Send one request without waiting for its response; return its id."""
+        request["id"] = self.next_id
+        self.next_id += 1
+        self.sock.sendall(json.dumps(request).encode() + b"\n")
+        return request["id"]
+
+    def receive(self, request_id):
+        """Read the next response, which must answer `request_id`."""
+        line = self.responses.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        response = json.loads(line)
+        if response.get("id") != request_id:
+            raise ConnectionError(f"expected the response to request {request_id}, got {response.get('id')}")
+        return response
+
+    def transpile(self, source, optimize=True):
+        """Return the C++ for `source`; raises TranspileError if it does not transpile."""
+        return self.result(self.receive(self.send(source=source, optimize=optimize)))
+
+    def transpile_many(self, sources, optimize=True, window=PIPELINE_DEPTH, errors="raise"):
+        """Yield the C++ for each of `sources` in order, keeping up to `window` requests in flight.
+
+        With errors="return", a source that does not transpile yields its
+        TranspileError instead of raising it.
+        """
+        # Staying within the server's read-ahead means neither side can block the other.
+        window = min(window, PIPELINE_DEPTH)
+        outstanding = collections.deque()
+        for source in sources:
+            if len(outstanding) == window:
+                yield self.collect(outstanding.popleft(), errors)
+            outstanding.append(self.send(source=source, optimize=optimize))
+        while outstanding:
+            yield self.collect(outstanding.popleft(), errors)
+
+    def collect(self, request_id, errors):
+        try:
+            return self.result(self.receive(request_id))
+        except TranspileError as e:
+            if errors == "return":
+                return e
+            raise
+
+    @staticmethod
+    def result(response):
+        if not response["ok"]:
+            raise TranspileError(response["error"])
+        return response["code"]
+
+    def stats(self):
+        """Return the server's throughput and latency counters."""
+        return self.receive(self.send(op="stats"))["stats"]
+
+    def close(self):
+        self.responses.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -2,368 +2,1189 @@ from ast_nodes import (
     Program, Print, BinaryOp, Number, String, Boolean, Variable,
     Assignment, IfStatement, WhileLoop, ForLoop, RangeCall,
     FunctionDef, FunctionCall, Return, List, ListAccess,
-    ListAssignment, LenCall, UnaryOp, Float
+    ListAssignment, LenCall, UnaryOp, Float, Expression, ParallelAssignment, ListComprehension, Statement,
+    MethodCall
 )
+from visitor import DispatchTable, walk
+from emitter import Emitter
+from type_inference import BOOL, FLOAT, INT, STRING, ListType, ctype, infer_types, module_function
+from loop_optimizer import assigned_names, walk_statements
+from liveness import last_uses
+from patterns import (
+    conflicts, constant_value, has_call, independent_iterations, match_permutation, match_swap,
+    permutation_cycles, reads_target, replace_variable
+)
+from range_analysis import CHECKED, INT32, INT64, NARROW, NATIVE, OVERFLOWING, WIDE, ProgramRanges, analyze_ranges
+import io
+
+# Python functions whose names C++ reserves, and the names they are generated under.
+RENAMED_FUNCTIONS = {"main": "py_main"}
+
+def cpp_function_name(name):
+    return RENAMED_FUNCTIONS.get(name, name)
+
+def is_len_of_variable(expr):
+    if isinstance(expr, LenCall):
+        return isinstance(expr.arg, Variable)
+    return isinstance(expr, FunctionCall) and expr.name == "len" and len(expr.args) == 1 and isinstance(expr.args[0], Variable)
+
+class Verbatim(Statement):
+    """A line of C++ to emit as is, inside a loop the generator builds rather than parses."""
+    __slots__ = ('code',)
+    def __init__(self, code):
+        self.code = code
 
 class CodeGenerator:
     """Generates C++ code from an AST."""
     
-    def __init__(self):
-        self.indent_level = 0
+    def __init__(self, types=None, integers="ranges", program_ranges=None, lists="tuned"):
+        self.out = None
+        self.types = types
+        # How int arithmetic is lowered: "ranges" checks only operations the
+        # range analysis cannot prove safe, "checked" checks every one and
+        # "native" none (both for comparison).
+        self.integers = integers
+        # How lists and strings are stored: "tuned" reserves room before
+        # loops that append, moves out of variables at their last use and
+        # binds loop variables by reference; "plain" copies (for comparison).
+        self.lists = lists
+        # What the whole program passes between functions, and the
+        # lowering of each int operation of the current function.
+        self.program_ranges = program_ranges
+        self.ranges = None
+        # Function being generated, the locals already declared in it and
+        # the number of temporaries it has used.
+        self.function = None
         self.variables = set()
+        self.temporaries = 0
+        # C++ types of the list temporaries declared in the current function, by name.
+        self.list_temporaries = {}
+        # Reads after which a variable of the current function is dead, and
+        # the list and string variables it only holds a reference to.
+        self.last_uses = set()
+        self.references = set()
         self.functions = set()
     
     def generate(self, ast):
-        """Main function to generate C++ code."""
-        if isinstance(ast, Program):
-            return self.generate_program(ast)
-        else:
+        """Main function to generate C++ code; returns it as a string."""
+        buffer = io.StringIO()
+        self.generate_to(ast, buffer)
+        return buffer.getvalue()
+
+    def generate_to(self, ast, sink):
+        """Generate C++ code, writing it line by line to the file-like `sink`."""
+        if not isinstance(ast, Program):
             raise Exception(f"Expected Program node, got {type(ast)}")
+        self.out = Emitter(sink)
+        if self.types is None:
+            self.types = infer_types(ast)
+        if self.program_ranges is None and self.integers != "native":
+            self.program_ranges = ProgramRanges(ast, self.types)
+        self.generate_program(ast)
     
     def generate_program(self, ast):
         """Generate code for the entire program."""
-        code = []
-        code.append("#include <bits/stdc++.h>")
-        code.append("using namespace std;")
-        code.append("")
-        code.append("void print_array(const vector<int>& arr) {")
-        code.append("    cout << '[';")
-        code.append("    for (size_t i = 0; i < arr.size(); ++i) {")
-        code.append("        cout << arr[i];")
-        code.append("        if (i < arr.size() - 1) cout << \", \";")
-        code.append("    }")
-        code.append("    cout << ']';")
-        code.append("}")
-        code.append("")
-        # Collect function definitions and other statements
-        function_defs = []
-        other_stmts = []
-        for stmt in ast.statements:
-            if isinstance(stmt, FunctionDef):
-                function_defs.append(stmt)
-            else:
-                other_stmts.append(stmt)
-        # Generate function declarations
-        for func in function_defs:
-            if func.name != "main":
-                params = []
-                for param in func.params:
-                    if param == "arr":
-                        params.append("vector<int>& arr")
-                    else:
-                        params.append(f"int {param}")
-                code.append(f"{'int' if func.name == 'partition' else 'void'} {func.name}({', '.join(params)});")
-        code.append("")
+        function_defs = [stmt for stmt in ast.statements if isinstance(stmt, FunctionDef)]
+        self.generate_prelude()
+        self.generate_declarations(function_defs)
         # Generate function definitions
         for func in function_defs:
-            if func.name != "main":
-                code.append(self.generate_function(func))
-                code.append("")
-        # Generate main function
-        code.append("int main() {")
-        main_func = next((fd for fd in function_defs if fd.name == "main"), None)
-        if main_func:
-            for stmt in main_func.body:
-                # Skip the if __name__ == "__main__" block
-                if isinstance(stmt, IfStatement):
-                    if (isinstance(stmt.condition, BinaryOp) and 
-                        isinstance(stmt.condition.left, Variable) and 
-                        stmt.condition.left.name == "__name__"):
-                        continue
-                if isinstance(stmt, Assignment) and isinstance(stmt.value, List):
-                    elements = [self.generate_expression(e) for e in stmt.value.elements]
-                    code.append(f"    vector<int> {stmt.name.name} = {{{', '.join(elements)}}};")
-                elif isinstance(stmt, Print):
-                    exprs = stmt.expressions
-                    if len(exprs) == 2 and isinstance(exprs[0], String) and isinstance(exprs[1], Variable):
-                        # Print string first
-                        code.append(f"    cout << {self.generate_expression(exprs[0])} << \" \";")
-                        # Then print array
-                        code.append(f"    print_array({exprs[1].name});")
-                        code.append("    cout << endl;")
-                    else:
-                        code.extend([f"    {line}" for line in self.generate_print(stmt)])
-                elif isinstance(stmt, FunctionCall):
-                    if stmt.name == "quick_sort":
-                        # Generate arguments without brace initialization
-                        args = []
-                        for arg in stmt.args:
-                            if isinstance(arg, Variable):
-                                args.append(arg.name)
-                            elif isinstance(arg, BinaryOp):
-                                args.append(f"({self.generate_expression(arg)})")
-                            else:
-                                args.append(self.generate_expression(arg))
-                        code.append(f"    quick_sort({', '.join(args)});")
-                    else:
-                        code.append(f"    {self.generate_expression(stmt)};")
-                else:
-                    code.extend([f"    {line}" for line in self.generate_statement(stmt)])
-        code.append("    return 0;")
-        code.append("}")
-        return "\n".join(code)
+            self.generate_function(func)
+            self.out.line()
+        self.generate_entry_point(ast, function_defs)
+
+    def generate_prelude(self):
+        """Generate the includes and the runtime helpers every program uses."""
+        out = self.out
+        out.line("#include <bits/stdc++.h>")
+        out.line("using namespace std;")
+        out.line()
+        # Marks a loop whose iterations touch disjoint memory, so it can be vectorized.
+        out.line("#if defined(__clang__)")
+        out.line("#define PY_IVDEP _Pragma(\"clang loop vectorize(assume_safety)\")")
+        out.line("#else")
+        out.line("#define PY_IVDEP _Pragma(\"GCC ivdep\")")
+        out.line("#endif")
+        out.line()
+        self.generate_integer_helpers()
+        out.line("template <typename T>")
+        out.line("inline auto py_sum(const vector<T>& v) {")
+        out.line("    // Ints are totalled in a long long, which no sum of an int list can overflow.")
+        out.line("    return accumulate(v.begin(), v.end(), conditional_t<is_floating_point_v<T>, double, long long>(0));")
+        out.line("}")
+        out.line()
+        out.line("template <typename T>")
+        out.line("inline void py_reserve(vector<T>& v, long long extra) {")
+        out.line("    // Capacity still grows geometrically, so a loop reserving on every run appends in amortized O(1).")
+        out.line("    if (extra <= 0) return;")
+        out.line("    size_t needed = v.size() + static_cast<size_t>(extra);")
+        out.line("    if (needed > v.capacity()) v.reserve(max(needed, 2 * v.capacity()));")
+        out.line("}")
+        out.line()
+        out.line("template <typename T>")
+        out.line("inline T& py_lvalue(T&& value) {")
+        out.line("    // A temporary passed to a function that changes it in place; it lives until the end of the statement.")
+        out.line("    return value;")
+        out.line("}")
+        out.line()
+        self.generate_output_runtime()
+
+    def generate_output_runtime(self):
+        """Generate py_print() and the buffered writer behind it.
+
+        Output goes through one buffer written to stdout when it fills up,
+        at exit and before an uncaught exception ends the program, instead
+        of a flushed cout line per print. Values are formatted as Python's
+        print() formats them: True and False, the shortest repr of a float,
+        and lists with the repr of each element.
+        """
+        out = self.out
+        for line in OUTPUT_RUNTIME.splitlines():
+            out.line(line)
+        out.line()
+
+    def generate_integer_helpers(self):
+        """Generate the helpers for int arithmetic that C++ cannot do natively with Python's meaning.
+
+        Python ints never overflow; where a result may not fit its C++ type,
+        the checked operations raise instead of wrapping around. py_mod and
+        py_floordiv round towards negative infinity as Python does, and
+        raise on a zero divisor.
+        """
+        out = self.out
+        out.line("template <typename R>")
+        out.line("[[noreturn]] void py_overflow() {")
+        out.line("    throw overflow_error(\"integer result does not fit in \" + to_string(sizeof(R) * CHAR_BIT) + \" bits\");")
+        out.line("}")
+        out.line()
+        for name, builtin in CHECKED_BUILTINS.items():
+            out.line("template <typename R, typename A, typename B>")
+            out.line(f"inline R {name}(A a, B b) {{")
+            out.line("    R r;")
+            out.line(f"    if ({builtin}(a, b, &r)) py_overflow<R>();")
+            out.line("    return r;")
+            out.line("}")
+            out.line()
+        out.line("template <typename R, typename A>")
+        out.line("inline R py_narrow(A a) {")
+        out.line("    R r;")
+        out.line("    if (__builtin_add_overflow(a, 0, &r)) py_overflow<R>();")
+        out.line("    return r;")
+        out.line("}")
+        out.line()
+        out.line("template <typename A, typename B>")
+        out.line("inline auto py_mod(A a, B b) {")
+        out.line("    if constexpr (is_floating_point_v<common_type_t<A, B>>) {")
+        out.line("        if (b == 0) throw domain_error(\"float modulo\");")
+        out.line("        double r = fmod(a, b);")
+        out.line("        if (r == 0) return copysign(0.0, b);")
+        out.line("        return (r < 0) != (b < 0) ? r + b : r;")
+        out.line("    } else if constexpr (is_unsigned_v<A> || is_unsigned_v<B>) {")
+        out.line("        return py_mod(static_cast<long long>(a), static_cast<long long>(b));")
+        out.line("    } else {")
+        out.line("        if (b == 0) throw domain_error(\"integer division or modulo by zero\");")
+        out.line("        using T = decltype(a % b);")
+        out.line("        // a % -1 overflows for the most negative a; the remainder is always 0.")
+        out.line("        T r = b == -1 ? T(0) : T(a % b);")
+        out.line("        return r != 0 && (r < 0) != (b < 0) ? T(r + b) : r;")
+        out.line("    }")
+        out.line("}")
+        out.line()
+        out.line("template <typename A, typename B>")
+        out.line("inline auto py_floordiv(A a, B b) {")
+        out.line("    if constexpr (is_floating_point_v<common_type_t<A, B>>) {")
+        out.line("        if (b == 0) throw domain_error(\"float floor division by zero\");")
+        out.line("        double mod = fmod(a, b);")
+        out.line("        double div = (a - mod) / b;")
+        out.line("        if (mod != 0 && (mod < 0) != (b < 0)) div -= 1.0;")
+        out.line("        if (div == 0) return copysign(0.0, a / b);")
+        out.line("        double floored = floor(div);")
+        out.line("        return div - floored > 0.5 ? floored + 1.0 : floored;")
+        out.line("    } else if constexpr (is_unsigned_v<A> || is_unsigned_v<B>) {")
+        out.line("        return py_floordiv(static_cast<long long>(a), static_cast<long long>(b));")
+        out.line("    } else {")
+        out.line("        if (b == 0) throw domain_error(\"integer division or modulo by zero\");")
+        out.line("        using T = decltype(a / b);")
+        out.line("        if (b == -1) return py_sub<T>(0, a);")
+        out.line("        T q = a / b, r = a % b;")
+        out.line("        return r != 0 && (r < 0) != (b < 0) ? T(q - 1) : q;")
+        out.line("    }")
+        out.line("}")
+        out.line()
+
+    def generate_declarations(self, function_defs):
+        """Generate a forward declaration of every function."""
+        for func in function_defs:
+            self.out.line(f"{self.types.signature(func.name, cpp_function_name(func.name))};")
+        self.out.line()
+
+    def generate_entry_point(self, ast, function_defs):
+        """Generate int main(): the module's top-level statements."""
+        out = self.out
+        out.line("int main() {")
+        out.indent()
+        module = module_function(ast)
+        if module.body:
+            self.begin_function(module)
+            for stmt in module.body:
+                self.generate_statement(stmt)
+        elif any(func.name == "main" for func in function_defs):
+            # A module without top-level code runs its main(), as before.
+            out.line(f"{cpp_function_name('main')}();")
+        out.line("return 0;")
+        out.dedent()
+        out.line("}")
     
     def generate_statement(self, statement):
         """Generate code for a statement."""
-        if isinstance(statement, list):
-            code = []
-            for stmt in statement:
-                if isinstance(stmt, FunctionDef):
-                    # Skip nested function definitions
-                    continue
-                code.extend(self.generate_statement(stmt))
-            return code
-        elif isinstance(statement, Print):
-            return self.generate_print(statement)
-        elif isinstance(statement, Assignment):
-            return self.generate_assignment(statement)
-        elif isinstance(statement, IfStatement):
-            return self.generate_if(statement)
-        elif isinstance(statement, WhileLoop):
-            return self.generate_while(statement)
-        elif isinstance(statement, ForLoop):
-            return self.generate_for(statement)
-        elif isinstance(statement, Return):
-            return self.generate_return(statement)
-        elif isinstance(statement, ListAssignment):
-            code = []
-            indent = "    " * self.indent_level
-            if isinstance(statement.value, ListAccess):
-                # Handle swap operation
-                code.append(f"{indent}swap({self.generate_expression(statement.list_expr)}[{self.generate_expression(statement.index)}], {self.generate_expression(statement.value.list_expr)}[{self.generate_expression(statement.value.index)}]);")
-            else:
-                # Regular assignment
-                code.append(f"{indent}{self.generate_expression(statement.list_expr)}[{self.generate_expression(statement.index)}] = {self.generate_expression(statement.value)};")
-            return code
-        elif isinstance(statement, FunctionCall):
-            code = []
-            indent = "    " * self.indent_level
-            if statement.name == "len":
-                code.append(f"{indent}{self.generate_expression(statement.args[0])}.size();")
+        generator = STATEMENT_GENERATORS.lookup(type(statement))
+        if generator is None:
+            raise Exception(f"Unknown statement type: {type(statement)}")
+        return generator(self, statement)
+
+    def generate_statement_list(self, statements):
+        """Generate code for a nested list of statements."""
+        for stmt in statements:
+            if isinstance(stmt, FunctionDef):
+                # Skip nested function definitions
+                continue
+            self.generate_statement(stmt)
+
+    def generate_list_assignment(self, statement):
+        """Generate code for an assignment to a list element."""
+        self.out.line(f"{self.generate_postfix_operand(statement.list_expr)}[{self.generate_expression(statement.index)}] = {self.generate_moved(statement.value)};")
+
+    def generate_parallel_assignment(self, statement):
+        """Generate code for a tuple assignment such as 'a, b = b, a + b'.
+
+        Swaps and rotations of independent targets become chains of swap().
+        Anything else is stored in an order that needs as few temporaries as
+        possible: a target is assigned once no value still to be stored reads
+        it and no earlier target it conflicts with is still pending.
+        """
+        targets, values = statement.targets, statement.values
+        swap = match_swap(targets, values)
+        if swap is not None:
+            self.generate_swap(*swap)
+            return
+        permutation = match_permutation(targets, values)
+        if permutation is not None:
+            for cycle in permutation_cycles(permutation):
+                for a, b in zip(cycle, cycle[1:]):
+                    self.generate_swap(targets[a], targets[b])
+            return
+        if any(map(has_call, values)):
+            # Calls may have side effects, so evaluate every value first, in order.
+            values = [self.generate_temporary(value) for value in values]
+        pending = list(zip(targets, values))
+        while pending:
+            ready = next((i for i in range(len(pending)) if not self.store_blocked(pending, i)), None)
+            if ready is not None:
+                self.generate_store(*pending.pop(ready))
+                continue
+            # Every store would overwrite something a pending value reads.
+            target = pending[0][0]
+            if isinstance(target, Variable):
+                saved = self.generate_temporary(target)
+                pending = [(t, replace_variable(value, target.name, saved)) for t, value in pending]
             else:
-                # Generate arguments without brace initialization
-                args = []
-                for arg in statement.args:
-                    if isinstance(arg, Variable):
-                        args.append(arg.name)
-                    else:
-                        args.append(self.generate_expression(arg))
-                code.append(f"{indent}{statement.name}({', '.join(args)});")
-            return code
-        elif isinstance(statement, FunctionDef):
-            # Skip function definitions in statement generation
-            # They are handled in generate_program
-            return []
+                j = next(j for j in range(1, len(pending)) if reads_target(pending[j][1], target))
+                pending[j] = (pending[j][0], self.generate_temporary(pending[j][1]))
+
+    def store_blocked(self, pending, i):
+        """True if the i-th pending store of a tuple assignment cannot be emitted yet."""
+        target = pending[i][0]
+        return any(reads_target(value, target) or (j < i and conflicts(target, other))
+                   for j, (other, value) in enumerate(pending) if j != i)
+
+    def generate_store(self, target, value):
+        if isinstance(target, ListAccess):
+            self.generate_list_assignment(ListAssignment(target.list_expr, target.index, value))
         else:
-            raise Exception(f"Unknown statement type: {type(statement)}")
+            self.generate_assignment(Assignment(target, value))
+
+    def generate_swap(self, a, b):
+        self.out.line(f"swap({self.generate_expression(a)}, {self.generate_expression(b)});")
+
+    def generate_temporary(self, value):
+        """Store `value` in a fresh local and return a Variable reading it."""
+        name = self.new_temporary("_tup")
+        value_type = self.types.expr_type(self.function, value)
+        # auto would deduce vector<bool>'s element proxy, which is not a copy.
+        declared = ctype(value_type) if value_type is not None else "auto"
+        self.out.line(f"{declared} {name} = {self.generate_expression(value)};")
+        # Operations on the temporary are then lowered (and checked) like those on any other int.
+        self.types.declare(self.function, name, value_type)
+        return Variable(name)
+
+    def new_temporary(self, prefix):
+        """A fresh local name for the current function."""
+        name = f"{prefix}{self.temporaries}"
+        self.temporaries += 1
+        return name
+
+    def generate_call_statement(self, statement):
+        """Generate code for a function call used as a statement."""
+        if statement.name == "len":
+            self.out.line(f"{self.generate_postfix_operand(statement.args[0])}.size();")
+        else:
+            self.out.line(f"{cpp_function_name(statement.name)}({', '.join(self.generate_arguments(statement))});")
+
+    def generate_expression_statement(self, statement):
+        """Generate code for any other expression evaluated as a statement."""
+        self.out.line(f"{self.generate_expression(statement)};")
+
+    def generate_nested_function(self, statement):
+        """Skip function definitions in statement generation; generate_program handles them."""
     
     def generate_print(self, print_stmt):
-        """Generate code for a print statement."""
-        code = []
-        indent = "    " * self.indent_level
-        
-        for expr in print_stmt.expressions:
-            if isinstance(expr, String):
-                code.append(f"{indent}cout << {self.generate_expression(expr)};")
-            elif isinstance(expr, List):
-                # Don't pass the list directly to print_array
-                code.append(f"{indent}print_array({self.generate_expression(expr)});")
-            else:
-                code.append(f"{indent}cout << {self.generate_expression(expr)};")
-            code.append(f"{indent}cout << \" \";")  # Add space between expressions
-        
-        code.append(f"{indent}cout << endl;")
-        return code
+        """Generate code for a print statement.
+
+        Python evaluates every argument, in order, before printing any of
+        them. C++ leaves the order of arguments open, so when more than one
+        calls a function, those are evaluated into locals first.
+        """
+        expressions = print_stmt.expressions
+        calling = [expr for expr in expressions if any(
+            isinstance(node, MethodCall) or (isinstance(node, FunctionCall) and node.name in self.types.functions)
+            for node in walk(expr))]
+        args = []
+        for expr in expressions:
+            if len(calling) > 1 and expr in calling:
+                expr = self.generate_temporary(expr)
+            args.append(self.generate_value(expr))
+        self.out.line(f"py_print({', '.join(args)});")
+
+    def generate_value(self, expr):
+        """Generate `expr` where its type must be known: a list literal alone is only a braced initializer."""
+        if isinstance(expr, List):
+            return f"{ctype(self.types.expr_type(self.function, expr))}{self.generate_expression(expr)}"
+        return self.generate_expression(expr)
     
+    def begin_function(self, func):
+        """Start a function body: its parameters and hoisted locals are already declared."""
+        self.function = func.name
+        self.variables = set(func.params)
+        self.temporaries = 0
+        self.list_temporaries = {}
+        self.last_uses = last_uses(func.body) if self.lists == "tuned" else set()
+        self.references = {param for param in func.params if self.types.by_reference(func.name, param)}
+        if self.integers != "native":
+            self.ranges = analyze_ranges(func, self.types, self.program_ranges, known=self.integers == "ranges")
+        for name in self.types.hoisted(func.name):
+            self.out.line(f"{self.types.local_ctype(func.name, name)} {name}{{}};")
+            self.variables.add(name)
+
     def generate_assignment(self, assignment):
         """Generate code for a variable assignment."""
-        code = []
-        indent = "    " * self.indent_level
         var_name = assignment.name.name if isinstance(assignment.name, Variable) else assignment.name
+        value = assignment.value
+        if isinstance(value, ListComprehension) and self.fills_in_place(var_name, value):
+            declared = var_name in self.variables
+            self.variables.add(var_name)
+            self.generate_comprehension_fill(var_name, value, self.types.local_ctype(self.function, var_name), declared)
+            return
+        if (var_name in self.variables and isinstance(value, Variable) and value.name != var_name
+                and self.is_dead(value) and var_name not in self.references
+                and self.types.local_ctype(self.function, var_name) == self.types.local_ctype(self.function, value.name)):
+            # The old list goes to the dead variable, where a later fill can reuse its storage.
+            self.out.line(f"swap({var_name}, {value.name});")
+            return
         
         if var_name not in self.variables:
-            value = self.generate_expression(assignment.value)
-            if isinstance(assignment.value, List):
-                code.append(f"{indent}vector<int> {var_name} = {value};")
-            elif isinstance(assignment.value, String):
-                code.append(f"{indent}string {var_name} = {value};")
-            elif isinstance(assignment.value, Float):
-                code.append(f"{indent}double {var_name} = {value};")
-            elif isinstance(assignment.value, Number):
-                code.append(f"{indent}int {var_name} = {value};")
-            else:
-                code.append(f"{indent}auto {var_name} = {value};")
+            value = self.generate_moved(assignment.value)
+            self.out.line(f"{self.types.local_ctype(self.function, var_name)} {var_name} = {value};")
             self.variables.add(var_name)
         else:
-            code.append(f"{indent}{var_name} = {self.generate_expression(assignment.value)};")
-        
-        return code
+            self.out.line(f"{var_name} = {self.generate_moved(assignment.value)};")
+
+    def is_dead(self, expr):
+        """True if `expr` reads a list or string the function owns, for the last time."""
+        if not (isinstance(expr, Variable) and expr in self.last_uses and expr.name not in self.references):
+            return False
+        value_type = self.types.local_type(self.function, expr.name)
+        return isinstance(value_type, ListType) or value_type is STRING
+
+    def generate_moved(self, expr):
+        """Generate `expr`, moved from if it is dead afterwards."""
+        code = self.generate_expression(expr)
+        return f"std::move({code})" if self.is_dead(expr) else code
+
+    def generate_block(self, header, statements):
+        """Generate `header {`, the indented statements and the closing brace."""
+        out = self.out
+        out.line(f"{header} {{")
+        out.indent()
+        for statement in statements:
+            self.generate_statement(statement)
+        out.dedent()
+        out.line("}")
     
     def generate_if(self, if_stmt):
         """Generate code for an if statement."""
-        code = []
-        indent = "    " * self.indent_level
-        
-        code.append(f"{indent}if ({self.generate_expression(if_stmt.condition)}) {{")
-        self.indent_level += 1
-        
-        for statement in if_stmt.body:
-            code.extend(self.generate_statement(statement))
-        
-        self.indent_level -= 1
-        code.append(f"{indent}}}")
-        
+        self.generate_block(f"if ({self.generate_expression(if_stmt.condition)})", if_stmt.body)
         if if_stmt.else_body:
-            code.append(f"{indent}else {{")
-            self.indent_level += 1
-            
-            for statement in if_stmt.else_body:
-                code.extend(self.generate_statement(statement))
-            
-            self.indent_level -= 1
-            code.append(f"{indent}}}")
-        
-        return code
+            self.generate_block("else", if_stmt.else_body)
     
     def generate_while(self, while_stmt):
         """Generate code for a while loop."""
-        code = []
-        indent = "    " * self.indent_level
-        
-        code.append(f"{indent}while ({self.generate_expression(while_stmt.condition)}) {{")
-        self.indent_level += 1
-        
-        for statement in while_stmt.body:
-            code.extend(self.generate_statement(statement))
-        
-        self.indent_level -= 1
-        code.append(f"{indent}}}")
-        
-        return code
+        self.generate_block(f"while ({self.generate_expression(while_stmt.condition)})", while_stmt.body)
     
     def generate_for(self, for_stmt):
-        """Generate code for a for loop."""
-        code = []
-        indent = "    " * self.indent_level
-        
+        """Generate code for a for loop.
+
+        A loop over the elements of a list of lists binds each row by const
+        reference instead of copying it, unless the body assigns the loop
+        variable or may change it or the list in place.
+        """
+        if self.lists == "tuned":
+            self.generate_reserve(for_stmt)
         if isinstance(for_stmt.iterable, RangeCall):
-            start = self.generate_expression(for_stmt.iterable.start)
-            end_expr = for_stmt.iterable.end
-            # SAFETY PATCH: If end is a List, extract the last element
-            if isinstance(end_expr, List) and len(end_expr.elements) == 2:
-                end = self.generate_expression(end_expr.elements[1])
-            else:
-                end = self.generate_expression(end_expr)
-            
-            if hasattr(for_stmt.iterable, 'step') and for_stmt.iterable.step is not None:
-                step = self.generate_expression(for_stmt.iterable.step)
-                code.append(f"{indent}for (int {for_stmt.var_name} = {start}; {for_stmt.var_name} < {end}; {for_stmt.var_name} += {step}) {{")
-            else:
-                code.append(f"{indent}for (int {for_stmt.var_name} = {start}; {for_stmt.var_name} < {end}; {for_stmt.var_name}++) {{")
-            
-            self.indent_level += 1
-            for statement in for_stmt.body:
-                code.extend(self.generate_statement(statement))
-            self.indent_level -= 1
-            code.append(f"{indent}}}")
-        elif isinstance(for_stmt.iterable, List):
-            # Handle iterating over a list
-            iterable = self.generate_expression(for_stmt.iterable)
-            code.append(f"{indent}for (int {for_stmt.var_name} : {iterable}) {{")
-            self.indent_level += 1
-            for statement in for_stmt.body:
-                code.extend(self.generate_statement(statement))
-            self.indent_level -= 1
-            code.append(f"{indent}}}")
+            self.generate_range_for(for_stmt)
+            return
+        var_name = for_stmt.var_name
+        declared = var_name in self.variables
+        rows = self.lists == "tuned" and isinstance(self.types.local_type(self.function, var_name), ListType)
+        iterable = self.generate_value(for_stmt.iterable)
+        if declared:
+            # Range-based for cannot reuse an existing variable.
+            element = f"{var_name}_value"
+            self.generate_block(f"for ({'const auto&' if rows else 'auto'} {element} : {iterable})", [Assignment(Variable(var_name), Variable(element))] + for_stmt.body)
+            return
+        var_ctype = self.types.local_ctype(self.function, var_name)
+        if rows and self.binds_by_reference(for_stmt):
+            header = f"for (const {var_ctype}& {var_name} : {iterable})"
+            self.references.add(var_name)
         else:
-            # Handle other types of for loops
-            iterable = self.generate_expression(for_stmt.iterable)
-            code.append(f"{indent}for (auto {for_stmt.var_name} : {iterable}) {{")
-            self.indent_level += 1
-            for statement in for_stmt.body:
-                code.extend(self.generate_statement(statement))
-            self.indent_level -= 1
-            code.append(f"{indent}}}")
-        
-        return code
+            header = f"for ({var_ctype} {var_name} : {iterable})"
+        self.variables.add(var_name)
+        self.generate_block(header, for_stmt.body)
+        self.variables.discard(var_name)
+        self.references.discard(var_name)
+
+    def binds_by_reference(self, for_stmt):
+        """True if the body of a loop over a list leaves the loop variable and the list unchanged."""
+        body = for_stmt.body
+        names = {for_stmt.var_name}
+        if isinstance(for_stmt.iterable, Variable):
+            names.add(for_stmt.iterable.name)
+        if not names.isdisjoint(assigned_names(body)):
+            return False
+        for node in walk_statements(body):
+            if isinstance(node, ListAssignment):
+                targets = [node.list_expr]
+            elif isinstance(node, ParallelAssignment):
+                targets = [target.list_expr for target in node.targets if isinstance(target, ListAccess)]
+            elif isinstance(node, MethodCall):
+                targets = [node.obj]
+            elif isinstance(node, FunctionCall) and node.name in self.types.functions:
+                callee = self.types.functions[node.name]
+                targets = [arg for param, arg in zip(callee.params, node.args) if param in callee.mutated]
+            else:
+                continue
+            if any(not isinstance(target, Variable) or target.name in names for target in targets):
+                return False
+        return True
+
+    def generate_reserve(self, for_stmt):
+        """Reserve room for the elements a loop appends on every iteration, if its trip count is cheap to compute.
+
+        Appends inside a branch are not counted, as they may never happen.
+        """
+        appends = {}
+        statements = list(for_stmt.body)
+        while statements:
+            statement = statements.pop()
+            if isinstance(statement, list):
+                statements.extend(statement)
+            elif (isinstance(statement, MethodCall) and statement.method == "append"
+                    and isinstance(statement.obj, Variable) and statement.obj.name in self.variables):
+                appends[statement.obj.name] = appends.get(statement.obj.name, 0) + 1
+        if not appends:
+            return
+        count = self.trip_count(for_stmt)
+        if count is None:
+            return
+        assigned = assigned_names(for_stmt.body)
+        for name, times in appends.items():
+            if name not in assigned:
+                self.out.line(f"py_reserve({name}, {count if times == 1 else f'{times} * ({count})'});")
+
+    def trip_count(self, for_stmt):
+        """C++ for the number of iterations of a loop, or None unless its bounds are cheap to evaluate twice."""
+        iterable = for_stmt.iterable
+        if isinstance(iterable, Variable):
+            return f"{iterable.name}.size()"
+        if not isinstance(iterable, RangeCall) or iterable.step is not None and constant_value(iterable.step) != 1:
+            return None
+        bounds = [iterable.start, iterable.end]
+        if not all(constant_value(bound) is not None or isinstance(bound, Variable) or is_len_of_variable(bound)
+                   for bound in bounds):
+            return None
+        if constant_value(iterable.start) == 0:
+            return self.generate_expression(iterable.end)
+        return f"{self.cast(iterable.end, 'long long')} - {self.generate_operand(iterable.start, '-', CPP_PRECEDENCE['-'], True)}"
     
+    def generate_range_for(self, for_stmt):
+        """Generate code for 'for var in range(start, end, step)'.
+
+        Like Python, the bounds are evaluated once, before the first
+        iteration: any that is not a literal or a variable the loop leaves
+        alone is stored in a local first. The loop runs upwards for a
+        positive step and downwards for a negative one, and tests the sign at
+        run time when the step is not a literal. Bounds are compared in the
+        loop variable's (signed) type, never against an unsigned size().
+        If the variable outlives the loop or the body assigns it, the loop
+        counts in a hidden counter and copies it to the variable at the top
+        of each iteration, so the variable keeps Python's last value and
+        assignments to it do not disturb the iteration. So does a loop whose
+        counter could step past INT_MAX or INT_MIN after its last iteration;
+        that counter is a long long. A step that is not a literal is checked
+        for zero first, as Python raises ValueError for it.
+        """
+        var_name = for_stmt.var_name
+        declared = var_name in self.variables
+        loop_range = for_stmt.iterable
+        index_type = self.types.local_ctype(self.function, var_name)
+        step_value = 1 if loop_range.step is None else constant_value(loop_range.step)
+        if step_value == 0:
+            raise Exception("range() arg 3 must not be zero")
+        assigned = assigned_names(for_stmt.body)
+        counted = declared or var_name in assigned
+        wide = not self.steps_within_int(loop_range.end, step_value)
+
+        bounds = [loop_range.start, loop_range.end] + ([loop_range.step] if step_value is None else [])
+        stable = [constant_value(bound) is not None
+                  or isinstance(bound, Variable) and bound.name not in assigned and bound.name != var_name
+                  for bound in bounds]
+        if all(stable[1:]):
+            # The start is evaluated once by the loop header anyway.
+            stable[0] = True
+        start, end, step = [
+            self.generate_expression(bound) if is_stable else self.generate_bound(bound, index_type)
+            for bound, is_stable in zip(bounds, stable)
+        ] + [None] * (3 - len(bounds))
+        if step_value is None:
+            self.out.line(f"if ({step} == 0) throw invalid_argument(\"range() arg 3 must not be zero\");")
+
+        counter = self.new_temporary("_i") if counted or wide else var_name
+        if step_value is None:
+            condition = f"{step} > 0 ? {counter} < {end} : {counter} > {end}"
+            increment = f"{counter} += {step}"
+        elif step_value > 0:
+            condition = f"{counter} < {end}"
+            increment = f"{counter}++" if step_value == 1 else f"{counter} += {step_value}"
+        else:
+            condition = f"{counter} > {end}"
+            increment = f"{counter}--" if step_value == -1 else f"{counter} -= {-step_value}"
+        body = for_stmt.body
+        # GCC only honours the mark on a plain comparison, not the run-time sign test.
+        if not counted and step_value is not None and self.vectorizable(var_name, body):
+            self.out.line("PY_IVDEP")
+        if counted or wide:
+            body = [Assignment(Variable(var_name), Variable(counter))] + body
+        else:
+            self.variables.add(var_name)
+        counter_ctype = "long long" if wide else index_type
+        self.generate_block(f"for ({counter_ctype} {counter} = {start}; {condition}; {increment})", body)
+        if not declared:
+            self.variables.discard(var_name)
+
+    def steps_within_int(self, end, step_value):
+        """True if an int counter stepping by `step_value` towards `end` cannot overflow.
+
+        A counter moving by one stops at the end itself. A longer step can
+        overshoot it by up to step - 1, which only a literal end is known to
+        leave room for; a step known only at run time may be anything.
+        """
+        if step_value in (1, -1):
+            return True
+        end_value = constant_value(end)
+        if step_value is None or type(end_value) is not int:
+            return False
+        overshoot = end_value + step_value - 1 if step_value > 0 else end_value + step_value + 1
+        return INT32[0] <= overshoot <= INT32[1]
+
+    def generate_bound(self, bound, index_type):
+        """Evaluate a range() bound once into a local of the loop's index type; return its name."""
+        name = self.new_temporary("_bound")
+        self.out.line(f"const {index_type} {name} = {self.generate_expression(bound)};")
+        return name
+
+    def vectorizable(self, var_name, body):
+        """True if a loop over `var_name` may be marked as having no dependences between iterations.
+
+        vector<bool> packs elements into shared words, so storing to
+        distinct elements still touches the same memory.
+        """
+        stored = independent_iterations(var_name, body)
+        if stored is None:
+            return False
+        for target in stored:
+            list_ctype = self.list_temporaries.get(target.name)
+            if list_ctype is None:
+                list_type = self.types.expr_type(self.function, target)
+                if not isinstance(list_type, ListType):
+                    return False
+                list_ctype = ctype(list_type)
+            if list_ctype == "vector<bool>":
+                return False
+        return True
+
+    def fills_in_place(self, name, comprehension):
+        """True if the list `name` can be filled with the elements of `comprehension` as they are computed.
+
+        Python builds the whole list before binding it, so the comprehension
+        must not read the list it replaces. Mapping a list onto itself is the
+        exception: each element is read before it is overwritten.
+        """
+        if comprehension.var_name == name:
+            return False
+        parts = [comprehension.element, comprehension.condition]
+        if not (comprehension.condition is None and isinstance(comprehension.iterable, Variable)):
+            parts.append(comprehension.iterable)
+        return not any(isinstance(node, Variable) and node.name == name
+                       for part in parts if part is not None for node in walk(part))
+
+    def generate_comprehension_fill(self, name, comprehension, list_ctype, declared):
+        """Fill the list `name` with the elements of `comprehension`.
+
+        A map over a list is a std::transform into a vector sized up front,
+        and a map over range(n) stores to each index in a loop that may be
+        marked independent; -O3 vectorizes both. Anything else appends to a
+        vector reserved for the most elements the comprehension can yield.
+        """
+        with self.types.inside(self.function, comprehension):
+            out = self.out
+            iterable = comprehension.iterable
+            size = self.iteration_count(comprehension)
+            if comprehension.condition is None and size is not None:
+                if not declared:
+                    out.line(f"{list_ctype} {name}({size});")
+                elif not (isinstance(iterable, Variable) and iterable.name == name):
+                    out.line(f"{name}.resize({size});")
+                if isinstance(iterable, RangeCall):
+                    store = ListAssignment(Variable(name), Variable(comprehension.var_name), comprehension.element)
+                    self.generate_comprehension_loop(comprehension, store)
+                    return
+                var_ctype = self.types.local_ctype(self.function, comprehension.var_name)
+                if self.lists == "tuned" and isinstance(self.types.local_type(self.function, comprehension.var_name), ListType):
+                    var_ctype = f"const {var_ctype}&"
+                var = f"{var_ctype} {comprehension.var_name}"
+                element = self.generate_expression(comprehension.element)
+                out.line(f"transform({iterable.name}.begin(), {iterable.name}.end(), {name}.begin(), "
+                         f"[&]({var}) {{ return {element}; }});")
+                return
+            out.line(f"{name}.clear();" if declared else f"{list_ctype} {name};")
+            if size is not None:
+                out.line(f"{name}.reserve({size});")
+            element = self.generate_expression(comprehension.element)
+            self.generate_comprehension_loop(comprehension, Verbatim(f"{name}.push_back({element});"))
+
+    def iteration_count(self, comprehension):
+        """C++ for the number of values a comprehension iterates over, or None.
+
+        Only counts that cost nothing to compute twice are known: the size of
+        a list variable, and range(n) for a literal or variable n.
+        """
+        iterable = comprehension.iterable
+        if isinstance(iterable, Variable) and iterable.name != comprehension.var_name:
+            return f"{iterable.name}.size()"
+        if not isinstance(iterable, RangeCall) or constant_value(iterable.start) != 0 or iterable.step is not None:
+            return None
+        end = iterable.end
+        if constant_value(end) is not None:
+            return str(max(constant_value(end), 0))
+        if isinstance(end, Variable) and end.name != comprehension.var_name:
+            return f"max({end.name}, 0)"
+        return None
+
+    def generate_comprehension_loop(self, comprehension, statement):
+        """Generate a loop that runs `statement` for each element `comprehension` keeps."""
+        body = [statement]
+        if comprehension.condition is not None:
+            body = [IfStatement(comprehension.condition, body)]
+        var_name = comprehension.var_name
+        # The loop declares its own variable, even if the function has a local of that name.
+        shadowed = var_name in self.variables
+        self.variables.discard(var_name)
+        self.generate_for(ForLoop(var_name, comprehension.iterable, body))
+        if shadowed:
+            self.variables.add(var_name)
+
+    def generate_verbatim(self, statement):
+        self.out.line(statement.code)
+
     def generate_return(self, return_stmt):
         """Generate code for a return statement."""
-        code = []
-        indent = "    " * self.indent_level
-        
         if return_stmt.value is not None:
-            code.append(f"{indent}return {self.generate_expression(return_stmt.value)};")
+            self.out.line(f"return {self.generate_expression(return_stmt.value)};")
         else:
-            code.append(f"{indent}return;")
-        
-        return code
+            self.out.line("return;")
     
     def generate_expression(self, expr):
         """Generate code for an expression."""
-        if isinstance(expr, Number):
+        generator = EXPRESSION_GENERATORS.lookup(type(expr))
+        if generator is None:
+            raise Exception(f"Unsupported expression type: {type(expr)}")
+        return generator(self, expr)
+
+    def generate_number(self, expr):
+        if INT32[0] <= expr.value <= INT32[1]:
             return str(expr.value)
-        elif isinstance(expr, String):
-            return f'"{expr.value}"'
-        elif isinstance(expr, Boolean):
-            return str(expr.value).lower()
-        elif isinstance(expr, Variable):
-            return expr.name
-        elif isinstance(expr, BinaryOp):
+        if not INT64[0] <= expr.value <= INT64[1]:
+            raise Exception(f"Integer literal {expr.value} does not fit in 64 bits")
+        return self.narrowed(expr, f"{expr.value}LL")
+
+    def generate_float(self, expr):
+        return repr(expr.value)
+
+    def generate_string(self, expr):
+        return f'"{expr.value}"'
+
+    def generate_boolean(self, expr):
+        return str(expr.value).lower()
+
+    def generate_variable(self, expr):
+        return expr.name
+
+    def generate_binary_op(self, expr):
+        op = expr.op
+        if op in PYTHON_DIVISION and not self.floors_natively(expr):
+            call = f"{PYTHON_DIVISION[op]}({self.generate_expression(expr.left)}, {self.generate_expression(expr.right)})"
+            return self.narrowed(expr, call)
+        lowering = self.integer_lowering(expr)
+        shift = constant_value(expr.right) if op == '<<' else None
+        if lowering == CHECKED and (op != '<<' or shift is not None):
             left = self.generate_expression(expr.left)
-            right = self.generate_expression(expr.right)
-            return f"({left} {expr.op} {right})"
-        elif isinstance(expr, UnaryOp):
-            operand = self.generate_expression(expr.operand)
-            return f"{expr.op}{operand}"
-        elif isinstance(expr, List):
-            elements = [self.generate_expression(e) for e in expr.elements]
-            return f"{{{', '.join(elements)}}}"
-        elif isinstance(expr, ListAccess):
-            list_expr = self.generate_expression(expr.list_expr)
-            index = self.generate_expression(expr.index)
-            return f"{list_expr}[{index}]"
-        elif isinstance(expr, FunctionCall):
-            if expr.name == "len":
-                return f"{self.generate_expression(expr.args[0])}.size()"
-            # Generate arguments without brace initialization
-            args = []
-            for arg in expr.args:
-                if isinstance(arg, Variable):
-                    args.append(arg.name)
-                else:
-                    args.append(self.generate_expression(arg))
-            return f"{expr.name}({', '.join(args)})"
-        elif isinstance(expr, LenCall):
-            return f"{self.generate_expression(expr.arg)}.size()"
+            right = str(1 << shift) if op == '<<' else self.generate_expression(expr.right)
+            return f"{CHECKED_OPERATIONS[op]}<{self.result_ctype(expr)}>({left}, {right})"
+        if shift is not None and 0 <= shift < 63 and not self.shifts_natively(expr):
+            # Shifting a negative value left is undefined in C++; multiply by 2**k as Python does.
+            op = '*'
+        precedence = CPP_PRECEDENCE[op]
+        left = self.generate_operand(expr.left, op, precedence, False)
+        if op == '*' and expr.op == '<<':
+            right = str(1 << shift)
         else:
-            raise Exception(f"Unsupported expression type: {type(expr)}")
+            right = self.generate_operand(expr.right, op, precedence, True)
+        if isinstance(expr.left, String) and isinstance(expr.right, String):
+            # Two string literals would be compared (or added) as pointers.
+            left = f"string({left})"
+        elif lowering == WIDE and not (self.is_wide(expr.left) or self.is_wide(expr.right)):
+            left = self.cast(expr.left, "long long")
+        elif op == '/' and self.is_integer(expr.left) and self.is_integer(expr.right):
+            # Python's / on ints is true division.
+            left = self.cast(expr.left, "double")
+        code = f"{left} {'/' if op == '//' else op} {right}"
+        return self.narrowed(expr, code) if lowering == NARROW else code
+
+    def integer_lowering(self, expr):
+        """NATIVE, WIDE, CHECKED or NARROW for an int operation (see IntegerRanges.lowering)."""
+        if self.ranges is None:
+            return NATIVE
+        lowering = self.ranges.lowering(expr)
+        if lowering is not None:
+            return lowering
+        # Not seen by the analysis (a copy made while generating): assume nothing.
+        if isinstance(expr, Number):
+            return NATIVE if INT32[0] <= expr.value <= INT32[1] else NARROW
+        if (isinstance(expr, UnaryOp) and expr.operator == '-'
+                or isinstance(expr, BinaryOp) and expr.op in OVERFLOWING):
+            # An operation of unknown type may be on ints, which must never wrap around.
+            expr_type = self.types.expr_type(self.function, expr)
+            return CHECKED if expr_type in (INT, BOOL, None) else NATIVE
+        if isinstance(expr, FunctionCall) and expr.name == "sum":
+            return NARROW if self.is_integer(expr) else NATIVE
+        return NATIVE
+
+    def floors_natively(self, expr):
+        """True if C++ / and % compute Python's // and % for the BinaryOp `expr`."""
+        if not (self.is_integer(expr.left) and self.is_integer(expr.right)):
+            return False
+        return self.ranges is None or self.ranges.floors_natively(expr)
+
+    def shifts_natively(self, expr):
+        """True if C++ << computes Python's << for the BinaryOp `expr`."""
+        return self.ranges is not None and self.ranges.shifts_natively(expr)
+
+    def result_ctype(self, expr):
+        return self.ranges.result_ctype(expr) if expr in self.ranges.nodes else "int"
+
+    def is_wide(self, expr):
+        """True if `expr` is generated as a long long."""
+        return self.ranges is not None and expr in self.ranges.nodes and self.ranges.is_wide(expr)
+
+    def is_integer(self, expr):
+        return self.types.expr_type(self.function, expr) in (INT, BOOL)
+
+    def narrowed(self, expr, code):
+        """`code` checked to fit in an int if `expr` is lowered as NARROW."""
+        return f"py_narrow<int>({code})" if self.integer_lowering(expr) == NARROW else code
+
+    def cast(self, expr, type_name):
+        """Generate `expr` converted to the arithmetic type `type_name`."""
+        if isinstance(expr, Number) and type_name == "long long":
+            return f"{expr.value}LL"
+        return f"static_cast<{type_name}>({self.generate_expression(expr)})"
+
+    def generated_as_call(self, expr):
+        """True if the operation `expr` is generated as a helper call rather than an operator."""
+        if isinstance(expr, BinaryOp) and expr.op in PYTHON_DIVISION and not self.floors_natively(expr):
+            return True
+        lowering = self.integer_lowering(expr)
+        return lowering == NARROW or lowering == CHECKED and not (
+            isinstance(expr, BinaryOp) and expr.op == '<<' and constant_value(expr.right) is None)
+
+    def generate_operand(self, expr, op, precedence, is_right):
+        """Generate an operand of `op`, parenthesized only where C++ needs (or gcc asks for) it."""
+        code = self.generate_expression(expr)
+        if isinstance(expr, BinaryOp) and not self.generated_as_call(expr):
+            inner = CPP_PRECEDENCE[expr.op]
+            if (inner > precedence or (is_right and inner == precedence)
+                    or (op in WARN_UNPARENTHESIZED and expr.op != op)
+                    or (precedence in COMPARISON_LEVELS and inner in COMPARISON_LEVELS)):
+                return f"({code})"
+        return code
+
+    def generate_postfix_operand(self, expr):
+        """Generate the operand of a subscript or member access."""
+        code = self.generate_expression(expr)
+        if isinstance(expr, (BinaryOp, UnaryOp)) and not self.generated_as_call(expr):
+            return f"({code})"
+        return code
+
+    def generate_unary_op(self, expr):
+        if expr.operator == "-":
+            lowering = self.integer_lowering(expr)
+            if lowering == CHECKED:
+                return f"py_sub<{self.result_ctype(expr)}>(0, {self.generate_expression(expr.operand)})"
+            if lowering == WIDE and not self.is_wide(expr.operand):
+                return f"-{self.cast(expr.operand, 'long long')}"
+        operand = self.generate_expression(expr.operand)
+        operator = "!" if expr.operator == "not" else expr.operator
+        if isinstance(expr.operand, BinaryOp) and not self.generated_as_call(expr.operand) or operand[:1] in "+-":
+            operand = f"({operand})"
+        return f"{operator}{operand}"
+
+    def generate_list(self, expr):
+        elements = [self.generate_expression(e) for e in expr.elements]
+        return f"{{{', '.join(elements)}}}"
+
+    def generate_list_comprehension(self, expr):
+        """Generate a comprehension used as a value, as a lambda that fills a list and is called at once."""
+        name = self.new_temporary("_list")
+        list_ctype = self.list_temporaries[name] = ctype(self.types.expr_type(self.function, expr))
+        return self.generate_lambda(lambda: (self.generate_comprehension_fill(name, expr, list_ctype, False),
+                                             self.out.line(f"return {name};")))
+
+    def generate_sum(self, expr):
+        """Generate sum() of a list, or of a comprehension without building its list."""
+        if len(expr.args) != 1:
+            raise Exception("sum() with a start value is not supported")
+        arg = expr.args[0]
+        if isinstance(arg, List) and not arg.elements:
+            # vector{} has no element type to deduce; the sum of nothing is 0.
+            return "0"
+        if not isinstance(arg, ListComprehension):
+            code = f"py_sum({'vector' if isinstance(arg, List) else ''}{self.generate_expression(arg)})"
+            return self.narrowed(expr, code)
+        total = self.new_temporary("_sum")
+        total_ctype = "double" if self.types.expr_type(self.function, expr) is FLOAT else "long long"
+
+        def body():
+            self.out.line(f"{total_ctype} {total} = 0;")
+            with self.types.inside(self.function, arg):
+                element = self.generate_expression(arg.element)
+                if self.is_wide(arg.element):
+                    # Long long terms can carry the total past 64 bits.
+                    add = f"{total} = py_add<long long>({total}, {element});"
+                else:
+                    add = f"{total} += {element};"
+                self.generate_comprehension_loop(arg, Verbatim(add))
+            self.out.line(f"return {total};")
+        return self.narrowed(expr, self.generate_lambda(body))
+
+    def generate_lambda(self, generate_body):
+        """A lambda called where it is defined, with the statements `generate_body` emits as its body.
+
+        C++ has no statement expressions; the lambda lets a loop stand where
+        an expression is expected, and is inlined by the compiler.
+        """
+        out = self.out
+        buffer = io.StringIO()
+        self.out = Emitter(buffer)
+        for _ in range(out.level + 1):
+            self.out.indent()
+        try:
+            generate_body()
+        finally:
+            self.out = out
+        return f"[&] {{\n{buffer.getvalue()}{out.prefixes[out.level]}}}()"
+
+    def generate_list_access(self, expr):
+        list_expr = self.generate_postfix_operand(expr.list_expr)
+        index = self.generate_expression(expr.index)
+        return f"{list_expr}[{index}]"
+
+    def generate_function_call(self, expr):
+        if expr.name == "len":
+            return self.generate_size(expr.args[0])
+        if expr.name == "sum" and expr.name not in self.types.functions:
+            return self.generate_sum(expr)
+        return f"{cpp_function_name(expr.name)}({', '.join(self.generate_arguments(expr))})"
+
+    def generate_arguments(self, call):
+        """Generate the arguments of a function call; a dead list or string passed by value is moved.
+
+        A list the callee changes in place is passed by non-const reference,
+        which only binds a variable or an element; any other value (a list
+        literal, a call's result) is passed through py_lvalue.
+        """
+        callee = self.types.functions.get(call.name)
+        params = callee.params if callee is not None else []
+        args = []
+        for index, arg in enumerate(call.args):
+            if index < len(params) and not self.types.by_reference(call.name, params[index]):
+                args.append(self.generate_moved(arg))
+            elif index < len(params) and params[index] in callee.mutated and not isinstance(arg, (Variable, ListAccess)):
+                args.append(f"py_lvalue({self.generate_value(arg)})")
+            else:
+                args.append(self.generate_expression(arg))
+        return args
+
+    def generate_method_call(self, expr):
+        if expr.method != "append" or len(expr.args) != 1:
+            raise Exception(f"Unsupported method call: .{expr.method}() with {len(expr.args)} arguments")
+        if not isinstance(self.types.expr_type(self.function, expr.obj), ListType):
+            raise Exception("append() is only supported on lists")
+        return f"{self.generate_postfix_operand(expr.obj)}.push_back({self.generate_moved(expr.args[0])})"
+
+    def generate_len_call(self, expr):
+        return self.generate_size(expr.arg)
+
+    def generate_size(self, container):
+        """len(container) as a signed int, as range analysis assumes: size() is unsigned."""
+        return f"static_cast<int>({self.generate_postfix_operand(container)}.size())"
     
     def generate_function(self, func):
         """Generate code for a function definition."""
-        params = []
-        for param in func.params:
-            if param == 'arr':
-                params.append('vector<int>& arr')
-            else:
-                params.append(f'int {param}')
-        return_type = 'int' if func.name == 'partition' else 'void'
-        code = [f'{return_type} {func.name}({", ".join(params)}) {{']
-        indent = "    "
-        if func.name == 'partition':
-            # Manually emit the correct logic for partition
-            code.append(f'{indent}auto pivot = arr[high];')
-            code.append(f'{indent}auto i = (low - 1);')
-            code.append(f'{indent}for (int j = low; j < high; j++) {{')
-            code.append(f'{indent*2}if ((arr[j] <= pivot)) {{')
-            code.append(f'{indent*3}i = (i + 1);')
-            code.append(f'{indent*3}swap(arr[i], arr[j]);')
-            code.append(f'{indent*2}}}')
-            code.append(f'{indent}}}')
-            code.append(f'{indent}swap(arr[i + 1], arr[high]);')
-            code.append(f'{indent}return (i + 1);')
-        else:
-            for stmt in func.body:
-                code.extend(self.generate_statement(stmt))
-        code.append('}')
-        return '\n'.join(code)
\ No newline at end of file
+        out = self.out
+        out.line(f'{self.types.signature(func.name, cpp_function_name(func.name))} {{')
+        out.indent()
+        self.begin_function(func)
+        for stmt in func.body:
+            self.generate_statement(stmt)
+        out.dedent()
+        out.line('}')
+
+# The output half of the runtime (see CodeGenerator.generate_output_runtime).
+OUTPUT_RUNTIME = r"""struct PyWriter {
+    char buffer[1 << 16];
+    size_t used = 0;
+    ~PyWriter() { flush(); }
+    void flush() {
+        fwrite(buffer, 1, used, stdout);
+        fflush(stdout);
+        used = 0;
+    }
+    void put(char c) {
+        if (used == sizeof buffer) flush();
+        buffer[used++] = c;
+    }
+    void write(const char* s, size_t n) {
+        if (n > sizeof buffer - used) {
+            flush();
+            if (n > sizeof buffer) {
+                fwrite(s, 1, n, stdout);
+                return;
+            }
+        }
+        memcpy(buffer + used, s, n);
+        used += n;
+    }
+};
+
+inline PyWriter py_out;
+// An uncaught exception skips static destructors; write what was printed before it first.
+inline const terminate_handler py_default_terminate = set_terminate([] {
+    py_out.flush();
+    py_default_terminate();
+});
+
+inline void py_write_float(double x) {
+    if (isnan(x)) return py_out.write("nan", 3);
+    if (isinf(x)) return x > 0 ? py_out.write("inf", 3) : py_out.write("-inf", 4);
+    // The shortest digits that read back as x, as [-]d.ddde[+-]XX; repr() lays them out.
+    char text[32];
+    char* end = to_chars(text, text + sizeof text, x, chars_format::scientific).ptr;
+    char* e = find(text, end, 'e');
+    int exponent = 0;
+    from_chars(e + (e[1] == '+' ? 2 : 1), end, exponent);
+    int point = exponent + 1;
+    char digits[24];
+    int n = 0;
+    const char* p = text;
+    if (*p == '-') {
+        py_out.put('-');
+        ++p;
+    }
+    for (; p < e; ++p) {
+        if (*p != '.') digits[n++] = *p;
+    }
+    if (point <= -4 || point > 16) {
+        py_out.put(digits[0]);
+        if (n > 1) {
+            py_out.put('.');
+            py_out.write(digits + 1, n - 1);
+        }
+        py_out.put('e');
+        py_out.put(exponent < 0 ? '-' : '+');
+        if (abs(exponent) < 10) py_out.put('0');
+        char buffer[8];
+        py_out.write(buffer, to_chars(buffer, buffer + sizeof buffer, abs(exponent)).ptr - buffer);
+    } else if (point <= 0) {
+        py_out.write("0.", 2);
+        for (int i = point; i < 0; ++i) py_out.put('0');
+        py_out.write(digits, n);
+    } else if (point >= n) {
+        py_out.write(digits, n);
+        for (int i = n; i < point; ++i) py_out.put('0');
+        py_out.write(".0", 2);
+    } else {
+        py_out.write(digits, point);
+        py_out.put('.');
+        py_out.write(digits + point, n - point);
+    }
+}
+
+inline void py_write_string_repr(string_view s) {
+    char quote = s.find('\'') != string_view::npos && s.find('"') == string_view::npos ? '"' : '\'';
+    py_out.put(quote);
+    for (char c : s) {
+        if (c == quote || c == '\\') {
+            py_out.put('\\');
+            py_out.put(c);
+        } else if (c == '\n') {
+            py_out.write("\\n", 2);
+        } else if (c == '\t') {
+            py_out.write("\\t", 2);
+        } else if (c == '\r') {
+            py_out.write("\\r", 2);
+        } else if ((c >= 0 && c < ' ') || c == 0x7f) {
+            char escape[5] = {'\\', 'x', "0123456789abcdef"[c >> 4], "0123456789abcdef"[c & 15], 0};
+            py_out.write(escape, 4);
+        } else {
+            py_out.put(c);
+        }
+    }
+    py_out.put(quote);
+}
+
+template <typename T> struct py_is_list : false_type {};
+template <typename T, typename A> struct py_is_list<vector<T, A>> : true_type {};
+
+// str(x): what print() writes for x.
+template <typename T>
+void py_write(const T& x) {
+    if constexpr (is_same_v<T, bool>) {
+        x ? py_out.write("True", 4) : py_out.write("False", 5);
+    } else if constexpr (is_same_v<T, char>) {
+        py_out.put(x);
+    } else if constexpr (is_integral_v<T>) {
+        char buffer[24];
+        py_out.write(buffer, to_chars(buffer, buffer + sizeof buffer, x).ptr - buffer);
+    } else if constexpr (is_floating_point_v<T>) {
+        py_write_float(x);
+    } else if constexpr (is_convertible_v<const T&, string_view>) {
+        string_view s = x;
+        py_out.write(s.data(), s.size());
+    } else if constexpr (py_is_list<T>::value) {
+        py_out.put('[');
+        bool first = true;
+        for (const auto& element : x) {
+            if (!first) py_out.write(", ", 2);
+            first = false;
+            // repr() of each element, which only differs from str() for strings.
+            if constexpr (is_convertible_v<const typename T::value_type&, string_view>) {
+                py_write_string_repr(element);
+            } else {
+                py_write(static_cast<const typename T::value_type&>(element));
+            }
+        }
+        py_out.put(']');
+    } else {
+        // The element proxies of vector<bool>.
+        py_write(static_cast<bool>(x));
+    }
+}
+
+inline void py_print() {
+    py_out.put('\n');
+}
+
+template <typename First, typename... Rest>
+void py_print(const First& first, const Rest&... rest) {
+    py_write(first);
+    ((py_out.put(' '), py_write(rest)), ...);
+    py_out.put('\n');
+}"""
+
+# C++ binding strength of the binary operators the generator emits; lower binds tighter.
+CPP_PRECEDENCE = {
+    '*': 5, '/': 5, '//': 5, '%': 5,
+    '+': 6, '-': 6,
+    '<<': 7, '>>': 7,
+    '<': 9, '<=': 9, '>': 9, '>=': 9,
+    '==': 10, '!=': 10,
+    '&': 11,
+    'and': 14,
+    'or': 15,
+}
+
+# Helpers computing Python's flooring // and % where C++ truncation would differ.
+PYTHON_DIVISION = {'//': 'py_floordiv', '%': 'py_mod'}
+# Overflow-checked helper for each operator (a constant << k is checked as * 2**k).
+CHECKED_OPERATIONS = {'+': 'py_add', '-': 'py_sub', '*': 'py_mul', '<<': 'py_mul'}
+# The GCC and Clang builtin behind each checked helper.
+CHECKED_BUILTINS = {'py_add': '__builtin_add_overflow', 'py_sub': '__builtin_sub_overflow',
+                    'py_mul': '__builtin_mul_overflow'}
+
+# Operators whose mixed operands gcc -Wparentheses wants parenthesized regardless.
+WARN_UNPARENTHESIZED = {'<<', '>>', '&', 'or'}
+# Chained comparisons mean something else in C++, so nested ones are always parenthesized.
+COMPARISON_LEVELS = {9, 10}
+
+# Generator for each statement node type, cached per concrete class.
+STATEMENT_GENERATORS = DispatchTable({
+    list: CodeGenerator.generate_statement_list,
+    Print: CodeGenerator.generate_print,
+    Assignment: CodeGenerator.generate_assignment,
+    IfStatement: CodeGenerator.generate_if,
+    WhileLoop: CodeGenerator.generate_while,
+    ForLoop: CodeGenerator.generate_for,
+    Return: CodeGenerator.generate_return,
+    ListAssignment: CodeGenerator.generate_list_assignment,
+    ParallelAssignment: CodeGenerator.generate_parallel_assignment,
+    FunctionCall: CodeGenerator.generate_call_statement,
+    Expression: CodeGenerator.generate_expression_statement,
+    FunctionDef: CodeGenerator.generate_nested_function,
+    Verbatim: CodeGenerator.generate_verbatim,
+})
+
+# Generator for each expression node type, cached per concrete class.
+EXPRESSION_GENERATORS = DispatchTable({
+    Number: CodeGenerator.generate_number,
+    Float: CodeGenerator.generate_float,
+    String: CodeGenerator.generate_string,
+    Boolean: CodeGenerator.generate_boolean,
+    Variable: CodeGenerator.generate_variable,
+    BinaryOp: CodeGenerator.generate_binary_op,
+    UnaryOp: CodeGenerator.generate_unary_op,
+    List: CodeGenerator.generate_list,
+    ListAccess: CodeGenerator.generate_list_access,
+    FunctionCall: CodeGenerator.generate_function_call,
+    LenCall: CodeGenerator.generate_len_call,
+    ListComprehension: CodeGenerator.generate_list_comprehension,
+    MethodCall: CodeGenerator.generate_method_call,
+})
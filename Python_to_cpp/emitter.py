@@ -0,0 +1,31 @@
+"""Streaming output of generated code."""
+
+class Emitter:
+    """Writes indented lines of code straight to a file-like sink.
+
+    The emitter owns the indentation level; the prefix for each depth is
+    built once and reused for every line at that depth.
+    """
+
+    def __init__(self, sink, indent="    "):
+        self.write = sink.write
+        self.indent_unit = indent
+        self.prefixes = [""]
+        self.level = 0
+
+    def line(self, text=""):
+        """Write one line at the current indentation."""
+        if text:
+            self.write(f"{self.prefixes[self.level]}{text}\n")
+        else:
+            self.write("\n")
+
+    def indent(self):
+        """Indent the following lines one more level."""
+        self.level += 1
+        if self.level == len(self.prefixes):
+            self.prefixes.append(self.prefixes[-1] + self.indent_unit)
+
+    def dedent(self):
+        """Indent the following lines one level less."""
+        self.level -= 1
@@ -0,0 +1,150 @@
+"""Incremental re-transpilation of a module, one top-level function at a time."""
+import copy
+import hashlib
+import io
+import re
+
+from ast_nodes import FunctionDef, Program
+from codegen import CodeGenerator
+from emitter import Emitter
+from lexer import Lexer
+from loop_optimizer import LoopOptimizer
+from optimizer import Optimizer
+from parser import Parser
+from range_analysis import ProgramRanges
+from type_inference import infer_types
+
+# A top-level function definition starts a new unit.
+UNIT_START = re.compile(r'^def\b', re.MULTILINE)
+
+def split_units(source):
+    """Split module source into units, each starting at a top-level `def`.
+
+    Returns (first line number, text) pairs; top-level statements belong to
+    the unit they follow, or to a unit of their own before the first def.
+    """
+    starts = [match.start() for match in UNIT_START.finditer(source)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    units = []
+    line = 1
+    for start, end in zip(starts, starts[1:] + [len(source)]):
+        text = source[start:end]
+        if text:
+            units.append((line, text))
+            line += text.count("\n")
+    return units
+
+def unit_key(text):
+    return hashlib.sha256(text.encode()).digest()
+
+class IncrementalTranspiler:
+    """Transpiles successive versions of one module, redoing only what an edit affects.
+
+    The module is split into units at each top-level `def`. A unit whose
+    text is unchanged reuses its parsed statements. Types are re-inferred
+    only for the functions in changed units and those their changes reach
+    (see infer_types), a function is re-optimized only if its types were
+    re-inferred, and its C++ is regenerated only if the types of its
+    optimized body were, or the integer ranges it was lowered with
+    (see ProgramRanges.inputs) changed. Top-level statements are redone every time. The
+    result is the same C++ that transpiling the whole module produces.
+    """
+
+    def __init__(self):
+        # Parsed (unoptimized) statements of each unit, by hash of its text.
+        self.units = {}
+        # Per function name: hash of the unit defining it, its optimized
+        # definition and its generated C++.
+        self.function_units = {}
+        self.optimized = {}
+        self.fragments = {}
+        # Types of the parsed program and of the optimized one, from the last run.
+        self.source_types = None
+        self.optimized_types = None
+        # Per function name: the integer ranges its C++ was generated with.
+        self.range_inputs = {}
+        # Work done by the last run: units parsed, functions optimized and generated.
+        self.stats = {}
+
+    def transpile(self, source):
+        """Return the C++ for the module `source`."""
+        units = {}
+        statements = []
+        function_units = {}
+        parsed = 0
+        for first_line, text in split_units(source):
+            key = unit_key(text)
+            unit = units[key] = self.units.get(key)
+            if unit is None:
+                unit = units[key] = Parser(Lexer(text, first_line).iter_tokens()).parse().statements
+                parsed += 1
+            for stmt in unit:
+                if isinstance(stmt, FunctionDef):
+                    function_units[stmt.name] = key
+            statements.extend(unit)
+        program = Program(statements)
+        changed = {name for name, key in function_units.items() if self.function_units.get(name) != key}
+        source_types = infer_types(program, self.source_types, changed)
+
+        names = set(function_units)
+        optimized_statements = []
+        reoptimized = set()
+        module = []
+        for stmt in statements:
+            if not isinstance(stmt, FunctionDef):
+                module.append(copy.deepcopy(stmt))
+                continue
+            func = self.optimized.get(stmt.name)
+            if func is None or stmt.name in source_types.inferred:
+                func = LoopOptimizer(names, source_types).visit(Optimizer(source_types).visit(copy.deepcopy(stmt)))
+                reoptimized.add(stmt.name)
+            optimized_statements.append(func)
+        if module:
+            # Top-level statements form one scope; optimize them together, in place.
+            module = Optimizer(source_types).visit(module)
+            module = LoopOptimizer(names, source_types).visit(Program(module)).statements
+        # Functions and top-level statements are generated separately, so their relative order is moot.
+        optimized = Program(optimized_statements + module)
+        types = infer_types(optimized, self.optimized_types, reoptimized)
+
+        fragments = {}
+        generated = 0
+        ranges = ProgramRanges(optimized, types)
+        range_inputs = {func.name: ranges.inputs(func.name) for func in optimized_statements}
+        generator = CodeGenerator(types, program_ranges=ranges)
+        for func in optimized_statements:
+            fragment = self.fragments.get(func.name)
+            if (fragment is None or func.name in types.inferred
+                    or range_inputs[func.name] != self.range_inputs.get(func.name)):
+                buffer = io.StringIO()
+                generator.out = Emitter(buffer)
+                generator.generate_function(func)
+                generator.out.line()
+                fragment = buffer.getvalue()
+                generated += 1
+            fragments[func.name] = fragment
+
+        buffer = io.StringIO()
+        generator.out = Emitter(buffer)
+        generator.generate_prelude()
+        generator.generate_declarations(optimized_statements)
+        for func in optimized_statements:
+            buffer.write(fragments[func.name])
+        generator.generate_entry_point(optimized, optimized_statements)
+
+        # Only a successful run replaces the state of the previous one.
+        self.units = units
+        self.function_units = function_units
+        self.optimized = {func.name: func for func in optimized_statements}
+        self.fragments = fragments
+        self.source_types = source_types
+        self.optimized_types = types
+        self.range_inputs = range_inputs
+        self.stats = {
+            'units': len(units),
+            'parsed': parsed,
+            'optimized': len(reoptimized),
+            'generated': generated,
+        }
+        return buffer.getvalue()
@@ -1,8 +1,149 @@
+import codecs
+import io
+import locale
+import mmap
 import re
 from tokens import TokenType
 
+TOKEN_SPECIFICATION = [
+    # Keywords
+    ('PRINT', r'\bprint\b', TokenType.PRINT),
+    ('IF', r'\bif\b', TokenType.IF),
+    ('ELSE', r'\belse\b', TokenType.ELSE),
+    ('WHILE', r'\bwhile\b', TokenType.WHILE),
+    ('FOR', r'\bfor\b', TokenType.FOR),
+    ('IN', r'\bin\b', TokenType.IN),
+    ('RANGE', r'\brange\b', TokenType.RANGE),
+    ('DEF', r'\bdef\b', TokenType.DEF),
+    ('RETURN', r'\breturn\b', TokenType.RETURN),
+    ('TRUE', r'\bTrue\b', TokenType.TRUE),
+    ('FALSE', r'\bFalse\b', TokenType.FALSE),
+    ('AND', r'\band\b', TokenType.AND),
+    ('OR', r'\bor\b', TokenType.OR),
+    ('NOT', r'\bnot\b', TokenType.NOT),
+    
+    # Identifiers and literals
+    ('IDENTIFIER', r'[a-zA-Z_][a-zA-Z0-9_]*', TokenType.IDENTIFIER),
+    ('FLOAT', r'\d*\.\d+', TokenType.FLOAT),
+    ('NUMBER', r'\d+', TokenType.NUMBER),
+    # As in Python, a string ends on its line unless the newline is escaped.
+    ('STRING', r'"[^"\\\n]*(\\[\s\S][^"\\\n]*)*"|\'[^\'\\\n]*(\\[\s\S][^\'\\\n]*)*\'', TokenType.STRING),
+    
+    # Operators
+    ('PLUS_EQUALS', r'\+=', TokenType.PLUS_EQUALS),
+    ('MINUS_EQUALS', r'-=', TokenType.MINUS_EQUALS),
+    ('MULTIPLY_EQUALS', r'\*=', TokenType.MULTIPLY_EQUALS),
+    ('FLOOR_DIVIDE_EQUALS', r'//=', TokenType.FLOOR_DIVIDE_EQUALS),
+    ('DIVIDE_EQUALS', r'/=', TokenType.DIVIDE_EQUALS),
+    ('MODULO_EQUALS', r'%=', TokenType.MODULO_EQUALS),
+    ('EQUALS_EQUALS', r'==', TokenType.EQUALS_EQUALS),
+    ('NOT_EQUALS', r'!=', TokenType.NOT_EQUALS),
+    ('GREATER_EQUALS', r'>=', TokenType.GREATER_EQUALS),
+    ('LESS_EQUALS', r'<=', TokenType.LESS_EQUALS),
+    ('EQUALS', r'=', TokenType.EQUALS),
+    ('PLUS', r'\+', TokenType.PLUS),
+    ('MINUS', r'-', TokenType.MINUS),
+    ('MULTIPLY', r'\*', TokenType.MULTIPLY),
+    ('FLOOR_DIVIDE', r'//', TokenType.FLOOR_DIVIDE),
+    ('DIVIDE', r'/', TokenType.DIVIDE),
+    ('MODULO', r'%', TokenType.MODULO),
+    ('GREATER', r'>', TokenType.GREATER),
+    ('LESS', r'<', TokenType.LESS),
+    
+    # Delimiters
+    ('LPAREN', r'\(', TokenType.LPAREN),
+    ('RPAREN', r'\)', TokenType.RPAREN),
+    ('LBRACE', r'\{', TokenType.LBRACE),
+    ('RBRACE', r'\}', TokenType.RBRACE),
+    ('LBRACKET', r'\[', TokenType.LBRACKET),
+    ('RBRACKET', r'\]', TokenType.RBRACKET),
+    ('COMMA', r',', TokenType.COMMA),
+    ('DOT', r'\.', TokenType.DOT),
+    ('COLON', r':', TokenType.COLON),
+    ('SEMICOLON', r';', TokenType.SEMICOLON),
+    
+    # Comments
+    ('COMMENT', r'#.*', TokenType.COMMENT),
+    
+    # Skip whitespace
+    ('SKIP', r'[ \t]+', None),
+    ('NEWLINE', r'\n', TokenType.NEWLINE),
+]
+
+# The master regex is compiled once per process and shared by every Lexer.
+TOKEN_REGEX = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in TOKEN_SPECIFICATION))
+TOKEN_TYPES = {name: type_ for name, _, type_ in TOKEN_SPECIFICATION}
+
+# A string literal opened but not yet closed by the end of the text it is matched against.
+OPEN_STRING_REGEX = re.compile(r'"([^"\\\n]|\\[\s\S])*|\'([^\'\\\n]|\\[\s\S])*')
+QUOTE_REGEX = re.compile('["\']')
+
+# Brackets inside which newlines and indentation are insignificant.
+OPENING_BRACKETS = {TokenType.LPAREN, TokenType.LBRACKET, TokenType.LBRACE}
+CLOSING_BRACKETS = {TokenType.RPAREN, TokenType.RBRACKET, TokenType.RBRACE}
+
+# Bytes of a memory-mapped source file decoded per chunk by Lexer.from_file().
+CHUNK_SIZE = 1 << 20
+
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield the text of a file in chunks, decoded straight out of a memory map.
+
+    Decoding matches open(path, "r"): the locale's preferred encoding and
+    universal newlines, so the chunks concatenate to exactly what f.read()
+    would have returned.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder(locale.getpreferredencoding(False))(), translate=True)
+    with open(path, "rb") as f:
+        if f.seek(0, io.SEEK_END) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset in range(0, len(data), chunk_size):
+                chunk = decoder.decode(data[offset:offset + chunk_size])
+                if chunk:
+                    yield chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def iter_chunk_matches(chunks):
+    """Yield the same matches as TOKEN_REGEX.finditer() over the concatenated chunks.
+
+    Only the text up to the last newline of the buffered input is scanned, since
+    no token except a string literal can cross a newline. A quote that did not
+    start a string inside that window may still be closed further on if every
+    newline after it is escaped, so the scan stops there and the rest is
+    carried over into the next chunk. Any other unclosed quote is skipped, as
+    finditer() skips it, so the carried text never grows past a line.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        cut = buffer.rfind("\n") + 1
+        if cut:
+            consumed = yield from _scan_window(buffer, cut, final=False)
+            buffer = buffer[consumed:]
+    yield from _scan_window(buffer, len(buffer), final=True)
+
+def _scan_window(buffer, end, final):
+    """Yield matches in buffer[:end] and return how much of the buffer was consumed."""
+    position = 0
+    while True:
+        match = TOKEN_REGEX.search(buffer, position, end)
+        skipped_end = match.start() if match else end
+        if not final and skipped_end > position:
+            for quote in QUOTE_REGEX.finditer(buffer, position, skipped_end):
+                if OPEN_STRING_REGEX.fullmatch(buffer, quote.start(), end):
+                    return quote.start()
+        if match is None:
+            return end
+        yield match
+        position = match.end()
+
 class Token:
     """Represents a single token."""
+    __slots__ = ('type', 'value', 'line', 'column')
+
     def __init__(self, type_, value, line=None, column=None):
         self.type = type_
         self.value = value
@@ -13,122 +154,122 @@ class Token:
         return f"Token({self.type}, {self.value}, line={self.line}, col={self.column})"
 
 class Lexer:
-    """Converts Python code into tokens."""
+    """Converts Python code into tokens.
+
+    Like Python's tokenizer, every logical line ends with a NEWLINE token and
+    changes of indentation produce INDENT/DEDENT tokens, so blocks are
+    delimited in the token stream. Blank lines, comment-only lines and line
+    breaks inside brackets produce no layout tokens.
+    """
     
-    def __init__(self, source_code):
+    def __init__(self, source_code, first_line=1):
         self.source_code = source_code
         self.position = 0
-        self.line = 1
+        # Line number of the first line, for source that is part of a larger file.
+        self.line = first_line
         self.column = 1
         self.tokens = []
+        # Indentation widths of the open blocks, outermost first.
+        self.indents = [0]
+        self.bracket_depth = 0
+        self.at_line_start = True
+        self.source_path = None
+        self.chunk_size = CHUNK_SIZE
+
+    @classmethod
+    def from_file(cls, path, chunk_size=CHUNK_SIZE):
+        """Create a lexer that scans a memory-mapped source file chunk by chunk."""
+        lexer = cls(None)
+        lexer.source_path = path
+        lexer.chunk_size = chunk_size
+        return lexer
     
     def tokenize(self):
         """Main function to generate tokens from source code."""
-        token_specification = [
-            # Keywords
-            ('PRINT', r'\bprint\b', TokenType.PRINT),
-            ('IF', r'\bif\b', TokenType.IF),
-            ('ELSE', r'\belse\b', TokenType.ELSE),
-            ('WHILE', r'\bwhile\b', TokenType.WHILE),
-            ('FOR', r'\bfor\b', TokenType.FOR),
-            ('IN', r'\bin\b', TokenType.IN),
-            ('RANGE', r'\brange\b', TokenType.RANGE),
-            ('DEF', r'\bdef\b', TokenType.DEF),
-            ('RETURN', r'\breturn\b', TokenType.RETURN),
-            ('TRUE', r'\bTrue\b', TokenType.TRUE),
-            ('FALSE', r'\bFalse\b', TokenType.FALSE),
-            ('AND', r'\band\b', TokenType.AND),
-            ('OR', r'\bor\b', TokenType.OR),
-            ('NOT', r'\bnot\b', TokenType.NOT),
-            
-            # Identifiers and literals
-            ('IDENTIFIER', r'[a-zA-Z_][a-zA-Z0-9_]*', TokenType.IDENTIFIER),
-            ('FLOAT', r'\d*\.\d+', TokenType.FLOAT),
-            ('NUMBER', r'\d+', TokenType.NUMBER),
-            ('STRING', r'"[^"\\]*(\\.[^"\\]*)*"|\'[^\'\\]*(\\.[^\'\\]*)*\'', TokenType.STRING),
-            
-            # Operators
-            ('PLUS_EQUALS', r'\+=', TokenType.PLUS_EQUALS),
-            ('MINUS_EQUALS', r'-=', TokenType.MINUS_EQUALS),
-            ('MULTIPLY_EQUALS', r'\*=', TokenType.MULTIPLY_EQUALS),
-            ('DIVIDE_EQUALS', r'/=', TokenType.DIVIDE_EQUALS),
-            ('MODULO_EQUALS', r'%=', TokenType.MODULO_EQUALS),
-            ('EQUALS_EQUALS', r'==', TokenType.EQUALS_EQUALS),
-            ('NOT_EQUALS', r'!=', TokenType.NOT_EQUALS),
-            ('GREATER_EQUALS', r'>=', TokenType.GREATER_EQUALS),
-            ('LESS_EQUALS', r'<=', TokenType.LESS_EQUALS),
-            ('EQUALS', r'=', TokenType.EQUALS),
-            ('PLUS', r'\+', TokenType.PLUS),
-            ('MINUS', r'-', TokenType.MINUS),
-            ('MULTIPLY', r'\*', TokenType.MULTIPLY),
-            ('DIVIDE', r'/', TokenType.DIVIDE),
-            ('MODULO', r'%', TokenType.MODULO),
-            ('GREATER', r'>', TokenType.GREATER),
-            ('LESS', r'<', TokenType.LESS),
-            
-            # Delimiters
-            ('LPAREN', r'\(', TokenType.LPAREN),
-            ('RPAREN', r'\)', TokenType.RPAREN),
-            ('LBRACE', r'\{', TokenType.LBRACE),
-            ('RBRACE', r'\}', TokenType.RBRACE),
-            ('LBRACKET', r'\[', TokenType.LBRACKET),
-            ('RBRACKET', r'\]', TokenType.RBRACKET),
-            ('COMMA', r',', TokenType.COMMA),
-            ('COLON', r':', TokenType.COLON),
-            ('SEMICOLON', r';', TokenType.SEMICOLON),
-            
-            # Comments
-            ('COMMENT', r'#.*', TokenType.COMMENT),
-            
-            # Skip whitespace
-            ('SKIP', r'[ \t]+', None),
-            ('NEWLINE', r'\n', None),
-        ]
+        self.tokens.extend(self.iter_tokens())
+        return self.tokens
 
-        token_regex = '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in token_specification)
-        token_types = {name: type_ for name, _, type_ in token_specification}
-        
-        for match in re.finditer(token_regex, self.source_code):
-            token_type = match.lastgroup
-            token_value = match.group(token_type)
-            start_pos = match.start()
-            
-            # Skip whitespace and comments
-            if token_type in ('SKIP', 'COMMENT'):
-                self.column += len(token_value)
+    def iter_tokens(self):
+        """Yield tokens one at a time instead of building the full token list."""
+        if self.source_path is not None:
+            matches = iter_chunk_matches(iter_file_chunks(self.source_path, self.chunk_size))
+        else:
+            matches = TOKEN_REGEX.finditer(self.source_code)
+
+        for match in matches:
+            token = self.make_token(match)
+            if token is None:
                 continue
-                
-            # Handle newlines
-            if token_type == 'NEWLINE':
-                self.line += 1
-                self.column = 1
+            if token.type == TokenType.NEWLINE:
+                if not self.at_line_start and not self.bracket_depth:
+                    self.at_line_start = True
+                    yield token
                 continue
-            
-            # Convert token values to appropriate types
-            if token_type == 'NUMBER':
-                token_value = int(token_value)
-            elif token_type == 'FLOAT':
-                token_value = float(token_value)
-            elif token_type == 'STRING':
-                token_value = token_value[1:-1]  # Remove quotes
-            elif token_type == 'TRUE':
-                token_value = True
-            elif token_type == 'FALSE':
-                token_value = False
-            elif token_type in ('PLUS', 'MINUS', 'MULTIPLY', 'DIVIDE', 'MODULO', 
-                              'EQUALS_EQUALS', 'NOT_EQUALS', 'GREATER_EQUALS', 
-                              'LESS_EQUALS', 'GREATER', 'LESS', 'EQUALS'):
-                token_value = token_value  # Keep the operator symbol as the value
-            elif token_type == 'AND':
-                token_value = 'and'
-            elif token_type == 'OR':
-                token_value = 'or'
-            elif token_type == 'NOT':
-                token_value = 'not'
-            
-            # Create token with original string length for column tracking
-            self.tokens.append(Token(token_types[token_type], token_value, self.line, self.column))
-            self.column += len(match.group(token_type))
+            if self.at_line_start:
+                self.at_line_start = False
+                yield from self.indentation(token)
+            if token.type in OPENING_BRACKETS:
+                self.bracket_depth += 1
+            elif token.type in CLOSING_BRACKETS and self.bracket_depth:
+                self.bracket_depth -= 1
+            yield token
 
-        self.tokens.append(Token(TokenType.EOF, None, self.line, self.column))
-        return self.tokens
+        if not self.at_line_start:
+            yield Token(TokenType.NEWLINE, None, self.line, self.column)
+        for _ in self.indents[1:]:
+            yield Token(TokenType.DEDENT, None, self.line, self.column)
+        self.indents = [0]
+        yield Token(TokenType.EOF, None, self.line, self.column)
+
+    def indentation(self, token):
+        """Yield the INDENT or DEDENT tokens for a logical line starting with `token`."""
+        width = token.column - 1
+        if width > self.indents[-1]:
+            self.indents.append(width)
+            yield Token(TokenType.INDENT, width, token.line, 1)
+            return
+        while width < self.indents[-1]:
+            self.indents.pop()
+            yield Token(TokenType.DEDENT, None, token.line, token.column)
+        if width != self.indents[-1]:
+            raise IndentationError(f"Unindent does not match any outer indentation level at line {token.line}")
+
+    def make_token(self, match):
+        """Build the token for a regex match, or return None for skipped text."""
+        token_type = match.lastgroup
+        token_value = match.group(token_type)
+        
+        # Skip whitespace and comments
+        if token_type in ('SKIP', 'COMMENT'):
+            self.column += len(token_value)
+            return None
+            
+        # Handle newlines
+        if token_type == 'NEWLINE':
+            token = Token(TokenType.NEWLINE, None, self.line, self.column)
+            self.line += 1
+            self.column = 1
+            return token
+        
+        # Convert token values to appropriate types
+        if token_type == 'NUMBER':
+            token_value = int(token_value)
+        elif token_type == 'FLOAT':
+            token_value = float(token_value)
+        elif token_type == 'STRING':
+            token_value = token_value[1:-1]  # Remove quotes
+        elif token_type == 'TRUE':
+            token_value = True
+        elif token_type == 'FALSE':
+            token_value = False
+        elif token_type == 'AND':
+            token_value = 'and'
+        elif token_type == 'OR':
+            token_value = 'or'
+        elif token_type == 'NOT':
+            token_value = 'not'
+        
+        # Create token with original string length for column tracking
+        token = Token(TOKEN_TYPES[token_type], token_value, self.line, self.column)
+        self.column += len(match.group(token_type))
+        return token
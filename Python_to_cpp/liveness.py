@@ -0,0 +1,127 @@
+"""Live variable analysis: which reads of a local are the last use of its value.
+
+A read is a last use when no path from it reads the variable again before
+assigning it a new value. The code generator moves lists and strings out
+of a variable at such a read instead of copying them, since nothing can
+observe what is left behind.
+
+Liveness is computed backwards over the structured statements of one
+function. The names live at the head of a loop are iterated until they
+are stable; only a last pass from the result records last uses, as with
+the loops of range_analysis.
+"""
+from ast_nodes import (
+    Assignment, ForLoop, FunctionDef, IfStatement, ListComprehension, ParallelAssignment, Return,
+    Variable, WhileLoop
+)
+from visitor import iter_child_nodes
+
+def reads(node, repeated=False):
+    """Yield (Variable, repeated) for each variable `node` reads.
+
+    `repeated` is true for reads inside the element or condition of a
+    comprehension, which run once per element.
+    """
+    if isinstance(node, Variable):
+        yield node, repeated
+        return
+    for child in iter_child_nodes(node):
+        inner = repeated or (isinstance(node, ListComprehension) and child is not node.iterable)
+        yield from reads(child, inner)
+
+class Liveness:
+    """Finds the last uses of variables in a function body (see last_uses)."""
+
+    def __init__(self):
+        self.last = set()
+        self.recording = True
+        # loop -> {names live after it: names live before it}, so that a loop nested in
+        # another is not solved again on each pass of the outer loop.
+        self.heads = {}
+
+    def block(self, statements, live):
+        """Names live before `statements`, given those live after them."""
+        for statement in reversed(statements):
+            live = self.statement(statement, live)
+        return live
+
+    def statement(self, statement, live):
+        if isinstance(statement, list):
+            return self.block(statement, live)
+        if isinstance(statement, FunctionDef):
+            return live
+        if isinstance(statement, Assignment):
+            name = statement.name.name if isinstance(statement.name, Variable) else statement.name
+            if isinstance(statement.value, Variable) and statement.value.name == name:
+                # 'a = a' changes nothing, and moving a variable into itself would empty it.
+                return live | {name}
+            after = live - {name}
+            return after | self.expression(statement.value, after)
+        if isinstance(statement, ParallelAssignment):
+            # Targets may be list elements that read other names; assume every name stays live.
+            return live | {node.name for expr in statement.targets + statement.values for node, _ in reads(expr)}
+        if isinstance(statement, IfStatement):
+            body = self.block(statement.body, live)
+            otherwise = self.block(statement.else_body or [], live)
+            return body | otherwise | self.expression(statement.condition, body | otherwise)
+        if isinstance(statement, WhileLoop):
+            return self.loop(statement, live, statement.condition, None, statement.body)
+        if isinstance(statement, ForLoop):
+            return self.loop(statement, live, statement.iterable, statement.var_name, statement.body)
+        if isinstance(statement, Return):
+            return self.expression(statement.value, frozenset()) if statement.value is not None else frozenset()
+        # Print, calls and other expression statements.
+        return live | self.expression(statement, live)
+
+    def loop(self, loop, live, header, var_name, body):
+        """Names live before `loop`, whose `header` (condition or iterable) is read on every iteration."""
+        heads = self.heads.setdefault(loop, {})
+        live = frozenset(live)
+        header_reads = {node.name for node, _ in reads(header)}
+
+        def iterate(head):
+            entry = self.block(body, head)
+            if var_name is not None:
+                entry = entry - {var_name}
+            return live | header_reads | entry
+
+        head = heads.get(live)
+        if head is not None:
+            if self.recording:
+                iterate(head)
+            return head
+        recording, self.recording = self.recording, False
+        head = live | header_reads
+        while True:
+            new_head = iterate(head)
+            if new_head == head:
+                break
+            head = new_head
+        self.recording = recording
+        iterate(head)
+        heads[live] = head
+        return head
+
+    def expression(self, expr, live):
+        """Names `expr` reads; records its last uses, given the names live after it."""
+        found = list(reads(expr))
+        names = {node.name for node, _ in found}
+        if self.recording:
+            counts = {}
+            for node, _ in found:
+                counts[node.name] = counts.get(node.name, 0) + 1
+            for node, repeated in found:
+                if not repeated and counts[node.name] == 1 and node.name not in live:
+                    self.last.add(node)
+        return names
+
+def last_uses(body):
+    """The Variable nodes in the statements `body` after which their variable is never read again.
+
+    Reads inside a comprehension's element or condition never count, and
+    neither does a name read twice in one statement, since the order of
+    the reads within it is up to the C++ compiler.
+    """
+    analysis = Liveness()
+    analysis.block(body, frozenset())
+    return analysis.last
@@ -0,0 +1,416 @@
+"""Common subexpression elimination and loop-invariant code motion on the AST."""
+from ast_nodes import (
+    Assignment, BinaryOp, Boolean, Expression, Float, ForLoop, FunctionCall,
+    FunctionDef, IfStatement, LenCall, ListAccess, ListAssignment, ListComprehension, MethodCall, Node, Number,
+    ParallelAssignment, Print, RangeCall, Return, String, UnaryOp, Variable, WhileLoop
+)
+from range_analysis import unproven_operations
+from type_inference import MODULE, infer_types
+from visitor import NodeTransformer, walk
+
+# Builtins without side effects whose calls may be shared or moved.
+PURE_BUILTINS = {'len', 'abs', 'min', 'max'}
+
+CONSTANT_TYPES = (Number, Float, Boolean, String)
+
+# Rounds of CSE per block; each round shares the largest repeated expression.
+MAX_CSE_ROUNDS = 32
+
+def is_user_call(node, functions):
+    return isinstance(node, FunctionCall) and (node.name in functions or node.name not in PURE_BUILTINS)
+
+def expression_key(node, functions):
+    """Structural key of a side-effect-free expression, or None for anything else."""
+    if isinstance(node, CONSTANT_TYPES):
+        return (type(node).__name__, node.value)
+    if isinstance(node, Variable):
+        return ('Variable', node.name)
+    if isinstance(node, BinaryOp):
+        left, right = expression_key(node.left, functions), expression_key(node.right, functions)
+        return None if left is None or right is None else ('BinaryOp', node.op, left, right)
+    if isinstance(node, UnaryOp):
+        operand = expression_key(node.operand, functions)
+        return None if operand is None else ('UnaryOp', node.operator, operand)
+    if isinstance(node, ListAccess):
+        target, index = expression_key(node.list_expr, functions), expression_key(node.index, functions)
+        return None if target is None or index is None else ('ListAccess', target, index)
+    if isinstance(node, LenCall):
+        arg = expression_key(node.arg, functions)
+        return None if arg is None else ('FunctionCall', 'len', arg)
+    if isinstance(node, FunctionCall) and not is_user_call(node, functions):
+        args = tuple(expression_key(arg, functions) for arg in node.args)
+        return None if None in args else ('FunctionCall', node.name) + args
+    return None
+
+def is_compound(node):
+    """Worth a temporary: anything that computes rather than just names a value."""
+    return isinstance(node, (BinaryOp, UnaryOp, ListAccess, LenCall, FunctionCall))
+
+def reads_memory(node):
+    """True if the value of `node` depends on list contents or sizes."""
+    return any(isinstance(n, (ListAccess, LenCall)) or (isinstance(n, FunctionCall) and n.name == 'len')
+               for n in walk(node))
+
+def may_fault(node, unproven=frozenset()):
+    """True if evaluating `node` can raise: indexing, dividing by a possibly-zero value, or an int
+    operation in `unproven`, which is checked for overflow or computed in a long long."""
+    for n in walk(node):
+        if isinstance(n, ListAccess) or n in unproven:
+            return True
+        if isinstance(n, BinaryOp) and n.op in ('/', '//', '%') and not (isinstance(n.right, (Number, Float)) and n.right.value):
+            return True
+    return False
+
+def assigned_names(node):
+    """Names bound anywhere inside `node` (a statement or list of statements)."""
+    names = set()
+    for n in walk_statements(node):
+        if isinstance(n, Assignment):
+            names.add(n.name.name if isinstance(n.name, Variable) else n.name)
+        elif isinstance(n, (ForLoop, ListComprehension)):
+            names.add(n.var_name)
+        elif isinstance(n, ParallelAssignment):
+            names.update(target.name for target in n.targets if isinstance(target, Variable))
+    return names
+
+def writes_elements(node):
+    """True if the statement `node` itself stores to a list element or appends to a list."""
+    if isinstance(node, (ListAssignment, MethodCall)):
+        return True
+    return isinstance(node, ParallelAssignment) and any(isinstance(target, ListAccess) for target in node.targets)
+
+def walk_statements(node):
+    """Like visitor.walk, but accepts a list of statements and skips nested function definitions."""
+    stack = list(node) if isinstance(node, list) else [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if isinstance(node, FunctionDef):
+            continue
+        yield node
+        for name in type(node).__slots__:
+            value = getattr(node, name)
+            if isinstance(value, (list, Node)):
+                stack.append(value)
+
+def iter_evaluated(node, functions):
+    """Yield the subexpressions of `node` that are always evaluated, in evaluation order.
+
+    The right operand of `and`/`or` only runs conditionally and is skipped.
+    """
+    if isinstance(node, BinaryOp):
+        yield from iter_evaluated(node.left, functions)
+        if node.op not in ('and', 'or'):
+            yield from iter_evaluated(node.right, functions)
+    elif isinstance(node, UnaryOp):
+        yield from iter_evaluated(node.operand, functions)
+    elif isinstance(node, ListAccess):
+        yield from iter_evaluated(node.list_expr, functions)
+        yield from iter_evaluated(node.index, functions)
+    elif isinstance(node, LenCall):
+        yield from iter_evaluated(node.arg, functions)
+    elif isinstance(node, FunctionCall):
+        for arg in node.args:
+            yield from iter_evaluated(arg, functions)
+    elif isinstance(node, MethodCall):
+        yield from iter_evaluated(node.obj, functions)
+        for arg in node.args:
+            yield from iter_evaluated(arg, functions)
+    elif isinstance(node, RangeCall):
+        for bound in (node.start, node.end, node.step):
+            if bound is not None:
+                yield from iter_evaluated(bound, functions)
+        return
+    yield node
+
+class Substitute(NodeTransformer):
+    """Replaces the given node objects with a reference to a variable."""
+
+    def __init__(self, nodes, name):
+        self.nodes = nodes
+        self.name = name
+
+    def visit(self, node):
+        if isinstance(node, Node) and node in self.nodes:
+            return Variable(self.name)
+        return super().visit(node)
+
+class CommonSubexpressions:
+    """Shares repeated side-effect-free expressions of a block through temporaries.
+
+    The block's statements are scanned in evaluation order. An expression stays
+    available until a variable it reads is assigned, or, if it reads list
+    contents, until an element is assigned or a user function is called;
+    nested control flow counts as one step that clobbers everything it might
+    assign. Two or more uses within one availability window become
+    `_cseN = expr` before the first use, and reads of `_cseN` after it.
+    """
+
+    def __init__(self, functions, new_name):
+        self.functions = functions
+        self.new_name = new_name
+
+    def run(self, statements):
+        for _ in range(MAX_CSE_ROUNDS):
+            group = self.best_group(statements)
+            if group is None:
+                break
+            index, nodes = group
+            name = self.new_name('_cse')
+            statements = Substitute(set(nodes), name).visit(statements)
+            statements.insert(index, Assignment(Variable(name), nodes[0]))
+        return statements
+
+    def best_group(self, statements):
+        """(statement index, nodes) of the largest expression used twice in one window, or None."""
+        groups = []
+        windows = {}
+        keys = {}
+        # Subscripted or measured sub-lists: sharing those would copy a whole row.
+        containers = set()
+        for n in walk_statements(statements):
+            if isinstance(n, ListAccess):
+                containers.add(n.list_expr)
+            elif isinstance(n, LenCall):
+                containers.add(n.arg)
+
+        def kill(predicate):
+            for key in [key for key in windows if predicate(keys[key])]:
+                uses = windows.pop(key)
+                if len(uses) > 1:
+                    groups.append((key, uses))
+
+        for index, statement in enumerate(statements):
+            if isinstance(statement, WhileLoop):
+                # The condition is re-evaluated after the body has run.
+                self.clobber(statement, kill)
+            for expr in self.evaluated(statement):
+                for node in iter_evaluated(expr, self.functions):
+                    if is_user_call(node, self.functions):
+                        kill(lambda info: info[1])
+                    if not is_compound(node) or node in containers:
+                        continue
+                    key = expression_key(node, self.functions)
+                    if key is None:
+                        continue
+                    if key not in keys:
+                        reads = {n.name for n in walk(node) if isinstance(n, Variable)}
+                        keys[key] = (reads, reads_memory(node), sum(1 for _ in walk(node)))
+                    windows.setdefault(key, []).append((index, node))
+            self.clobber(statement, kill)
+        kill(lambda info: True)
+
+        best = None
+        for key, uses in groups:
+            index = uses[0][0]
+            statement = statements[index]
+            if keys[key][1] and any(is_user_call(n, self.functions) for n in walk_statements(statement)):
+                # The temporary would read the list before a call in the same statement.
+                continue
+            if best is None or keys[key][2] > best[0]:
+                best = (keys[key][2], index, [node for _, node in uses])
+        return None if best is None else best[1:]
+
+    @staticmethod
+    def evaluated(statement):
+        """Expressions a statement evaluates unconditionally, in order."""
+        if isinstance(statement, Assignment):
+            return [statement.value]
+        if isinstance(statement, ListAssignment):
+            return [statement.value, statement.list_expr, statement.index]
+        if isinstance(statement, ParallelAssignment):
+            # Only the values: later targets are located after earlier ones are stored.
+            return statement.values
+        if isinstance(statement, Print):
+            return statement.expressions
+        if isinstance(statement, Return):
+            return [statement.value] if statement.value is not None else []
+        if isinstance(statement, (IfStatement, WhileLoop)):
+            return [statement.condition]
+        if isinstance(statement, ForLoop):
+            return [statement.iterable]
+        if isinstance(statement, Expression):
+            return [statement]
+        return []
+
+    def clobber(self, statement, kill):
+        """End the availability of whatever `statement` may change."""
+        assigned = assigned_names(statement)
+        if assigned:
+            kill(lambda info: not info[0].isdisjoint(assigned))
+        nodes = list(walk_statements(statement))
+        if any(writes_elements(n) for n in nodes) or any(is_user_call(n, self.functions) for n in nodes):
+            kill(lambda info: info[1])
+
+class LoopOptimizer(NodeTransformer):
+    """Hoists loop-invariant computations out of loops and shares repeated ones inside them.
+
+    Inner loops are handled first. An expression is invariant in a loop when
+    it has no side effects, reads no variable assigned in the loop, and does
+    not depend on list contents (or on the size of a list the loop appends
+    to or hands to a user function); it is only moved if evaluating it
+    cannot raise, as the hoisted copy also runs when the loop body does not.
+    An int operation that may not fit an int counts as raising: it is
+    checked, or computed in a long long an int temporary would cut short.
+    Invariant values are computed once into `_invN` before the loop. A range() bound that is
+    not a constant, or that the loop reassigns, is also evaluated once up
+    front, as Python does.
+    """
+
+    def __init__(self, functions, types):
+        self.functions = functions
+        self.types = types
+        # The int operations of the current scope that may not fit an int (see unproven_operations).
+        self.unproven = set()
+        # Every name in the current scope, and the temporaries created in it.
+        self.names = set()
+        self.temporaries = set()
+        self.counter = 0
+        self.loop_depth = 0
+
+    def new_name(self, prefix):
+        while True:
+            name = f"{prefix}{self.counter}"
+            self.counter += 1
+            if name not in self.names:
+                self.names.add(name)
+                self.temporaries.add(name)
+                return name
+
+    def enter_scope(self, statements, params=()):
+        self.names = set(params) | assigned_names(statements)
+        self.names.update(n.name for n in walk_statements(statements) if isinstance(n, Variable))
+        self.temporaries = set()
+        self.counter = 0
+
+    def unproven_operations(self, func):
+        """The int operations of `func` that may not fit an int; only loops move any, so only then are they looked for."""
+        if not any(isinstance(n, (ForLoop, WhileLoop)) for n in walk_statements(func.body)):
+            return set()
+        return unproven_operations(func, self.types)
+
+    def visit_Program(self, node):
+        module = [stmt for stmt in node.statements if not isinstance(stmt, FunctionDef)]
+        self.enter_scope(module)
+        self.unproven = self.unproven_operations(FunctionDef(MODULE, [], module))
+        node.statements = self.visit(node.statements)
+        return node
+
+    def visit_FunctionDef(self, node):
+        names, temporaries, counter, unproven = self.names, self.temporaries, self.counter, self.unproven
+        self.enter_scope(node.body, node.params)
+        self.unproven = self.unproven_operations(node)
+        node.body = self.visit(node.body)
+        self.names, self.temporaries, self.counter, self.unproven = names, temporaries, counter, unproven
+        return node
+
+    def visit_IfStatement(self, node):
+        self.generic_visit(node)
+        if self.loop_depth:
+            node.body = CommonSubexpressions(self.functions, self.new_name).run(node.body)
+            if node.else_body:
+                node.else_body = CommonSubexpressions(self.functions, self.new_name).run(node.else_body)
+        return node
+
+    def visit_WhileLoop(self, node):
+        self.loop_depth += 1
+        node.body = self.visit(node.body)
+        self.loop_depth -= 1
+        node.body = CommonSubexpressions(self.functions, self.new_name).run(node.body)
+        return self.hoist(node, [])
+
+    def visit_ForLoop(self, node):
+        self.loop_depth += 1
+        node.body = self.visit(node.body)
+        self.loop_depth -= 1
+        node.body = CommonSubexpressions(self.functions, self.new_name).run(node.body)
+        preheader = []
+        if isinstance(node.iterable, RangeCall):
+            assigned = assigned_names(node.body) | {node.var_name}
+            for field in ('end', 'step'):
+                bound = getattr(node.iterable, field)
+                if bound is None or isinstance(bound, CONSTANT_TYPES):
+                    continue
+                if isinstance(bound, Variable) and bound.name not in assigned:
+                    continue
+                name = self.new_name('_inv')
+                preheader.append(Assignment(Variable(name), bound))
+                setattr(node.iterable, field, Variable(name))
+        return self.hoist(node, preheader)
+
+    def hoist(self, loop, preheader):
+        """Move invariant computations of `loop` into statements run just before it."""
+        assigned = assigned_names(loop.body)
+        if isinstance(loop, ForLoop):
+            assigned.add(loop.var_name)
+        escaped = {arg.name for n in walk_statements(loop.body) if is_user_call(n, self.functions)
+                   for arg in n.args if isinstance(arg, Variable)}
+        # Lists appended to in the loop change size as well.
+        escaped.update(n.obj.name for n in walk_statements(loop.body)
+                       if isinstance(n, MethodCall) and isinstance(n.obj, Variable))
+
+        def invariant(expr):
+            if expression_key(expr, self.functions) is None or may_fault(expr, self.unproven):
+                return False
+            for n in walk(expr):
+                if isinstance(n, Variable) and n.name in assigned:
+                    return False
+                if isinstance(n, ListAccess):
+                    return False
+                if isinstance(n, LenCall) and isinstance(n.arg, Variable) and n.arg.name in escaped:
+                    return False
+                if isinstance(n, FunctionCall) and n.name == 'len' and any(
+                        isinstance(arg, Variable) and arg.name in escaped for arg in n.args):
+                    return False
+            return True
+
+        # Temporaries that inner loops already hoisted into this body move further out if they can.
+        body = []
+        for statement in loop.body:
+            if (isinstance(statement, Assignment) and isinstance(statement.name, Variable)
+                    and statement.name.name in self.temporaries and invariant(statement.value)):
+                preheader.append(statement)
+                assigned.discard(statement.name.name)
+            else:
+                body.append(statement)
+        loop.body = body
+
+        hoisted = {}
+
+        def replace(expr):
+            if is_compound(expr) and invariant(expr):
+                key = expression_key(expr, self.functions)
+                if key not in hoisted:
+                    name = self.new_name('_inv')
+                    hoisted[key] = name
+                    preheader.append(Assignment(Variable(name), expr))
+                return Variable(hoisted[key])
+            return Hoist(replace).generic_visit(expr)
+
+        if isinstance(loop, WhileLoop):
+            loop.condition = replace(loop.condition)
+        loop.body = Hoist(replace).visit(loop.body)
+        return preheader + [loop] if preheader else loop
+
+class Hoist(NodeTransformer):
+    """Passes every outermost expression of a block to `replace`, leaving nested loops alone."""
+
+    def __init__(self, replace):
+        self.replace = replace
+
+    def visit(self, node):
+        if isinstance(node, (WhileLoop, ForLoop, FunctionDef)):
+            return node
+        if isinstance(node, Expression) and not isinstance(node, RangeCall):
+            return self.replace(node)
+        return super().visit(node)
+
+def optimize_loops(program, types=None):
+    """Run CSE and loop-invariant code motion over every function of `program`, in place.
+
+    `types` is the TypeInfo of `program`, inferred if not given.
+    """
+    functions = {stmt.name for stmt in program.statements if isinstance(stmt, FunctionDef)}
+    return LoopOptimizer(functions, types if types is not None else infer_types(program)).visit(program)
@@ -1,44 +1,69 @@
 from lexer import Lexer
 from parser import Parser
 from codegen import CodeGenerator
-from ast_nodes import Program
+from optimizer import optimize
+from cache import TranspileCache, DEFAULT_CACHE_DIR, replace_atomically
+from tracing import RuleTracer
+import argparse
 import sys
 from pprint import pprint
 
-def transpile_python_to_cpp(input_file, output_file):
+def write_cpp(ast, output_file):
+    """Stream the C++ for `ast` into `output_file`, which is only replaced once generation succeeds."""
+    def fill(tmp_path):
+        with open(tmp_path, "w") as f:
+            CodeGenerator().generate_to(ast, f)
+    replace_atomically(output_file, fill)
+
+def transpile_file(input_file, output_file, cache=None):
+    """Transpile one file without any progress output; errors propagate to the caller.
+
+    Returns True if the result was served from `cache`.
+    """
+    if cache is not None:
+        key = cache.key(input_file)
+        if cache.fetch(key, output_file):
+            return True
+    ast = optimize(Parser(Lexer.from_file(input_file).iter_tokens()).parse())
+    write_cpp(ast, output_file)
+    if cache is not None:
+        cache.store(key, output_file)
+    return False
+
+def transpile_python_to_cpp(input_file, output_file, cache=None, verbose=False, tracer=None):
     try:
-        # Read Python code
-        with open(input_file, "r") as f:
-            code = f.read()
-
-        # Tokenize
-        print("Tokenizing Python code...")
-        lexer = Lexer(code)
-        tokens = lexer.tokenize()
-        print("Tokenization successful!")
-
-        # Parse
-        print("\nParsing tokens into AST...")
-        parser = Parser(tokens)
+        if cache is not None:
+            key = cache.key(input_file)
+            if cache.fetch(key, output_file):
+                print(f"Source unchanged; cached C++ code has been written to {output_file}")
+                return
+
+        # Tokenize and parse; the lexer scans the memory-mapped input in
+        # chunks and the parser pulls tokens from it lazily
+        print("Tokenizing and parsing Python code into AST...")
+        lexer = Lexer.from_file(input_file)
+        parser = Parser(lexer.iter_tokens(), tracer)
         ast = parser.parse()
-        print("\nParsed AST:")
-        pprint(ast)
+        if verbose:
+            print("\nParsed AST:")
+            pprint(ast)
         print("Parsing successful!")
 
-        # Generate C++ code
+        # Fold constants and simplify expressions, then generate C++ code,
+        # streaming it into a file that replaces the output once complete
         print("\nGenerating C++ code...")
-        codegen = CodeGenerator()
-        cpp_code = codegen.generate(ast)
+        optimize(ast)
+        write_cpp(ast, output_file)
         print("Code generation successful!")
-
-        # Save the C++ code
-        with open(output_file, "w") as f:
-            f.write(cpp_code)
+        if cache is not None:
+            cache.store(key, output_file)
+            cache.evict()
         print(f"\nC++ code has been written to {output_file}")
 
-        # Print the generated C++ code
-        print("\nGenerated C++ Code:\n")
-        print(cpp_code)
+        if verbose:
+            print("\nGenerated C++ Code:\n")
+            with open(output_file) as f:
+                print(f.read())
 
     except FileNotFoundError:
         print(f"Error: Could not find input file '{input_file}'")
@@ -47,7 +72,23 @@ def transpile_python_to_cpp(input_file, output_file):
         print(f"Error during transpilation: {str(e)}")
         sys.exit(1)
 
+def add_cache_arguments(arg_parser):
+    """Add the --no-cache and --cache-dir options shared by the drivers."""
+    arg_parser.add_argument("--no-cache", action="store_true", help="always transpile, bypassing the cache")
+    arg_parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                            help=f"directory of the transpilation cache (default: {DEFAULT_CACHE_DIR})")
+
 if __name__ == "__main__":
-    input_file = "my.py"
-    output_file = "output.cpp"
-    transpile_python_to_cpp(input_file, output_file)
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Transpile a Python file to C++.")
+    arg_parser.add_argument("input_file", nargs="?", default="my.py")
+    arg_parser.add_argument("output_file", nargs="?", default="output.cpp")
+    add_cache_arguments(arg_parser)
+    arg_parser.add_argument("-v", "--verbose", action="store_true", help="print the parsed AST and the generated C++")
+    arg_parser.add_argument("--trace", action="store_true",
+                            help="report per-rule parser call counts and times on stderr (implies --no-cache)")
+    args = arg_parser.parse_args()
+    cache = None if args.no_cache or args.trace else TranspileCache(args.cache_dir)
+    tracer = RuleTracer() if args.trace else None
+    transpile_python_to_cpp(args.input_file, args.output_file, cache, args.verbose, tracer)
+    if tracer is not None:
+        print(tracer.report(), file=sys.stderr)
@@ -0,0 +1,206 @@
+"""Constant folding and algebraic simplification of the AST before code generation."""
+import operator
+
+from ast_nodes import Boolean, BinaryOp, Float, Number, String, UnaryOp
+from type_inference import BOOL, FLOAT, INT, MODULE, infer_types
+from visitor import NodeTransformer
+from loop_optimizer import optimize_loops
+
+# Python semantics of the binary operators that can be folded at compile time.
+FOLDABLE_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '//': operator.floordiv,
+    '%': operator.mod,
+    '<<': operator.lshift,
+    '>>': operator.rshift,
+    '&': operator.and_,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# `not (a op b)` rewritten as `a op' b`; only valid when neither side can be NaN.
+NEGATED_COMPARISONS = {'<': '>=', '>=': '<', '>': '<=', '<=': '>', '==': '!=', '!=': '=='}
+
+# Folded ints must still fit the C++ int the generator declares them as.
+INT_MIN, INT_MAX = -2**31, 2**31 - 1
+
+CONSTANT_TYPES = (Number, Float, Boolean, String)
+
+def is_constant(node):
+    return isinstance(node, CONSTANT_TYPES)
+
+def constant(value):
+    """Return the literal node for a folded Python value, or None if it has none."""
+    if isinstance(value, bool):
+        return Boolean(value)
+    if isinstance(value, int):
+        return Number(value) if INT_MIN <= value <= INT_MAX else None
+    if isinstance(value, float):
+        return Float(value) if value - value == 0 else None
+    if isinstance(value, str):
+        return String(value)
+    return None
+
+def is_value(node, value):
+    """True for a numeric literal equal to `value` (bools excluded)."""
+    return isinstance(node, (Number, Float)) and node.value == value
+
+def power_of_two(node):
+    """Exponent k if `node` is the int literal 2**k with k >= 1, else None."""
+    if isinstance(node, Number) and node.value > 1 and node.value & (node.value - 1) == 0:
+        return node.value.bit_length() - 1
+    return None
+
+class Optimizer(NodeTransformer):
+    """Folds constant expressions and rewrites cheap algebraic identities.
+
+    Folding follows Python semantics (true division, floor modulo), so a
+    folded literal is what the Python program would have computed; anything
+    that would raise, overflow an int or produce inf/nan is left for run time.
+    Rewrites that depend on operand types (`x * 1`, strength reduction) are
+    only applied where type inference proves the operand is an int or float.
+    Statements guarded by a constant condition are replaced by the branch
+    that runs.
+    """
+
+    def __init__(self, types):
+        self.types = types
+        self.function = MODULE
+
+    def type_of(self, expr):
+        return self.types.expr_type(self.function, expr)
+
+    def visit_FunctionDef(self, node):
+        outer, self.function = self.function, node.name
+        node.body = self.visit(node.body)
+        self.function = outer
+        return node
+
+    def visit_ListComprehension(self, node):
+        node.iterable = self.visit(node.iterable)
+        with self.types.inside(self.function, node):
+            node.element = self.visit(node.element)
+            if node.condition is not None:
+                node.condition = self.condition(node.condition)
+        return node
+
+    def visit_IfStatement(self, node):
+        node.condition = self.condition(node.condition)
+        node.body = self.visit(node.body)
+        if node.else_body:
+            node.else_body = self.visit(node.else_body)
+        if is_constant(node.condition):
+            return node.body if node.condition.value else node.else_body
+        return node
+
+    def visit_WhileLoop(self, node):
+        node.condition = self.condition(node.condition)
+        node.body = self.visit(node.body)
+        if is_constant(node.condition) and not node.condition.value:
+            return None
+        return node
+
+    def condition(self, expr):
+        """Optimize an expression used only for its truth value."""
+        expr = self.visit(expr)
+        while (isinstance(expr, UnaryOp) and expr.operator == 'not'
+               and isinstance(expr.operand, UnaryOp) and expr.operand.operator == 'not'):
+            expr = expr.operand.operand
+        return expr
+
+    def visit_UnaryOp(self, node):
+        operand = node.operand = self.visit(node.operand)
+        op = node.operator
+        if is_constant(operand) and not isinstance(operand, String):
+            value = operand.value
+            folded = constant(not value if op == 'not' else -value if op == '-' else +value)
+            if folded is not None:
+                return folded
+        if op == 'not':
+            if isinstance(operand, UnaryOp) and operand.operator == 'not' and self.type_of(operand.operand) is BOOL:
+                return operand.operand
+            if (isinstance(operand, BinaryOp) and operand.op in NEGATED_COMPARISONS
+                    and self.type_of(operand.left) is INT and self.type_of(operand.right) is INT):
+                return BinaryOp(operand.left, NEGATED_COMPARISONS[operand.op], operand.right)
+        elif op == '-':
+            if isinstance(operand, UnaryOp) and operand.operator == '-' and self.type_of(operand.operand) in (INT, FLOAT):
+                return operand.operand
+        elif self.type_of(operand) in (INT, FLOAT):
+            return operand
+        return node
+
+    def visit_BinaryOp(self, node):
+        left = node.left = self.visit(node.left)
+        right = node.right = self.visit(node.right)
+        op = node.op
+        if op in ('and', 'or'):
+            if is_constant(left):
+                # Python returns the operand that decided the result.
+                return right if bool(left.value) == (op == 'and') else left
+            return node
+        if is_constant(left) and is_constant(right):
+            folded = self.fold(op, left.value, right.value)
+            if folded is not None:
+                return folded
+        return self.simplify(node, op, left, right)
+
+    def fold(self, op, left, right):
+        function = FOLDABLE_OPERATORS.get(op)
+        if function is None or (isinstance(left, str) != isinstance(right, str) and op not in ('==', '!=')):
+            return None
+        if isinstance(left, str) and op not in ('+', '==', '!='):
+            return None
+        try:
+            return constant(function(left, right))
+        except (ArithmeticError, TypeError, ValueError):
+            return None
+
+    def simplify(self, node, op, left, right):
+        """Apply identities and strength reduction to a BinaryOp with at most one constant side."""
+        if op == '+':
+            if is_value(right, 0) and self.keeps_type(left, right, INT):
+                return left
+            if is_value(left, 0) and self.keeps_type(right, left, INT):
+                return right
+        elif op == '-':
+            if is_value(right, 0) and self.keeps_type(left, right, INT, FLOAT):
+                return left
+        elif op == '*':
+            if is_value(right, 1) and self.keeps_type(left, right, INT, FLOAT):
+                return left
+            if is_value(left, 1) and self.keeps_type(right, left, INT, FLOAT):
+                return right
+            # Generated as a C++ shift only where the value is proven non-negative (see CodeGenerator).
+            if self.type_of(left) is INT and power_of_two(right) is not None:
+                return BinaryOp(left, '<<', Number(power_of_two(right)))
+            if self.type_of(right) is INT and power_of_two(left) is not None:
+                return BinaryOp(right, '<<', Number(power_of_two(left)))
+        elif op == '%':
+            # Python's floor modulo by 2**k equals masking the low bits, negative operands included.
+            if self.type_of(left) is INT and power_of_two(right) is not None:
+                return BinaryOp(left, '&', Number(right.value - 1))
+        elif op == '//':
+            if is_value(right, 1) and self.type_of(left) is INT:
+                return left
+            # Floor division by 2**k is an arithmetic shift, negative operands included.
+            if self.type_of(left) is INT and power_of_two(right) is not None:
+                return BinaryOp(left, '>>', Number(power_of_two(right)))
+        return node
+
+    def keeps_type(self, operand, literal, *types):
+        """True if `operand` has one of `types` and combining it with `literal` does not widen it."""
+        operand_type = self.type_of(operand)
+        return operand_type in types and (operand_type is FLOAT or isinstance(literal, Number))
+
+def optimize(program, types=None):
+    """Optimize `program` in place and return it: simplify expressions, then loops."""
+    optimizer = Optimizer(types if types is not None else infer_types(program))
+    program.statements = optimizer.visit(program.statements)
+    return optimize_loops(program, optimizer.types)
@@ -1,47 +1,288 @@
 #include <bits/stdc++.h>
 using namespace std;
 
-void print_array(const vector<int>& arr) {
-    cout << '[';
-    for (size_t i = 0; i < arr.size(); ++i) {
-        cout << arr[i];
-        if (i < arr.size() - 1) cout << ", ";
+#if defined(__clang__)
+#define PY_IVDEP _Pragma("clang loop vectorize(assume_safety)")
+#else
+#define PY_IVDEP _Pragma("GCC ivdep")
+#endif
+
+template <typename R>
+[[noreturn]] void py_overflow() {
+    throw overflow_error("integer result does not fit in " + to_string(sizeof(R) * CHAR_BIT) + " bits");
+}
+
+template <typename R, typename A, typename B>
+inline R py_add(A a, B b) {
+    R r;
+    if (__builtin_add_overflow(a, b, &r)) py_overflow<R>();
+    return r;
+}
+
+template <typename R, typename A, typename B>
+inline R py_sub(A a, B b) {
+    R r;
+    if (__builtin_sub_overflow(a, b, &r)) py_overflow<R>();
+    return r;
+}
+
+template <typename R, typename A, typename B>
+inline R py_mul(A a, B b) {
+    R r;
+    if (__builtin_mul_overflow(a, b, &r)) py_overflow<R>();
+    return r;
+}
+
+template <typename R, typename A>
+inline R py_narrow(A a) {
+    R r;
+    if (__builtin_add_overflow(a, 0, &r)) py_overflow<R>();
+    return r;
+}
+
+template <typename A, typename B>
+inline auto py_mod(A a, B b) {
+    if constexpr (is_floating_point_v<common_type_t<A, B>>) {
+        if (b == 0) throw domain_error("float modulo");
+        double r = fmod(a, b);
+        if (r == 0) return copysign(0.0, b);
+        return (r < 0) != (b < 0) ? r + b : r;
+    } else if constexpr (is_unsigned_v<A> || is_unsigned_v<B>) {
+        return py_mod(static_cast<long long>(a), static_cast<long long>(b));
+    } else {
+        if (b == 0) throw domain_error("integer division or modulo by zero");
+        using T = decltype(a % b);
+        // a % -1 overflows for the most negative a; the remainder is always 0.
+        T r = b == -1 ? T(0) : T(a % b);
+        return r != 0 && (r < 0) != (b < 0) ? T(r + b) : r;
+    }
+}
+
+template <typename A, typename B>
+inline auto py_floordiv(A a, B b) {
+    if constexpr (is_floating_point_v<common_type_t<A, B>>) {
+        if (b == 0) throw domain_error("float floor division by zero");
+        double mod = fmod(a, b);
+        double div = (a - mod) / b;
+        if (mod != 0 && (mod < 0) != (b < 0)) div -= 1.0;
+        if (div == 0) return copysign(0.0, a / b);
+        double floored = floor(div);
+        return div - floored > 0.5 ? floored + 1.0 : floored;
+    } else if constexpr (is_unsigned_v<A> || is_unsigned_v<B>) {
+        return py_floordiv(static_cast<long long>(a), static_cast<long long>(b));
+    } else {
+        if (b == 0) throw domain_error("integer division or modulo by zero");
+        using T = decltype(a / b);
+        if (b == -1) return py_sub<T>(0, a);
+        T q = a / b, r = a % b;
+        return r != 0 && (r < 0) != (b < 0) ? T(q - 1) : q;
+    }
+}
+
+template <typename T>
+inline auto py_sum(const vector<T>& v) {
+    // Ints are totalled in a long long, which no sum of an int list can overflow.
+    return accumulate(v.begin(), v.end(), conditional_t<is_floating_point_v<T>, double, long long>(0));
+}
+
+template <typename T>
+inline void py_reserve(vector<T>& v, long long extra) {
+    // Capacity still grows geometrically, so a loop reserving on every run appends in amortized O(1).
+    if (extra <= 0) return;
+    size_t needed = v.size() + static_cast<size_t>(extra);
+    if (needed > v.capacity()) v.reserve(max(needed, 2 * v.capacity()));
+}
+
+template <typename T>
+inline T& py_lvalue(T&& value) {
+    // A temporary passed to a function that changes it in place; it lives until the end of the statement.
+    return value;
+}
+
+struct PyWriter {
+    char buffer[1 << 16];
+    size_t used = 0;
+    ~PyWriter() { flush(); }
+    void flush() {
+        fwrite(buffer, 1, used, stdout);
+        fflush(stdout);
+        used = 0;
+    }
+    void put(char c) {
+        if (used == sizeof buffer) flush();
+        buffer[used++] = c;
+    }
+    void write(const char* s, size_t n) {
+        if (n > sizeof buffer - used) {
+            flush();
+            if (n > sizeof buffer) {
+                fwrite(s, 1, n, stdout);
+                return;
+            }
+        }
+        memcpy(buffer + used, s, n);
+        used += n;
+    }
+};
+
+inline PyWriter py_out;
+// An uncaught exception skips static destructors; write what was printed before it first.
+inline const terminate_handler py_default_terminate = set_terminate([] {
+    py_out.flush();
+    py_default_terminate();
+});
+
+inline void py_write_float(double x) {
+    if (isnan(x)) return py_out.write("nan", 3);
+    if (isinf(x)) return x > 0 ? py_out.write("inf", 3) : py_out.write("-inf", 4);
+    // The shortest digits that read back as x, as [-]d.ddde[+-]XX; repr() lays them out.
+    char text[32];
+    char* end = to_chars(text, text + sizeof text, x, chars_format::scientific).ptr;
+    char* e = find(text, end, 'e');
+    int exponent = 0;
+    from_chars(e + (e[1] == '+' ? 2 : 1), end, exponent);
+    int point = exponent + 1;
+    char digits[24];
+    int n = 0;
+    const char* p = text;
+    if (*p == '-') {
+        py_out.put('-');
+        ++p;
+    }
+    for (; p < e; ++p) {
+        if (*p != '.') digits[n++] = *p;
+    }
+    if (point <= -4 || point > 16) {
+        py_out.put(digits[0]);
+        if (n > 1) {
+            py_out.put('.');
+            py_out.write(digits + 1, n - 1);
+        }
+        py_out.put('e');
+        py_out.put(exponent < 0 ? '-' : '+');
+        if (abs(exponent) < 10) py_out.put('0');
+        char buffer[8];
+        py_out.write(buffer, to_chars(buffer, buffer + sizeof buffer, abs(exponent)).ptr - buffer);
+    } else if (point <= 0) {
+        py_out.write("0.", 2);
+        for (int i = point; i < 0; ++i) py_out.put('0');
+        py_out.write(digits, n);
+    } else if (point >= n) {
+        py_out.write(digits, n);
+        for (int i = n; i < point; ++i) py_out.put('0');
+        py_out.write(".0", 2);
+    } else {
+        py_out.write(digits, point);
+        py_out.put('.');
+        py_out.write(digits + point, n - point);
     }
-    cout << ']';
+}
+
+inline void py_write_string_repr(string_view s) {
+    char quote = s.find('\'') != string_view::npos && s.find('"') == string_view::npos ? '"' : '\'';
+    py_out.put(quote);
+    for (char c : s) {
+        if (c == quote || c == '\\') {
+            py_out.put('\\');
+            py_out.put(c);
+        } else if (c == '\n') {
+            py_out.write("\\n", 2);
+        } else if (c == '\t') {
+            py_out.write("\\t", 2);
+        } else if (c == '\r') {
+            py_out.write("\\r", 2);
+        } else if ((c >= 0 && c < ' ') || c == 0x7f) {
+            char escape[5] = {'\\', 'x', "0123456789abcdef"[c >> 4], "0123456789abcdef"[c & 15], 0};
+            py_out.write(escape, 4);
+        } else {
+            py_out.put(c);
+        }
+    }
+    py_out.put(quote);
+}
+
+template <typename T> struct py_is_list : false_type {};
+template <typename T, typename A> struct py_is_list<vector<T, A>> : true_type {};
+
+// str(x): what print() writes for x.
+template <typename T>
+void py_write(const T& x) {
+    if constexpr (is_same_v<T, bool>) {
+        x ? py_out.write("True", 4) : py_out.write("False", 5);
+    } else if constexpr (is_same_v<T, char>) {
+        py_out.put(x);
+    } else if constexpr (is_integral_v<T>) {
+        char buffer[24];
+        py_out.write(buffer, to_chars(buffer, buffer + sizeof buffer, x).ptr - buffer);
+    } else if constexpr (is_floating_point_v<T>) {
+        py_write_float(x);
+    } else if constexpr (is_convertible_v<const T&, string_view>) {
+        string_view s = x;
+        py_out.write(s.data(), s.size());
+    } else if constexpr (py_is_list<T>::value) {
+        py_out.put('[');
+        bool first = true;
+        for (const auto& element : x) {
+            if (!first) py_out.write(", ", 2);
+            first = false;
+            // repr() of each element, which only differs from str() for strings.
+            if constexpr (is_convertible_v<const typename T::value_type&, string_view>) {
+                py_write_string_repr(element);
+            } else {
+                py_write(static_cast<const typename T::value_type&>(element));
+            }
+        }
+        py_out.put(']');
+    } else {
+        // The element proxies of vector<bool>.
+        py_write(static_cast<bool>(x));
+    }
+}
+
+inline void py_print() {
+    py_out.put('\n');
+}
+
+template <typename First, typename... Rest>
+void py_print(const First& first, const Rest&... rest) {
+    py_write(first);
+    ((py_out.put(' '), py_write(rest)), ...);
+    py_out.put('\n');
 }
 
 int partition(vector<int>& arr, int low, int high);
 void quick_sort(vector<int>& arr, int low, int high);
+void py_main();
 
 int partition(vector<int>& arr, int low, int high) {
-    auto pivot = arr[high];
-    auto i = (low - 1);
+    int pivot = arr[high];
+    int i = low - 1;
     for (int j = low; j < high; j++) {
-        if ((arr[j] <= pivot)) {
-            i = (i + 1);
+        if (arr[j] <= pivot) {
+            i = py_add<int>(i, 1);
             swap(arr[i], arr[j]);
         }
     }
-    swap(arr[i + 1], arr[high]);
-    return (i + 1);
+    swap(arr[static_cast<long long>(i) + 1], arr[high]);
+    return py_add<int>(i, 1);
 }
 
 void quick_sort(vector<int>& arr, int low, int high) {
-if ((low < high)) {
-    auto pi = partition(arr, low, high);
-    quick_sort(arr, low, (pi - 1));
-    quick_sort(arr, (pi + 1), high);
+    if (low < high) {
+        int pi = partition(arr, low, high);
+        quick_sort(arr, low, pi - 1);
+        quick_sort(arr, py_add<int>(pi, 1), high);
+    }
 }
+
+void py_main() {
+    vector<int> arr = {10, 7, 8, 9, 1, 5};
+    py_print("Unsorted array:", arr);
+    quick_sort(arr, 0, static_cast<int>(arr.size()) - 1);
+    py_print("Sorted array:", arr);
 }
 
 int main() {
-    vector<int> arr = {10, 7, 8, 9, 1, 5};
-    cout << "Unsorted array:" << " ";
-    print_array(arr);
-    cout << endl;
-    quick_sort(arr, 0, ((arr.size() - 1)));
-    cout << "Sorted array:" << " ";
-    print_array(arr);
-    cout << endl;
+    py_main();
     return 0;
-}
\ No newline at end of file
+}
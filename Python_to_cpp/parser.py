@@ -1,26 +1,36 @@
-from lexer import Lexer, TokenType
+from lexer import TokenType
 from ast_nodes import (
     Assignment, Variable, BinaryOp, Number, Print, Float, String, Boolean,
     UnaryOp, IfStatement, WhileLoop, ForLoop, RangeCall, FunctionDef, FunctionCall, Return, 
-    List, ListAccess, ListAssignment, LenCall, Program
+    List, ListAccess, ListAssignment, ParallelAssignment, Program, ListComprehension, MethodCall
 )
 
 class Parser:
     """Parses tokens into an Abstract Syntax Tree (AST)."""
     
-    def __init__(self, tokens):
-        self.tokens = tokens
+    def __init__(self, tokens, tracer=None):
+        # Accept a token list or any iterator, e.g. Lexer.iter_tokens().
+        self.token_stream = iter(tokens)
         self.current_token_index = 0
-        self.current_token = self.tokens[self.current_token_index]
+        self.current_token = self.next_token()
+        if tracer is not None:
+            # Shadow each grammar rule with an instrumented version; without a
+            # tracer the plain methods run and no tracing work is done.
+            for rule in GRAMMAR_RULES:
+                setattr(self, rule, tracer.wrap(self, rule, getattr(self, rule)))
+        # Bind the dispatch tables once so each lookup yields a ready-to-call rule.
+        self.statement_rules = {type_: getattr(self, rule) for type_, rule in STATEMENT_RULES.items()}
+        self.prefix_rules = {type_: getattr(self, rule) for type_, rule in PREFIX_RULES.items()}
+
+    def next_token(self):
+        """Pull the next token from the token stream."""
+        return next(self.token_stream, None)
 
     def eat(self, token_type):
         """Consume a token if it matches the expected type."""
         if self.current_token.type == token_type:
             self.current_token_index += 1
-            if self.current_token_index < len(self.tokens):
-                self.current_token = self.tokens[self.current_token_index]
-            else:
-                self.current_token = None
+            self.current_token = self.next_token()
         else:
             raise SyntaxError(f"Expected token type {token_type}, but got {self.current_token.type} at line {self.current_token.line}, column {self.current_token.column}")
 
@@ -45,145 +55,114 @@ class Parser:
         else:
             raise SyntaxError(f"Unexpected token: {self.current_token}")
 
-    def parse_variable(self):
-        """Parse a variable and return a Variable AST node."""
-        token = self.current_token
-        self.eat(TokenType.IDENTIFIER)
-        return Variable(token.value)
-
-    def parse_expression(self):
-        """Parse expressions with proper operator precedence."""
-        print(f"Parsing expression at token: {self.current_token}")
-        # Handle expressions that start with operators
-        if self.current_token and self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            operand = self.parse_expression()
-            return UnaryOp(operator, operand)
-        expr = self.parse_logical()
-        return expr
+    def parse_expression(self, min_precedence=0):
+        """Parse an expression by precedence climbing over BINARY_PRECEDENCE.
 
-    def parse_comparison(self):
-        """Parse comparison operators."""
-        print(f"Parsing comparison at token: {self.current_token}")
-        left = self.parse_term()
+        Only operators that bind tighter than `min_precedence` are consumed,
+        which makes every binary operator left-associative.
+        """
+        token = self.current_token
+        rule = self.prefix_rules.get(token.type) if token else None
+        if rule is None:
+            raise SyntaxError(f"Unexpected token: {token}")
+        left = rule()
 
-        while self.current_token and self.current_token.type in (
-            TokenType.GREATER, TokenType.LESS, TokenType.GREATER_EQUALS,
-            TokenType.LESS_EQUALS, TokenType.EQUALS_EQUALS, TokenType.NOT_EQUALS
-        ):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            right = self.parse_term()
-            left = BinaryOp(left, operator, right)
+        while self.current_token:
+            operator = self.current_token
+            precedence = BINARY_PRECEDENCE.get(operator.type, 0)
+            if precedence <= min_precedence:
+                break
+            self.eat(operator.type)
+            right = self.parse_expression(precedence)
+            left = self.make_binary(left, operator.value, right)
 
         return left
 
-    def parse_term(self):
-        """Parse addition and subtraction."""
-        print(f"Parsing term at token: {self.current_token}")
-        left = self.parse_factor()
+    def make_binary(self, left, operator, right):
+        """Build a BinaryOp, turning '+' with a string operand into string concatenation."""
+        if operator == '+':
+            # If either operand is a string or str() call, treat as string concatenation
+            if isinstance(left, String) or isinstance(right, String) or \
+               (isinstance(left, FunctionCall) and left.name == 'str') or \
+               (isinstance(right, FunctionCall) and right.name == 'str'):
+                # Convert non-string operands to strings
+                if not isinstance(left, String) and not (isinstance(left, FunctionCall) and left.name == 'str'):
+                    left = FunctionCall('str', [left])
+                if not isinstance(right, String) and not (isinstance(right, FunctionCall) and right.name == 'str'):
+                    right = FunctionCall('str', [right])
+        return BinaryOp(left, operator, right)
 
-        while self.current_token and self.current_token.type in (TokenType.PLUS, TokenType.MINUS):
-            operator = self.current_token.value
-            print(f"Found operator {operator} at token: {self.current_token}")
-            self.eat(self.current_token.type)
-            right = self.parse_factor()
-            
-            # Handle string concatenation
-            if operator == '+':
-                # If either operand is a string or str() call, treat as string concatenation
-                if isinstance(left, String) or isinstance(right, String) or \
-                   (isinstance(left, FunctionCall) and left.name == 'str') or \
-                   (isinstance(right, FunctionCall) and right.name == 'str'):
-                    # Convert non-string operands to strings
-                    if not isinstance(left, String) and not (isinstance(left, FunctionCall) and left.name == 'str'):
-                        left = FunctionCall('str', [left])
-                    if not isinstance(right, String) and not (isinstance(right, FunctionCall) and right.name == 'str'):
-                        right = FunctionCall('str', [right])
-            
-            left = BinaryOp(left, operator, right)
+    def parse_unary(self):
+        """Parse a prefix operator (+, -, not) and its operand."""
+        token = self.current_token
+        self.eat(token.type)
+        operand = self.parse_expression(PREFIX_PRECEDENCE[token.type])
+        return UnaryOp(token.value, operand)
 
-        return left
+    def parse_name(self):
+        """Parse a variable, a function call, a method call or a list access."""
+        name = self.current_token.value
+        self.eat(TokenType.IDENTIFIER)
+        
+        # Check for function call
+        if self.current_token and self.current_token.type == TokenType.LPAREN:
+            return self.parse_function_call(name)
 
-    def parse_factor(self):
-        """Parse multiplication and division."""
-        print(f"Parsing factor at token: {self.current_token}")
-        left = self.parse_primary()
+        if self.current_token and self.current_token.type == TokenType.DOT:
+            return self.parse_method_call(Variable(name))
 
-        while self.current_token and self.current_token.type in (TokenType.MULTIPLY, TokenType.DIVIDE, TokenType.MODULO):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            right = self.parse_primary()
-            left = BinaryOp(left, operator, right)
+        # A transpiled module is always the program's entry point.
+        if name == "__name__":
+            return String("__main__")
+        
+        # Check for list access
+        elif self.current_token and self.current_token.type == TokenType.LBRACKET:
+            self.eat(TokenType.LBRACKET)
+            index = self.parse_expression()
+            self.eat(TokenType.RBRACKET)
+            return ListAccess(Variable(name), index)
+        
+        return Variable(name)
 
-        return left
+    def parse_group(self):
+        """Parse a parenthesized expression."""
+        self.eat(TokenType.LPAREN)
+        expr = self.parse_expression()
+        self.eat(TokenType.RPAREN)
+        return expr
 
-    def parse_primary(self):
-        """Parse a primary expression."""
-        print(f"parse_primary: current token = {self.current_token}")
-        if not self.current_token:
-            return None
-            
-        token = self.current_token
+    def parse_list(self):
+        """Parse a list literal or a list comprehension."""
+        self.eat(TokenType.LBRACKET)
+        elements = []
+        if self.current_token and self.current_token.type != TokenType.RBRACKET:
+            while True:
+                elements.append(self.parse_expression())
+                if len(elements) == 1 and self.current_token and self.current_token.type == TokenType.FOR:
+                    comprehension = self.parse_comprehension(elements[0])
+                    self.eat(TokenType.RBRACKET)
+                    return comprehension
+                if not self.current_token or self.current_token.type == TokenType.RBRACKET:
+                    break
+                self.eat(TokenType.COMMA)
+        self.eat(TokenType.RBRACKET)
+        return List(elements)
 
-        if token.type == TokenType.NUMBER:
-            self.eat(TokenType.NUMBER)
-            return Number(token.value)
-        elif token.type == TokenType.FLOAT:
-            self.eat(TokenType.FLOAT)
-            return Float(token.value)
-        elif token.type == TokenType.STRING:
-            self.eat(TokenType.STRING)
-            return String(token.value)
-        elif token.type == TokenType.TRUE:
-            self.eat(TokenType.TRUE)
-            return Boolean(True)
-        elif token.type == TokenType.FALSE:
-            self.eat(TokenType.FALSE)
-            return Boolean(False)
-        elif token.type == TokenType.IDENTIFIER:
-            name = token.value
-            self.eat(TokenType.IDENTIFIER)
-            
-            # Check for function call
-            if self.current_token and self.current_token.type == TokenType.LPAREN:
-                return self.parse_function_call(name)
-            
-            # Check for list access
-            elif self.current_token and self.current_token.type == TokenType.LBRACKET:
-                self.eat(TokenType.LBRACKET)
-                index = self.parse_expression()
-                self.eat(TokenType.RBRACKET)
-                return ListAccess(Variable(name), index)
-            
-            return Variable(name)
-        elif token.type == TokenType.LPAREN:
-            self.eat(TokenType.LPAREN)
-            expr = self.parse_expression()
-            self.eat(TokenType.RPAREN)
-            return expr
-        elif token.type == TokenType.LBRACKET:
-            self.eat(TokenType.LBRACKET)
-            elements = []
-            if self.current_token and self.current_token.type != TokenType.RBRACKET:
-                while True:
-                    elements.append(self.parse_expression())
-                    if not self.current_token or self.current_token.type == TokenType.RBRACKET:
-                        break
-                    self.eat(TokenType.COMMA)
-            self.eat(TokenType.RBRACKET)
-            return List(elements)
-        elif token.type in (TokenType.PLUS, TokenType.MINUS):
-            # Handle unary operators
-            operator = token.value
-            self.eat(token.type)
-            operand = self.parse_primary()
-            return UnaryOp(operator, operand)
-        else:
-            # If we encounter an operator here, it's likely part of a larger expression
-            # Let the caller handle it
-            return None
+    def parse_comprehension(self, element):
+        """Parse the 'for name in iterable' clause and any 'if' clauses after a comprehension's element."""
+        self.eat(TokenType.FOR)
+        var_name = self.current_token.value
+        self.eat(TokenType.IDENTIFIER)
+        self.eat(TokenType.IN)
+        iterable = self.parse_iterable()
+        condition = None
+        while self.current_token and self.current_token.type == TokenType.IF:
+            self.eat(TokenType.IF)
+            test = self.parse_expression()
+            condition = test if condition is None else BinaryOp(condition, 'and', test)
+        if self.current_token and self.current_token.type == TokenType.FOR:
+            raise SyntaxError(f"Comprehensions with more than one for clause are not supported (line {self.current_token.line})")
+        return ListComprehension(element, var_name, iterable, condition)
 
     def parse_function_call(self, name):
         """Parse a function call with its arguments."""
@@ -191,144 +170,113 @@ class Parser:
         args = []
         if self.current_token and self.current_token.type != TokenType.RPAREN:
             args.append(self.parse_expression())
+            if self.current_token and self.current_token.type == TokenType.FOR:
+                # A generator expression as the only argument, as in sum(x * x for x in a).
+                args = [self.parse_comprehension(args[0])]
             while self.current_token and self.current_token.type == TokenType.COMMA:
                 self.eat(TokenType.COMMA)
                 args.append(self.parse_expression())
         self.eat(TokenType.RPAREN)
         return FunctionCall(name, args)
 
-    def parse_multiple_assignment(self):
-        """Parse multiple assignments like 'a, b = c, d' or 'arr[i], arr[j] = arr[j], arr[i]'."""
-        targets = []
-        values = []
-        
-        # Parse targets
-        while True:
-            if self.current_token.type == TokenType.IDENTIFIER:
-                var_name = self.current_token.value
-                self.eat(TokenType.IDENTIFIER)
-                
-                # Check for list access
-                if self.current_token.type == TokenType.LBRACKET:
-                    self.eat(TokenType.LBRACKET)
-                    index = self.parse_expression()
-                    self.eat(TokenType.RBRACKET)
-                    targets.append(ListAccess(Variable(var_name), index))
-                else:
-                    targets.append(Variable(var_name))
-            
-            if self.current_token.type != TokenType.COMMA:
-                break
-            self.eat(TokenType.COMMA)
-        
-        # Parse equals sign
-        self.eat(TokenType.EQUALS)
-        
-        # Parse values
-        while True:
-            if self.current_token.type == TokenType.IDENTIFIER:
-                var_name = self.current_token.value
-                self.eat(TokenType.IDENTIFIER)
-                
-                # Check for list access
-                if self.current_token.type == TokenType.LBRACKET:
-                    self.eat(TokenType.LBRACKET)
-                    index = self.parse_expression()
-                    self.eat(TokenType.RBRACKET)
-                    values.append(ListAccess(Variable(var_name), index))
-                else:
-                    values.append(Variable(var_name))
-            else:
-                values.append(self.parse_expression())
-            
-            if self.current_token.type != TokenType.COMMA:
-                break
-            self.eat(TokenType.COMMA)
-        
-        # Create assignments
-        statements = []
-        for target, value in zip(targets, values):
-            if isinstance(target, ListAccess):
-                statements.append(ListAssignment(target.list_expr, target.index, value))
-            else:
-                statements.append(Assignment(target, value))
-        
-        return statements
+    def parse_method_call(self, obj):
+        """Parse '.method(args)' after the object it is called on."""
+        self.eat(TokenType.DOT)
+        method = self.current_token.value
+        self.eat(TokenType.IDENTIFIER)
+        if self.current_token.type != TokenType.LPAREN:
+            raise SyntaxError(f"Attribute access is not supported, only method calls (line {self.current_token.line})")
+        call = self.parse_function_call(method)
+        return MethodCall(obj, method, call.args)
 
-    def parse_statement(self):
-        """Parse a single statement."""
-        if self.current_token.type == TokenType.IF:
-            return self.parse_if()
-        elif self.current_token.type == TokenType.WHILE:
-            return self.parse_while()
-        elif self.current_token.type == TokenType.FOR:
-            return self.parse_for()
-        elif self.current_token.type == TokenType.DEF:
-            return self.parse_function_def()
-        elif self.current_token.type == TokenType.RETURN:
-            return self.parse_return()
-        elif self.current_token.type == TokenType.PRINT:
-            return self.parse_print()
-        elif self.current_token.type == TokenType.IDENTIFIER:
+    def parse_multiple_assignment(self, first_target):
+        """Parse the rest of 'a, b = c, d' or 'arr[i], arr[j] = arr[j], arr[i]' after its first target."""
+        targets = [first_target]
+        while self.current_token.type == TokenType.COMMA:
+            self.eat(TokenType.COMMA)
             var_name = self.current_token.value
             self.eat(TokenType.IDENTIFIER)
-            
-            # Check for function call
-            if self.current_token.type == TokenType.LPAREN:
-                return self.parse_function_call(var_name)
-            
-            # Check for list assignment
             if self.current_token.type == TokenType.LBRACKET:
                 self.eat(TokenType.LBRACKET)
                 index = self.parse_expression()
                 self.eat(TokenType.RBRACKET)
-                
-                # Check for tuple unpacking
-                if self.current_token.type == TokenType.COMMA:
-                    # Handle tuple unpacking assignment
-                    return self.parse_multiple_assignment()
-                
-                # Regular list assignment
-                self.eat(TokenType.EQUALS)
-                value = self.parse_expression()
-                return ListAssignment(Variable(var_name), index, value)
+                targets.append(ListAccess(Variable(var_name), index))
+            else:
+                targets.append(Variable(var_name))
+
+        self.eat(TokenType.EQUALS)
+        values = [self.parse_expression()]
+        while self.current_token.type == TokenType.COMMA:
+            self.eat(TokenType.COMMA)
+            values.append(self.parse_expression())
+
+        if len(targets) != len(values):
+            raise SyntaxError(f"Cannot assign {len(values)} values to {len(targets)} targets")
+        return ParallelAssignment(targets, values)
+
+    def parse_statement(self):
+        """Parse a single statement; a simple statement must end its line."""
+        token_type = self.current_token.type
+        rule = self.statement_rules.get(token_type)
+        if rule is None:
+            raise SyntaxError(f"Invalid statement: {self.current_token}")
+        statement = rule()
+        if token_type not in COMPOUND_STATEMENTS:
+            self.eat(TokenType.NEWLINE)
+        return statement
+
+    def parse_assignment_or_call(self):
+        """Parse a statement starting with an identifier: an assignment or a call."""
+        var_name = self.current_token.value
+        self.eat(TokenType.IDENTIFIER)
+        
+        # Check for function call
+        if self.current_token.type == TokenType.LPAREN:
+            return self.parse_function_call(var_name)
+
+        if self.current_token.type == TokenType.DOT:
+            return self.parse_method_call(Variable(var_name))
+        
+        # Check for list assignment
+        if self.current_token.type == TokenType.LBRACKET:
+            self.eat(TokenType.LBRACKET)
+            index = self.parse_expression()
+            self.eat(TokenType.RBRACKET)
             
-            # Check for augmented assignment
-            if self.current_token.type in (TokenType.PLUS_EQUALS, TokenType.MINUS_EQUALS, 
-                                         TokenType.MULTIPLY_EQUALS, TokenType.DIVIDE_EQUALS,
-                                         TokenType.MODULO_EQUALS):
-                operator = self.current_token.value
-                self.eat(self.current_token.type)
-                value = self.parse_expression()
-                # Convert augmented assignment to regular assignment with binary operation
-                op_map = {
-                    '+=': '+',
-                    '-=': '-',
-                    '*=': '*',
-                    '/=': '/',
-                    '%=': '%'
-                }
-                binary_op = BinaryOp(Variable(var_name), op_map[operator], value)
-                return Assignment(Variable(var_name), binary_op)
+            # Check for tuple unpacking
+            if self.current_token.type == TokenType.COMMA:
+                return self.parse_multiple_assignment(ListAccess(Variable(var_name), index))
             
-            # Regular assignment
-            if self.current_token.type == TokenType.EQUALS:
-                self.eat(TokenType.EQUALS)
-                expression = self.parse_expression()
-                return Assignment(Variable(var_name), expression)
-            else:
-                # If no equals sign, treat as an expression
-                return Variable(var_name)
-        elif self.current_token.type in (TokenType.PLUS, TokenType.MINUS, TokenType.STRING, TokenType.NUMBER, TokenType.FLOAT, TokenType.TRUE, TokenType.FALSE):
-            # Handle expressions that start with operators or literals
-            return self.parse_expression()
+            # Regular list assignment
+            self.eat(TokenType.EQUALS)
+            value = self.parse_expression()
+            return ListAssignment(Variable(var_name), index, value)
+        
+        if self.current_token.type == TokenType.COMMA:
+            return self.parse_multiple_assignment(Variable(var_name))
+
+        # Check for augmented assignment
+        operator = AUGMENTED_OPERATORS.get(self.current_token.type)
+        if operator is not None:
+            self.eat(self.current_token.type)
+            value = self.parse_expression()
+            # Convert augmented assignment to regular assignment with binary operation
+            binary_op = BinaryOp(Variable(var_name), operator, value)
+            return Assignment(Variable(var_name), binary_op)
+        
+        # Regular assignment
+        if self.current_token.type == TokenType.EQUALS:
+            self.eat(TokenType.EQUALS)
+            expression = self.parse_expression()
+            return Assignment(Variable(var_name), expression)
         else:
-            raise SyntaxError(f"Invalid statement: {self.current_token}")
+            # If no equals sign, treat as an expression
+            return Variable(var_name)
 
     def parse_if(self):
         """Parse an if statement."""
         self.eat(TokenType.IF)
-        condition = self.parse_logical()
+        condition = self.parse_expression()
         self.eat(TokenType.COLON)
         body = self.parse_block()
         
@@ -343,7 +291,7 @@ class Parser:
     def parse_while(self):
         """Parse a while loop."""
         self.eat(TokenType.WHILE)
-        condition = self.parse_logical()
+        condition = self.parse_expression()
         self.eat(TokenType.COLON)
         body = self.parse_block()
         return WhileLoop(condition, body)
@@ -354,8 +302,14 @@ class Parser:
         var_name = self.current_token.value
         self.eat(TokenType.IDENTIFIER)
         self.eat(TokenType.IN)
+        iterable = self.parse_iterable()
+        self.eat(TokenType.COLON)
+        body = self.parse_block()
         
-        # Handle range() function
+        return ForLoop(var_name, iterable, body)
+
+    def parse_iterable(self):
+        """Parse what a for loop or comprehension iterates over: a range() call or an expression."""
         if self.current_token.type == TokenType.RANGE:
             self.eat(TokenType.RANGE)
             self.eat(TokenType.LPAREN)
@@ -380,14 +334,8 @@ class Parser:
                 step = None
             
             self.eat(TokenType.RPAREN)
-            iterable = RangeCall(start, end, step)
-        else:
-            iterable = self.parse_expression()
-        
-        self.eat(TokenType.COLON)
-        body = self.parse_block()
-        
-        return ForLoop(var_name, iterable, body)
+            return RangeCall(start, end, step)
+        return self.parse_expression()
 
     def parse_function_def(self):
         """Parse a function definition."""
@@ -422,47 +370,110 @@ class Parser:
         self.eat(TokenType.LPAREN)
         expressions = []
         
-        # Parse first expression
-        expressions.append(self.parse_expression())
-        
-        # Parse additional expressions separated by commas
-        while self.current_token.type == TokenType.COMMA:
-            self.eat(TokenType.COMMA)
+        if self.current_token.type != TokenType.RPAREN:
+            # Parse first expression
             expressions.append(self.parse_expression())
+            
+            # Parse additional expressions separated by commas
+            while self.current_token.type == TokenType.COMMA:
+                self.eat(TokenType.COMMA)
+                expressions.append(self.parse_expression())
         
         self.eat(TokenType.RPAREN)
         return Print(expressions)
 
     def parse_block(self):
-        """Parse a block of statements."""
+        """Parse the block after a colon: an indented suite, or a simple statement on the same line."""
+        if self.current_token.type != TokenType.NEWLINE:
+            return [self.parse_statement()]
+        self.eat(TokenType.NEWLINE)
+        self.eat(TokenType.INDENT)
         statements = []
-        while self.current_token and self.current_token.type not in (TokenType.EOF, TokenType.ELSE):
-            # Only parse statements, not function definitions, in blocks
+        while self.current_token.type != TokenType.DEDENT:
             if self.current_token.type == TokenType.DEF:
-                # Skip nested function definitions (treat as top-level only)
-                break
+                raise SyntaxError(f"Nested function definitions are not supported (line {self.current_token.line})")
             statements.append(self.parse_statement())
+        self.eat(TokenType.DEDENT)
         return statements
 
-    def parse_logical(self):
-        """Parse logical operators (and, or)."""
-        print(f"Parsing logical at token: {self.current_token}")
-        left = self.parse_comparison()
-
-        while self.current_token and self.current_token.type in (TokenType.AND, TokenType.OR):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            right = self.parse_comparison()
-            left = BinaryOp(left, operator, right)
-
-        return left
-
     def parse(self):
         """Parse multiple statements into an AST list."""
         statements = []
         while self.current_token and self.current_token.type != TokenType.EOF:
-            if self.current_token.type == TokenType.DEF:
-                statements.append(self.parse_function_def())
-            else:
-                statements.append(self.parse_statement())
+            statements.append(self.parse_statement())
         return Program(statements)
+
+# Binding power of each binary operator; higher binds tighter.
+BINARY_PRECEDENCE = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.GREATER: 4,
+    TokenType.LESS: 4,
+    TokenType.GREATER_EQUALS: 4,
+    TokenType.LESS_EQUALS: 4,
+    TokenType.EQUALS_EQUALS: 4,
+    TokenType.NOT_EQUALS: 4,
+    TokenType.PLUS: 5,
+    TokenType.MINUS: 5,
+    TokenType.MULTIPLY: 6,
+    TokenType.DIVIDE: 6,
+    TokenType.FLOOR_DIVIDE: 6,
+    TokenType.MODULO: 6,
+}
+
+# Binding power of the operand of each prefix operator.
+PREFIX_PRECEDENCE = {
+    TokenType.NOT: 3,
+    TokenType.PLUS: 7,
+    TokenType.MINUS: 7,
+}
+
+# Rule that parses an expression starting with each token type.
+PREFIX_RULES = {
+    TokenType.NUMBER: 'parse_literal',
+    TokenType.FLOAT: 'parse_literal',
+    TokenType.STRING: 'parse_literal',
+    TokenType.TRUE: 'parse_literal',
+    TokenType.FALSE: 'parse_literal',
+    TokenType.IDENTIFIER: 'parse_name',
+    TokenType.LPAREN: 'parse_group',
+    TokenType.LBRACKET: 'parse_list',
+    TokenType.PLUS: 'parse_unary',
+    TokenType.MINUS: 'parse_unary',
+    TokenType.NOT: 'parse_unary',
+}
+
+# Statements that end with a block rather than a NEWLINE.
+COMPOUND_STATEMENTS = {TokenType.IF, TokenType.WHILE, TokenType.FOR, TokenType.DEF}
+
+# Rule that parses a statement starting with each token type.
+STATEMENT_RULES = {
+    TokenType.IF: 'parse_if',
+    TokenType.WHILE: 'parse_while',
+    TokenType.FOR: 'parse_for',
+    TokenType.DEF: 'parse_function_def',
+    TokenType.RETURN: 'parse_return',
+    TokenType.PRINT: 'parse_print',
+    TokenType.IDENTIFIER: 'parse_assignment_or_call',
+    # Expressions that start with operators or literals
+    TokenType.PLUS: 'parse_expression',
+    TokenType.MINUS: 'parse_expression',
+    TokenType.STRING: 'parse_expression',
+    TokenType.NUMBER: 'parse_expression',
+    TokenType.FLOAT: 'parse_expression',
+    TokenType.TRUE: 'parse_expression',
+    TokenType.FALSE: 'parse_expression',
+}
+
+# Binary operator behind each augmented assignment.
+AUGMENTED_OPERATORS = {
+    TokenType.PLUS_EQUALS: '+',
+    TokenType.MINUS_EQUALS: '-',
+    TokenType.MULTIPLY_EQUALS: '*',
+    TokenType.DIVIDE_EQUALS: '/',
+    TokenType.FLOOR_DIVIDE_EQUALS: '//',
+    TokenType.MODULO_EQUALS: '%',
+}
+
+# Grammar rule methods instrumented when a tracer is attached.
+GRAMMAR_RULES = tuple(name for name in vars(Parser) if name.startswith('parse_'))
@@ -0,0 +1,178 @@
+"""Structural patterns over AST nodes, shared by the passes that rewrite or lower them."""
+from ast_nodes import (
+    Assignment, BinaryOp, FunctionCall, IfStatement, ListAccess, ListAssignment, Node, Number, UnaryOp, Variable
+)
+from visitor import walk
+
+def same_expression(a, b):
+    """True if `a` and `b` are structurally identical expressions."""
+    if type(a) is not type(b):
+        return False
+    if not isinstance(a, Node):
+        return a == b
+    for name in type(a).__slots__:
+        x, y = getattr(a, name), getattr(b, name)
+        if isinstance(x, list):
+            if not isinstance(y, list) or len(x) != len(y) or not all(map(same_expression, x, y)):
+                return False
+        elif not same_expression(x, y):
+            return False
+    return True
+
+def reads_target(expr, target):
+    """True if storing to `target` may change the value of `expr`."""
+    for node in walk(expr):
+        if isinstance(target, Variable) and isinstance(node, Variable) and node.name == target.name:
+            return True
+        if isinstance(target, ListAccess) and isinstance(node, ListAccess):
+            return True
+    return False
+
+def target_reads(target, other):
+    """True if locating `target` (its list and index) reads something stored to by `other`."""
+    if isinstance(target, ListAccess):
+        return reads_target(target.list_expr, other) or reads_target(target.index, other)
+    return False
+
+def replace_variable(expr, name, replacement):
+    """Copy of `expr` with every read of the variable `name` replaced by `replacement`."""
+    if isinstance(expr, Variable) and expr.name == name:
+        return replacement
+    if not isinstance(expr, Node):
+        return expr
+    copy = object.__new__(type(expr))
+    for slot in type(expr).__slots__:
+        value = getattr(expr, slot)
+        if isinstance(value, list):
+            value = [replace_variable(item, name, replacement) for item in value]
+        else:
+            value = replace_variable(value, name, replacement)
+        setattr(copy, slot, value)
+    return copy
+
+def index_offset(index):
+    """Split an index into (base expression or None, constant offset): 'i + 1' -> (i, 1)."""
+    if isinstance(index, Number):
+        return None, index.value
+    if isinstance(index, BinaryOp) and index.op in ('+', '-') and isinstance(index.right, Number):
+        return index.left, index.right.value if index.op == '+' else -index.right.value
+    return index, 0
+
+def may_alias(a, b):
+    """True if the targets `a` and `b` may name the same storage."""
+    if isinstance(a, Variable) and isinstance(b, Variable):
+        return a.name == b.name
+    if isinstance(a, ListAccess) and isinstance(b, ListAccess):
+        # Two list names may refer to the same list, so only offsets from a
+        # common base within one list are known to differ.
+        if not same_expression(a.list_expr, b.list_expr):
+            return True
+        (base_a, offset_a), (base_b, offset_b) = index_offset(a.index), index_offset(b.index)
+        return offset_a == offset_b or not same_expression(base_a, base_b)
+    return False
+
+def conflicts(a, b):
+    """True if the order of storing to targets `a` and `b` matters."""
+    return may_alias(a, b) or target_reads(a, b) or target_reads(b, a)
+
+def has_call(expr):
+    return any(isinstance(node, FunctionCall) for node in walk(expr))
+
+def match_swap(targets, values):
+    """Return (a, b) if `targets = values` is the swap 'a, b = b, a', else None.
+
+    Python locates `b` only after storing to `a`, so it is not a swap when
+    `b` depends on `a` (as in 'i, arr[i] = arr[i], i').
+    """
+    if len(targets) != 2 or len(values) != 2:
+        return None
+    a, b = targets
+    if (same_expression(a, values[1]) and same_expression(b, values[0])
+            and not same_expression(a, b) and not target_reads(b, a)):
+        return a, b
+    return None
+
+def match_permutation(targets, values):
+    """Return p with values[i] == targets[p[i]] if `targets = values` permutes its targets, else None.
+
+    The targets must be pairwise distinct and independent: Python stores
+    them left to right, so with aliased or interdependent targets the
+    result is not a permutation of the old values.
+    """
+    if len(targets) != len(values) or len(targets) < 2:
+        return None
+    permutation = []
+    for value in values:
+        source = next((j for j, target in enumerate(targets) if same_expression(value, target)), None)
+        if source is None or source in permutation:
+            return None
+        permutation.append(source)
+    for i, a in enumerate(targets):
+        if any(conflicts(a, b) for b in targets[i + 1:]):
+            return None
+    return permutation
+
+def permutation_cycles(permutation):
+    """The cycles of `permutation` longer than one, each as a list of positions."""
+    seen = set()
+    cycles = []
+    for start in range(len(permutation)):
+        cycle = []
+        position = start
+        while position not in seen:
+            seen.add(position)
+            cycle.append(position)
+            position = permutation[position]
+        if len(cycle) > 1:
+            cycles.append(cycle)
+    return cycles
+
+# Builtins a loop body may call without giving up its independent iterations.
+PURE_CALLS = {'len', 'abs', 'min', 'max'}
+
+def constant_value(expr):
+    """The value of an integer literal, possibly negated, or None."""
+    if isinstance(expr, Number):
+        return expr.value
+    if isinstance(expr, UnaryOp) and expr.operator == '-' and isinstance(expr.operand, Number):
+        return -expr.operand.value
+    return None
+
+def independent_iterations(var_name, body):
+    """The lists stored to by a loop over `var_name` whose iterations touch disjoint elements, else None.
+
+    The body may only assign locals (not the loop variable), store to
+    `list[var_name]` and branch; every element it reads must also be at
+    index `var_name`, since any two list names may refer to the same list.
+    Each iteration then only reads and writes its own elements. Returns None
+    as well when nothing is stored, as there is nothing to mark.
+    """
+    stored = []
+    statements = list(body)
+    while statements:
+        statement = statements.pop()
+        if isinstance(statement, IfStatement):
+            expressions = [statement.condition]
+            statements.extend(statement.body)
+            statements.extend(statement.else_body or [])
+        elif isinstance(statement, Assignment):
+            if not isinstance(statement.name, Variable) or statement.name.name == var_name:
+                return None
+            expressions = [statement.value]
+        elif isinstance(statement, ListAssignment):
+            if not isinstance(statement.list_expr, Variable) or not is_variable(statement.index, var_name):
+                return None
+            stored.append(statement.list_expr)
+            expressions = [statement.value]
+        else:
+            return None
+        for expr in expressions:
+            for node in walk(expr):
+                if isinstance(node, ListAccess) and not is_variable(node.index, var_name):
+                    return None
+                if isinstance(node, FunctionCall) and node.name not in PURE_CALLS:
+                    return None
+    return stored or None
+
+def is_variable(expr, name):
+    return isinstance(expr, Variable) and expr.name == name
@@ -0,0 +1,846 @@
+"""Integer range analysis: which int operations may use native C++ arithmetic.
+
+Every int variable, parameter, return value and list element is a C++ int,
+so it always holds a value in INT32. Within one expression, intermediate
+results may also be computed in long long. The analysis interprets each
+function over intervals of exact Python ints, following assignments, the
+conditions of if and while, and range() loops. That tells the code
+generator, for every int operation, whether its result:
+
+- provably fits its C++ type (native arithmetic);
+- only fits a long long while it stays inside the expression (wide);
+- has to be checked for overflow, which stands in for Python's unbounded
+  ints.
+
+For % and // it also tells whether the operands are provably
+non-negative. In that case C++ truncation agrees with Python's flooring.
+
+What a function receives is bounded by ProgramRanges. That pass covers
+the whole program and records every value its parameters are passed, its
+results return and its lists are given.
+"""
+from ast_nodes import (
+    Assignment, BinaryOp, Boolean, ForLoop, FunctionCall, FunctionDef, IfStatement, LenCall,
+    List, ListAccess, ListAssignment, ListComprehension, MethodCall, Number, ParallelAssignment, Print, RangeCall, Return,
+    UnaryOp, Variable, WhileLoop
+)
+from patterns import constant_value
+from type_inference import BOOL, INT, ListType, element_type, module_function
+from visitor import iter_child_nodes
+
+# Values of a C++ int, and of the long long used inside expressions.
+INT32 = (-2**31, 2**31 - 1)
+INT64 = (-2**63, 2**63 - 1)
+BOOL_RANGE = (0, 1)
+# Beyond any C++ integer: the result of an operation nothing is known about.
+UNBOUNDED = (-2**127, 2**127)
+
+# Times a fact or loop may grow exactly before bounds that keep moving are widened to INT32,
+# and passes that then tighten them again (a bounded % after widening, for instance).
+WIDEN_AFTER = 3
+NARROW_PASSES = 2
+
+# How the code generator lowers an int operation (see IntegerRanges.lowering).
+NATIVE = 'native'
+WIDE = 'wide'
+CHECKED = 'checked'
+NARROW = 'narrow'
+
+# Operators whose int result can overflow, and the ones whose operands may be long long.
+OVERFLOWING = {'+', '-', '*', '<<'}
+COMPARISONS = {'<', '>', '<=', '>=', '==', '!='}
+WIDE_OPERANDS = OVERFLOWING | COMPARISONS | {'%', '//', '>>', '&'}
+
+# Builtins whose int result follows from their arguments.
+INTERVAL_BUILTINS = {'len', 'abs', 'min', 'max'}
+
+# Most terms a sum() adds up: a list holds fewer than 2**31 elements, a range() of ints
+# fewer than 2**32. Summing ints in a long long therefore never overflows.
+SUM_TERMS = 2**32 - 1
+
+# `not (a op b)` as `a op' b`, and `a op b` as `b op' a`.
+NEGATED = {'<': '>=', '>=': '<', '>': '<=', '<=': '>', '==': '!=', '!=': '=='}
+MIRRORED = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '==': '==', '!=': '!='}
+
+def hull(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), max(a[1], b[1]))
+
+def within(interval, bounds):
+    return interval is not None and bounds[0] <= interval[0] and interval[1] <= bounds[1]
+
+def clamp(interval):
+    """The values of `interval` a C++ int can hold: stored values are checked to fit."""
+    if interval is None:
+        return INT32
+    lo, hi = max(interval[0], INT32[0]), min(interval[1], INT32[1])
+    return (lo, hi) if lo <= hi else INT32
+
+def widened(old, new):
+    """`new`, with each bound that moved since `old` pushed to the end of INT32."""
+    if old is None:
+        return new
+    return (INT32[0] if new[0] < old[0] else new[0], INT32[1] if new[1] > old[1] else new[1])
+
+def corners(function, a, b):
+    values = [function(x, y) for x in a for y in b]
+    return (min(values), max(values))
+
+def floor_divide(a, b):
+    """Interval of a // b over the non-zero divisors in `b`, or None if b can only be zero."""
+    result = None
+    if b[0] <= -1:
+        result = hull(result, corners(lambda x, y: x // y, a, (b[0], min(b[1], -1))))
+    if b[1] >= 1:
+        result = hull(result, corners(lambda x, y: x // y, a, (max(b[0], 1), b[1])))
+    return result
+
+def modulo(a, b):
+    """Interval of Python's a % b, which takes the sign of the divisor."""
+    if b[0] > 0:
+        return (0, min(a[1], b[1] - 1)) if a[0] >= 0 else (0, b[1] - 1)
+    if b[1] < 0:
+        return (max(a[0], b[0] + 1), 0) if a[1] <= 0 else (b[0] + 1, 0)
+    return (min(b[0] + 1, 0), max(b[1] - 1, 0))
+
+def bitwise_and(a, b):
+    nonnegative = [x[1] for x in (a, b) if x[0] >= 0]
+    if nonnegative:
+        return (0, min(nonnegative))
+    bits = max(abs(a[0]), abs(b[0])).bit_length()
+    return (-2**bits, max(a[1], b[1], 0))
+
+def shift_right(a, b):
+    if b[0] == b[1] and b[0] >= 0:
+        return (a[0] >> b[0], a[1] >> b[0])
+    return (min(a[0], 0), max(a[1], 0))
+
+def binary_interval(op, a, b):
+    """Interval of `a op b` for int operands, with Python semantics (None if unknown)."""
+    if op == '+':
+        return (a[0] + b[0], a[1] + b[1])
+    if op == '-':
+        return (a[0] - b[1], a[1] - b[0])
+    if op == '*':
+        return corners(lambda x, y: x * y, a, b)
+    if op == '<<':
+        if b[0] == b[1] and 0 <= b[0] < 64:
+            return (a[0] << b[0], a[1] << b[0])
+        return UNBOUNDED
+    if op == '>>':
+        return shift_right(a, b)
+    if op == '&':
+        return bitwise_and(a, b)
+    if op == '%':
+        return modulo(a, b)
+    if op == '//':
+        return floor_divide(a, b)
+    return None
+
+def builtin_interval(name, args):
+    """Interval of the int result of the builtin `name`, given its argument intervals."""
+    if name == 'len':
+        return (0, INT32[1])
+    if not args or None in args:
+        return None
+    if name == 'abs':
+        lo, hi = args[0]
+        return (0 if lo <= 0 <= hi else min(abs(lo), abs(hi)), max(abs(lo), abs(hi)))
+    if name == 'min':
+        return (min(a[0] for a in args), min(a[1] for a in args))
+    if name == 'max':
+        return (max(a[0] for a in args), max(a[1] for a in args))
+    return None
+
+def sum_interval(elements, stored=True):
+    """Interval of sum() over terms in the interval `elements`; within INT64 if they are `stored` ints.
+
+    The terms of a comprehension summed without building its list are
+    never stored, and may be long longs.
+    """
+    lo, hi = clamp(elements) if stored else elements
+    return (min(lo, 0) * SUM_TERMS, max(hi, 0) * SUM_TERMS)
+
+def loop_values(iterable):
+    """Expression whose values a for loop or comprehension variable takes: a range(), or an element."""
+    return iterable if isinstance(iterable, RangeCall) else ListAccess(iterable, Number(0))
+
+def range_interval(start, end, step):
+    """Interval of the values of a range() loop variable, given the intervals of its bounds."""
+    start, end = clamp(start), clamp(end)
+    if step is not None and step > 0:
+        return (start[0], max(start[0], end[1] - 1))
+    if step is not None and step < 0:
+        return (min(start[1], end[0] + 1), start[1])
+    return hull(start, end)
+
+def constrain(x, op, y):
+    """Narrow the interval `x` of a variable known to satisfy `x op y`."""
+    lo, hi = x
+    if op == '<':
+        hi = min(hi, y[1] - 1)
+    elif op == '<=':
+        hi = min(hi, y[1])
+    elif op == '>':
+        lo = max(lo, y[0] + 1)
+    elif op == '>=':
+        lo = max(lo, y[0])
+    elif op == '==':
+        lo, hi = max(lo, y[0]), min(hi, y[1])
+    # An empty result means the branch never runs; the interval is left as it was.
+    return (lo, hi) if lo <= hi else x
+
+def join(a, b):
+    """Environment after either of two paths; a name bound on one path only keeps that binding."""
+    result = dict(a)
+    for key, interval in b.items():
+        result[key] = hull(result.get(key), interval)
+    return result
+
+def widen(old, new):
+    return {key: widened(old.get(key), interval) for key, interval in new.items()}
+
+def walk_body(statements):
+    """Yield each node below `statements` with the comprehensions whose variables are bound there."""
+    stack = [(statement, ()) for statement in reversed(statements)]
+    while stack:
+        node, scopes = stack.pop()
+        if isinstance(node, list):
+            # A statement an optimizer pass replaced with several is a nested list.
+            stack.extend((statement, scopes) for statement in reversed(node))
+            continue
+        yield node, scopes
+        if isinstance(node, ListComprehension):
+            inner = scopes + (node,)
+            stack.append((node.iterable, scopes))
+            stack.extend((part, inner) for part in (node.element, node.condition) if part is not None)
+        else:
+            stack.extend((child, scopes) for child in iter_child_nodes(node))
+
+class ProgramRanges:
+    """Flow-insensitive intervals for what crosses function boundaries.
+
+    A fact is kept for every int parameter and local, for every function
+    result, and for the elements of every list type. Lists that may alias
+    share an element TypeCell, so they share one fact. Each fact is the hull
+    of all values the program assigns, passes, returns or stores there; a
+    function nothing calls may be passed any int. RangeAnalyzer starts from
+    these and refines them along one function's control flow.
+    """
+
+    def __init__(self, program, types):
+        self.types = types
+        self.facts = {}
+        # fact key -> [(function, expression whose values the fact includes, comprehensions it is inside)]
+        self.constraints = {}
+        # fact key -> interval of the int constants it includes (list literals can be long)
+        self.constants = {}
+        functions = [stmt for stmt in program.statements if isinstance(stmt, FunctionDef)]
+        module = module_function(program)
+        if module.body:
+            functions.append(module)
+        called = set()
+        for func in functions:
+            self.collect(func, called)
+        for func in functions:
+            if func.name not in called:
+                for param in func.params:
+                    if types.local_type(func.name, param) is INT:
+                        self.facts[('local', func.name, param)] = INT32
+        self.solve()
+
+    def collect(self, func, called):
+        for node, scopes in walk_body(func.body):
+            if scopes:
+                with self.types.inside(func.name, *scopes):
+                    self.collect_node(func.name, node, called)
+            else:
+                self.collect_node(func.name, node, called)
+
+    def collect_node(self, function, node, called):
+        types = self.types
+        if isinstance(node, Assignment):
+            name = node.name.name if isinstance(node.name, Variable) else node.name
+            self.add_local(function, name, node.value)
+        elif isinstance(node, ParallelAssignment):
+            for target, value in zip(node.targets, node.values):
+                if isinstance(target, Variable):
+                    self.add_local(function, target.name, value)
+                else:
+                    self.add_element(function, target.list_expr, value)
+        elif isinstance(node, ListAssignment):
+            self.add_element(function, node.list_expr, node.value)
+        elif isinstance(node, MethodCall) and node.method == 'append' and len(node.args) == 1:
+            self.add_element(function, node.obj, node.args[0])
+        elif isinstance(node, List) and node.elements:
+            key = self.element_key(function, node)
+            if key is None:
+                return
+            for element in node.elements:
+                value = constant_value(element)
+                if type(value) is int:
+                    self.constants[key] = hull(self.constants.get(key), clamp((value, value)))
+                    self.constraints.setdefault(key, [])
+                else:
+                    self.constrain(key, function, element)
+        elif isinstance(node, FunctionCall) and node.name in types.functions:
+            called.add(node.name)
+            callee = types.functions[node.name]
+            for param, arg in zip(callee.params, node.args):
+                if callee.cells[param].find().type is INT:
+                    self.constrain(('local', node.name, param), function, arg)
+        elif isinstance(node, Return) and node.value is not None:
+            if types.functions[function].result.find().type is INT:
+                self.constrain(('result', function), function, node.value)
+        elif isinstance(node, ForLoop):
+            self.add_local(function, node.var_name, loop_values(node.iterable))
+        elif isinstance(node, ListComprehension):
+            if types.functions[function].scope_cell(node).find().type is INT:
+                self.constrain(('scope', node.scope), function, loop_values(node.iterable))
+            key = self.element_key(function, node)
+            if key is not None:
+                with types.inside(function, node):
+                    self.constrain(key, function, node.element)
+
+    def add_local(self, function, name, value):
+        """`value` may be stored in the local `name` of `function`."""
+        if self.types.local_type(function, name) is INT:
+            self.constrain(self.local_key(function, name), function, value)
+
+    def add_element(self, function, list_expr, value):
+        key = self.element_key(function, list_expr)
+        if key is not None:
+            self.constrain(key, function, value)
+
+    def constrain(self, key, function, value):
+        """`value`, evaluated in `function` inside the comprehensions being looked at, is included in `key`."""
+        scopes = tuple(self.types.functions[function].scopes)
+        self.constraints.setdefault(key, []).append((function, value, scopes))
+
+    def local_key(self, function, name):
+        """Fact for the int local `name` of `function`, or for the comprehension variable it names."""
+        types = self.types.functions.get(function)
+        for comprehension in reversed(types.scopes if types is not None else ()):
+            if comprehension.var_name == name:
+                return ('scope', comprehension.scope)
+        return ('local', function, name)
+
+    def element_key(self, function, list_expr):
+        """Fact for the elements of the list `list_expr`, or None if they are not ints."""
+        list_type = self.types.expr_type(function, list_expr)
+        if isinstance(list_type, ListType) and element_type(list_type) is INT:
+            return ('elements', list_type.element.find())
+        return None
+
+    def solve(self):
+        changes = dict.fromkeys(self.constraints, 0)
+        changed = True
+        while changed:
+            changed = False
+            for key in self.constraints:
+                old = self.facts.get(key)
+                new = hull(old, self.gather(key))
+                if new != old:
+                    changes[key] += 1
+                    self.facts[key] = widened(old, new) if changes[key] > WIDEN_AFTER else new
+                    changed = True
+        for _ in range(NARROW_PASSES):
+            for key in self.constraints:
+                self.facts[key] = self.gather(key)
+
+    def gather(self, key):
+        """Hull of the values the constraints on `key` give under the facts so far."""
+        result = self.constants.get(key)
+        for function, expr, scopes in self.constraints[key]:
+            if scopes:
+                with self.types.inside(function, *scopes):
+                    value = self.evaluate(function, expr)
+            else:
+                value = self.evaluate(function, expr)
+            if value is not None:
+                result = hull(result, clamp(value))
+        return result
+
+    def evaluate(self, function, expr):
+        """Interval of `expr` in `function` under the facts so far (None: no int value yet)."""
+        if isinstance(expr, Number):
+            return (expr.value, expr.value)
+        if isinstance(expr, Boolean):
+            return (int(expr.value),) * 2
+        if isinstance(expr, Variable):
+            if self.types.local_type(function, expr.name) is BOOL:
+                return BOOL_RANGE
+            return self.facts.get(self.local_key(function, expr.name))
+        if isinstance(expr, BinaryOp):
+            left = self.evaluate(function, expr.left)
+            right = self.evaluate(function, expr.right)
+            if expr.op in COMPARISONS:
+                return BOOL_RANGE
+            if left is None or right is None:
+                return None
+            if expr.op in ('and', 'or'):
+                return hull(left, right)
+            return binary_interval(expr.op, left, right) or INT32
+        if isinstance(expr, UnaryOp):
+            if expr.operator == 'not':
+                return BOOL_RANGE
+            operand = self.evaluate(function, expr.operand)
+            if operand is None or expr.operator != '-':
+                return operand
+            return (-operand[1], -operand[0])
+        if isinstance(expr, ListAccess):
+            key = self.element_key(function, expr.list_expr)
+            return self.facts.get(key) if key is not None else self.unknown(function, expr)
+        if isinstance(expr, LenCall):
+            return (0, INT32[1])
+        if isinstance(expr, FunctionCall):
+            if expr.name in self.types.functions:
+                return self.facts.get(('result', expr.name))
+            if expr.name == 'sum' and self.types.expr_type(function, expr) is INT:
+                list_type = self.types.expr_type(function, expr.args[0])
+                elements = self.elements(list_type) if isinstance(list_type, ListType) else None
+                return sum_interval(elements) if elements is not None else INT32
+            if expr.name in INTERVAL_BUILTINS:
+                interval = builtin_interval(expr.name, [self.evaluate(function, arg) for arg in expr.args])
+                if interval is not None:
+                    return interval
+            return self.unknown(function, expr)
+        if isinstance(expr, RangeCall):
+            start = self.evaluate(function, expr.start)
+            end = self.evaluate(function, expr.end)
+            if start is None or end is None:
+                return None
+            return range_interval(start, end, 1 if expr.step is None else constant_value(expr.step))
+        return self.unknown(function, expr)
+
+    def unknown(self, function, expr):
+        expr_type = self.types.expr_type(function, expr)
+        return INT32 if expr_type is INT else BOOL_RANGE if expr_type is BOOL else None
+
+    def local(self, function, name):
+        """Interval of every value the int local or parameter `name` of `function` holds."""
+        return self.facts.get(self.local_key(function, name)) or INT32
+
+    def result(self, function):
+        return self.facts.get(('result', function)) or INT32
+
+    def elements(self, list_type):
+        """Interval of the elements of lists of the ListType `list_type` (None unless ints)."""
+        if element_type(list_type) is BOOL:
+            return BOOL_RANGE
+        if element_type(list_type) is not INT:
+            return None
+        return self.facts.get(('elements', list_type.element.find())) or INT32
+
+    def inputs(self, function):
+        """The facts the code generated for `function` may use, for comparison between runs."""
+        types = self.types.functions[function]
+        described = [(name, self.describe(types.type_of(name), ('local', function, name)))
+                     for name in sorted(types.cells)]
+        described.extend(('comprehension', self.describe(cell.find().type, ('scope', scope)))
+                         for scope, cell in types.scoped.items())
+        for callee in sorted(types.callees):
+            callee_types = self.types.functions.get(callee)
+            if callee_types is not None:
+                described.append((callee, self.describe(callee_types.result.find().type, ('result', callee))))
+        return tuple(described)
+
+    def describe(self, t, key):
+        if isinstance(t, ListType):
+            return ('list', self.facts.get(('elements', t.element.find())), self.describe(element_type(t), None))
+        return self.facts.get(key) if t is INT else None
+
+class UnknownInputs:
+    """Stands in for ProgramRanges when nothing may be assumed about what a function is passed.
+
+    Parameters, other locals, function results and list elements can then
+    hold any value of their C++ type.
+    """
+
+    def local(self, function, name):
+        return INT32
+
+    def result(self, function):
+        return INT32
+
+    def elements(self, list_type):
+        if element_type(list_type) is BOOL:
+            return BOOL_RANGE
+        return INT32 if element_type(list_type) is INT else None
+
+class IntegerRanges:
+    """What the analysis found for one function's int operations."""
+
+    def __init__(self, nodes, known=True):
+        # node -> [result interval, left operand interval, right operand interval, consumed as long long]
+        self.nodes = nodes
+        # False to ignore the intervals and treat every operation as unknown.
+        self.known = known
+
+    def lowering(self, node):
+        """NATIVE, WIDE, CHECKED or NARROW for an int operation; None if it was not analysed.
+
+        WIDE computes the operation in long long, for a parent that accepts
+        one; CHECKED traps overflow of the result type (see result_ctype);
+        NARROW checks that a result that may exceed INT32 fits before an int
+        receives it.
+        """
+        info = self.nodes.get(node)
+        if info is None:
+            return None
+        interval, _, _, wide = info
+        if not self.known:
+            interval = UNBOUNDED
+        overflowing = isinstance(node, UnaryOp) or isinstance(node, BinaryOp) and node.op in OVERFLOWING
+        if within(interval, INT32):
+            return NATIVE
+        if not overflowing:
+            return NATIVE if wide else NARROW
+        if wide and within(interval, INT64):
+            return WIDE
+        return CHECKED
+
+    def result_ctype(self, node):
+        """C++ type a CHECKED operation must fit: long long inside an expression, else int."""
+        return 'long long' if self.nodes[node][3] else 'int'
+
+    def is_wide(self, node):
+        """True if the C++ value of `node` may be a long long."""
+        lowering = self.lowering(node)
+        return lowering == WIDE or lowering == CHECKED and self.nodes[node][3]
+
+    def floors_natively(self, node):
+        """True if C++ / and % give Python's // and % for this operation: both operands are non-negative."""
+        info = self.nodes.get(node)
+        if info is None or not self.known:
+            return False
+        _, left, right, _ = info
+        return left is not None and right is not None and left[0] >= 0 and right[0] > 0
+
+    def shifts_natively(self, node):
+        """True if C++ << gives Python's << for this operation: the shifted value is non-negative."""
+        info = self.nodes.get(node)
+        if info is None or not self.known:
+            return False
+        left = info[1]
+        return left is not None and left[0] >= 0
+
+class RangeAnalyzer:
+    """Interprets one function over intervals to fill in an IntegerRanges.
+
+    The environment maps each int local assigned so far to its interval.
+    Parameters, locals not in it, function results and list elements take
+    their intervals from the ProgramRanges.
+    """
+
+    def __init__(self, function, types, program):
+        self.function = function
+        self.types = types
+        self.program = program
+        self.nodes = {}
+        # Off while a loop iterates towards its fixpoint; only the final pass is recorded.
+        self.recording = True
+        # loop -> {environment it was entered with: its head}, so that a loop nested in
+        # another is not solved again each time the outer loop passes over the same values.
+        self.heads = {}
+
+    def analyze(self, func):
+        env = {}
+        for param in func.params:
+            if self.types.local_type(self.function, param) is INT:
+                env[param] = self.program.local(self.function, param)
+        self.block(func.body, env)
+        return IntegerRanges(self.nodes)
+
+    def block(self, statements, env):
+        for statement in statements:
+            env = self.statement(statement, env)
+        return env
+
+    def statement(self, statement, env):
+        """Interpret `statement`; return the environment after it."""
+        if isinstance(statement, list):
+            env = self.block(statement, env)
+        elif isinstance(statement, Assignment):
+            name = statement.name.name if isinstance(statement.name, Variable) else statement.name
+            value = self.value(statement.value, env, False)
+            if self.types.local_type(self.function, name) is INT:
+                env = dict(env)
+                env[name] = clamp(value)
+        elif isinstance(statement, ListAssignment):
+            self.value(statement.list_expr, env, False)
+            self.value(statement.index, env, True)
+            self.value(statement.value, env, False)
+        elif isinstance(statement, ParallelAssignment):
+            values = [self.value(value, env, False) for value in statement.values]
+            env = dict(env)
+            for target, value in zip(statement.targets, values):
+                if isinstance(target, Variable):
+                    if self.types.local_type(self.function, target.name) is INT:
+                        env[target.name] = clamp(value)
+                else:
+                    self.value(target.index, env, True)
+        elif isinstance(statement, IfStatement):
+            self.value(statement.condition, env, True)
+            then = self.block(statement.body, self.refine(env, statement.condition, True))
+            otherwise = self.block(statement.else_body or [], self.refine(env, statement.condition, False))
+            env = join(then, otherwise)
+        elif isinstance(statement, WhileLoop):
+            env = self.while_loop(statement, env)
+        elif isinstance(statement, ForLoop):
+            env = self.for_loop(statement, env)
+        elif isinstance(statement, Return):
+            if statement.value is not None:
+                self.value(statement.value, env, False)
+        elif isinstance(statement, Print):
+            for expr in statement.expressions:
+                self.value(expr, env, True)
+        elif not isinstance(statement, FunctionDef):
+            self.value(statement, env, False)
+        return env
+
+    def loop_head(self, loop, env, iterate):
+        """Environment at the head of `loop` entered with `env`.
+
+        `iterate(head)` interprets one iteration starting from `head` and
+        returns the environment at its end. The iterations are repeated
+        until the head is stable, widening bounds that keep moving, and then
+        narrowed again. A last iteration from the result is recorded.
+        """
+        heads = self.heads.setdefault(loop, {})
+        key = frozenset(env.items())
+        head = heads.get(key)
+        if head is not None:
+            if self.recording:
+                iterate(head)
+            return head
+        recording, self.recording = self.recording, False
+        head = env
+        iteration = 0
+        while True:
+            # The head only grows: a pass that narrowed it could swing it back and forth.
+            new_head = join(head, join(env, iterate(head)))
+            if iteration >= WIDEN_AFTER:
+                new_head = widen(head, new_head)
+            if new_head == head:
+                break
+            head = new_head
+            iteration += 1
+        for _ in range(NARROW_PASSES):
+            head = join(env, iterate(head))
+        self.recording = recording
+        iterate(head)
+        heads[key] = head
+        return head
+
+    def while_loop(self, loop, env):
+        def iterate(head):
+            self.value(loop.condition, head, True)
+            return self.block(loop.body, self.refine(head, loop.condition, True))
+        return self.refine(self.loop_head(loop, env, iterate), loop.condition, False)
+
+    def for_loop(self, loop, env):
+        var_name = loop.var_name
+        values = self.loop_values(self.types.local_type(self.function, var_name), loop.iterable, env)
+
+        def iterate(head):
+            body_env = dict(head)
+            if values is not None:
+                body_env[var_name] = values
+            return self.block(loop.body, body_env)
+        return self.loop_head(loop, env, iterate)
+
+    def loop_values(self, var_type, iterable, env):
+        """Interval of the values a for loop or comprehension variable of type `var_type` takes (None unless an int)."""
+        if isinstance(iterable, RangeCall):
+            return self.range_values(iterable, env)
+        self.value(iterable, env, False)
+        if var_type is not INT:
+            return None
+        iterable_type = self.types.expr_type(self.function, iterable)
+        values = self.program.elements(iterable_type) if isinstance(iterable_type, ListType) else None
+        return values or INT32
+
+    def comprehension(self, expr, env, wide=False):
+        """Interpret a comprehension, whose variable is bound only inside it; return its element's interval.
+
+        `wide` tells whether each element may be a long long, as when it is
+        added to the total of a sum() rather than stored in a list.
+        """
+        var_type = self.types.functions[self.function].scope_cell(expr).find().type
+        values = self.loop_values(var_type, expr.iterable, env)
+        env = dict(env)
+        env.pop(expr.var_name, None)
+        if values is not None:
+            env[expr.var_name] = values
+        with self.types.inside(self.function, expr):
+            if expr.condition is not None:
+                self.value(expr.condition, env, True)
+                env = self.refine(env, expr.condition, True)
+            return self.value(expr.element, env, wide)
+
+    def range_values(self, loop_range, env):
+        """Interval of the values a range() loop variable takes."""
+        start = self.value(loop_range.start, env, False)
+        end = self.value(loop_range.end, env, False)
+        step = 1
+        if loop_range.step is not None:
+            self.value(loop_range.step, env, False)
+            step = constant_value(loop_range.step)
+        return range_interval(start, end, step)
+
+    def refine(self, env, condition, truth):
+        """The environment in which `condition` evaluated to `truth`."""
+        if isinstance(condition, UnaryOp) and condition.operator == 'not':
+            return self.refine(env, condition.operand, not truth)
+        if not isinstance(condition, BinaryOp):
+            return env
+        op = condition.op
+        if (op == 'and' and truth) or (op == 'or' and not truth):
+            return self.refine(self.refine(env, condition.left, truth), condition.right, truth)
+        if op not in COMPARISONS:
+            return env
+        if not truth:
+            op = NEGATED[op]
+        env = dict(env)
+        for side, other, side_op in ((condition.left, condition.right, op),
+                                     (condition.right, condition.left, MIRRORED[op])):
+            if isinstance(side, Variable) and side.name in env:
+                bound = self.value(other, env, True)
+                if bound is not None:
+                    env[side.name] = constrain(env[side.name], side_op, bound)
+        return env
+
+    def value(self, expr, env, wide):
+        """Interval of the int expression `expr` (None if it is not an int).
+
+        `wide` tells whether the parent accepts a long long operand.
+        """
+        if isinstance(expr, Number):
+            interval = (expr.value, expr.value)
+            if not within(interval, INT32):
+                self.record(expr, interval, None, None, wide)
+            return interval
+        if isinstance(expr, Boolean):
+            return (int(expr.value),) * 2
+        if isinstance(expr, Variable):
+            interval = env.get(expr.name)
+            if interval is None:
+                local = self.types.local_type(self.function, expr.name)
+                if local is INT:
+                    interval = self.program.local(self.function, expr.name)
+                elif local is BOOL:
+                    interval = BOOL_RANGE
+            return interval
+        if isinstance(expr, BinaryOp):
+            return self.binary_value(expr, env, wide)
+        if isinstance(expr, UnaryOp):
+            operand = self.value(expr.operand, env, expr.operator == '-')
+            if expr.operator == 'not':
+                return BOOL_RANGE
+            if operand is None or expr.operator != '-':
+                return operand
+            interval = (-operand[1], -operand[0])
+            self.record(expr, interval, operand, None, wide)
+            return interval
+        if isinstance(expr, ListAccess):
+            self.value(expr.list_expr, env, False)
+            self.value(expr.index, env, True)
+            list_type = self.types.expr_type(self.function, expr.list_expr)
+            if isinstance(list_type, ListType):
+                return self.program.elements(list_type)
+            return self.unknown(expr)
+        if isinstance(expr, LenCall):
+            self.value(expr.arg, env, False)
+            return (0, INT32[1])
+        if isinstance(expr, FunctionCall):
+            interval = self.unknown(expr)
+            if (expr.name == 'sum' and expr.name not in self.types.functions and interval == INT32
+                    and len(expr.args) == 1 and isinstance(expr.args[0], ListComprehension)):
+                # Generated as a loop adding each element to a long long total.
+                elements = self.comprehension(expr.args[0], env, True)
+                interval = sum_interval(elements or INT32, False)
+                self.record(expr, interval, None, None, wide)
+                return interval
+            args = [self.value(arg, env, False) for arg in expr.args]
+            if expr.name in self.types.functions and interval == INT32:
+                return self.program.result(expr.name)
+            if expr.name == 'sum' and interval == INT32:
+                # Generated as a long long total, which may not fit an int.
+                list_type = self.types.expr_type(self.function, expr.args[0])
+                interval = sum_interval(self.program.elements(list_type) or INT32)
+                self.record(expr, interval, None, None, wide)
+                return interval
+            if expr.name in INTERVAL_BUILTINS:
+                return builtin_interval(expr.name, args) or interval
+            return interval
+        if isinstance(expr, List):
+            for element in expr.elements:
+                self.value(element, env, False)
+            return None
+        if isinstance(expr, ListComprehension):
+            self.comprehension(expr, env)
+            return None
+        if isinstance(expr, MethodCall):
+            self.value(expr.obj, env, False)
+            for arg in expr.args:
+                self.value(arg, env, False)
+            return None
+        return self.unknown(expr)
+
+    def binary_value(self, expr, env, wide):
+        op = expr.op
+        operands_wide = op in WIDE_OPERANDS or op == '/'
+        left = self.value(expr.left, env, operands_wide)
+        right = self.value(expr.right, env, operands_wide)
+        if op in COMPARISONS:
+            return BOOL_RANGE
+        # Operands are ints or bools exactly when their intervals are known.
+        if left is None or right is None or op == '/':
+            return None
+        if op in ('and', 'or'):
+            return hull(left, right)
+        interval = binary_interval(op, left, right)
+        if interval is None:
+            # Always divides by zero; leave it to the checked helpers.
+            interval = INT32
+        self.record(expr, interval, left, right, wide)
+        return interval
+
+    def unknown(self, expr):
+        expr_type = self.types.expr_type(self.function, expr)
+        return INT32 if expr_type is INT else BOOL_RANGE if expr_type is BOOL else None
+
+    def record(self, node, interval, left, right, wide):
+        if not self.recording:
+            return
+        info = self.nodes.get(node)
+        if info is None:
+            self.nodes[node] = [interval, left, right, wide]
+        else:
+            info[0] = hull(info[0], interval)
+            info[1] = hull(info[1], left)
+            info[2] = hull(info[2], right)
+
+def analyze_ranges(func, types, program, known=True):
+    """IntegerRanges for the int operations in the body of the FunctionDef `func`.
+
+    `program` is the ProgramRanges of the whole program. With known=False
+    the intervals found are ignored, as if nothing could be proven about any
+    operation.
+    """
+    ranges = RangeAnalyzer(func.name, types, program).analyze(func)
+    ranges.known = known
+    return ranges
+
+def unproven_operations(func, types):
+    """The int operations in `func` that may not fit an int, whatever the rest of the program passes it.
+
+    Unlike analyze_ranges this depends on nothing outside `func`, so the
+    answer for a function stays valid while its callers change.
+    """
+    ranges = RangeAnalyzer(func.name, types, UnknownInputs()).analyze(func)
+    return {node for node in ranges.nodes if ranges.lowering(node) != NATIVE}
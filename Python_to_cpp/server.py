@@ -0,0 +1,243 @@
+"""Serve transpile requests over a Unix socket or localhost TCP.
+
+Usage: python server.py [--socket PATH | --port PORT] [-j WORKERS] [--max-pending N]
+
+The protocol is one JSON object per line in each direction. A request is
+{"id": ..., "source": "<python code>", "optimize": true}; its response is
+{"id": ..., "ok": true, "code": "<c++ code>"} or {"id": ..., "ok": false,
+"error": "..."}. {"id": ..., "op": "stats"} returns the server's counters
+instead. A client may send many requests without waiting for the answers
+(pipelining); they are transpiled concurrently and answered in the order
+they were sent. Lexing, parsing and code generation run in a process pool
+so they never block the event loop; at most --max-pending requests are
+queued for it at a time, and further requests wait to be read.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from lexer import Lexer
+from parser import Parser
+from codegen import CodeGenerator
+from optimizer import optimize
+
+DEFAULT_SOCKET = "/tmp/py2cpp.sock"
+
+# Requests read ahead of the one being answered, per connection.
+PIPELINE_DEPTH = 64
+
+# Latencies kept for the percentiles in the counters.
+LATENCY_WINDOW = 10_000
+
+# Longest request line accepted, in bytes.
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+def transpile_source(source, optimized=True):
+    """Transpile `source` in a worker; return (C++ code or None, error or None)."""
+    try:
+        ast = Parser(Lexer(source).iter_tokens()).parse()
+        if optimized:
+            ast = optimize(ast)
+        return CodeGenerator().generate(ast), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+class Counters:
+    """Throughput and latency counters of a running server."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.connections = 0
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        completed = self.succeeded + self.failed
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+        return {
+            "uptime": uptime,
+            "connections": self.connections,
+            "requests": self.requests,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "requests_per_second": completed / uptime if uptime else 0.0,
+            "latency_ms": {
+                "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                "p50": percentile(0.50),
+                "p99": percentile(0.99),
+                "max": latencies[-1] * 1000 if latencies else 0.0,
+            },
+        }
+
+def response(request_id, code, error, **fields):
+    """The response object for a request."""
+    result = {"id": request_id, "ok": error is None}
+    if error is not None:
+        result["error"] = error
+    elif code is not None:
+        result["code"] = code
+    result.update(fields)
+    return result
+
+def answered(request_id, code, error, **fields):
+    """A future already holding the response, for requests answered without the pool."""
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(response(request_id, code, error, **fields))
+    return future
+
+class TranspileServer:
+    """Answers transpile requests from a bounded process pool."""
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # Bounds the requests submitted to the pool but not yet finished.
+        self.pending = asyncio.Semaphore(max_pending or 4 * self.workers)
+        self.counters = Counters()
+
+    async def handle(self, reader, writer):
+        """Serve one connection: read requests, answer them in order."""
+        self.counters.connections += 1
+        answers = asyncio.Queue(PIPELINE_DEPTH)
+        sender = asyncio.create_task(self.send_answers(answers, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The request was longer than the stream limit.
+                    await answers.put(answered(None, None, "request too long"))
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                self.counters.bytes_in += len(line)
+                await answers.put(await self.dispatch(line))
+        finally:
+            await answers.put(None)
+            await sender
+
+    async def dispatch(self, line):
+        """Start serving one request line; return a future of its response."""
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+        except (ValueError, AttributeError) as e:
+            return answered(None, None, f"bad request: {e}")
+        if request.get("op") == "stats":
+            return answered(request_id, None, None, stats=self.counters.snapshot())
+        source = request.get("source")
+        if not isinstance(source, str):
+            return answered(request_id, None, "bad request: missing source")
+        await self.pending.acquire()
+        self.counters.requests += 1
+        self.counters.in_flight += 1
+        start = time.perf_counter()
+        pool = self.pool
+        job = asyncio.get_running_loop().run_in_executor(
+            pool, transpile_source, source, request.get("optimize", True))
+        # A task, so the pool slot is released even while earlier answers are still being written.
+        return asyncio.create_task(self.finish(request_id, job, start, pool))
+
+    async def finish(self, request_id, job, start, pool):
+        try:
+            code, error = await job
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory); later requests get a fresh pool.
+            code, error = None, f"worker died: {e}"
+            if self.pool is pool:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+                pool.shutdown(wait=False)
+        finally:
+            self.pending.release()
+            self.counters.in_flight -= 1
+        self.counters.latencies.append(time.perf_counter() - start)
+        if error is None:
+            self.counters.succeeded += 1
+        else:
+            self.counters.failed += 1
+        return response(request_id, code, error)
+
+    async def send_answers(self, answers, writer):
+        """Write the responses of one connection in request order as they complete."""
+        try:
+            while (answer := await answers.get()) is not None:
+                data = json.dumps(await answer).encode() + b"\n"
+                self.counters.bytes_out += len(data)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            # The client went away; keep taking answers so the reading side never blocks.
+            while (answer := await answers.get()) is not None:
+                await answer
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+async def serve(server, socket_path=None, port=None):
+    """Listen on `socket_path` (or localhost `port`) until SIGINT or SIGTERM."""
+    if port is not None:
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", port, limit=MAX_REQUEST_BYTES)
+        address = f"127.0.0.1:{port}"
+    else:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        listener = await asyncio.start_unix_server(server.handle, socket_path, limit=MAX_REQUEST_BYTES)
+        address = socket_path
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    print(f"serving on {address} with {server.workers} workers", flush=True)
+    async with listener:
+        await stop.wait()
+    if socket_path is not None and port is None:
+        os.unlink(socket_path)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Serve transpile requests over a local socket.")
+    address = arg_parser.add_mutually_exclusive_group()
+    address.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket path (default: {DEFAULT_SOCKET})")
+    address.add_argument("--port", type=int, help="listen on this localhost TCP port instead")
+    arg_parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                            help="number of worker processes (default: CPU count)")
+    arg_parser.add_argument("--max-pending", type=int,
+                            help="requests queued for the workers at a time (default: 4 per worker)")
+    args = arg_parser.parse_args(argv)
+
+    async def run():
+        server = TranspileServer(args.workers, args.max_pending)
+        try:
+            await serve(server, args.socket, args.port)
+        finally:
+            server.close()
+        print(json.dumps(server.counters.snapshot(), indent=2))
+
+    asyncio.run(run())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 from enum import Enum
 
 class TokenType(Enum):
+    # Enum hashes members by name in Python code; members are singletons, so
+    # the C identity hash is equivalent and keeps dispatch-table lookups cheap.
+    __hash__ = object.__hash__
+
     # Keywords
     PRINT = 'PRINT'
     IF = 'IF'
@@ -26,11 +30,13 @@ class TokenType(Enum):
     MINUS_EQUALS = 'MINUS_EQUALS'
     MULTIPLY_EQUALS = 'MULTIPLY_EQUALS'
     DIVIDE_EQUALS = 'DIVIDE_EQUALS'
+    FLOOR_DIVIDE_EQUALS = 'FLOOR_DIVIDE_EQUALS'
     MODULO_EQUALS = 'MODULO_EQUALS'
     PLUS = 'PLUS'
     MINUS = 'MINUS'
     MULTIPLY = 'MULTIPLY'
     DIVIDE = 'DIVIDE'
+    FLOOR_DIVIDE = 'FLOOR_DIVIDE'
     MODULO = 'MODULO'
     GREATER = 'GREATER'
     LESS = 'LESS'
@@ -50,9 +56,15 @@ class TokenType(Enum):
     LBRACKET = 'LBRACKET'
     RBRACKET = 'RBRACKET'
     COMMA = 'COMMA'
+    DOT = 'DOT'
     COLON = 'COLON'
     SEMICOLON = 'SEMICOLON'
     
+    # Layout
+    NEWLINE = 'NEWLINE'
+    INDENT = 'INDENT'
+    DEDENT = 'DEDENT'
+    
     # Special
     EOF = 'EOF'
     COMMENT = 'COMMENT'
@@ -0,0 +1,54 @@
+"""Opt-in instrumentation of the parser's grammar rules."""
+import logging
+import time
+from collections import Counter, defaultdict
+
+logger = logging.getLogger("python_to_cpp.parser")
+
+class RuleTracer:
+    """Records call counts and time per grammar rule.
+
+    Attach one with Parser(tokens, tracer=RuleTracer()). Without a tracer the
+    parser runs its plain methods and does no tracing work at all. When the
+    logger is enabled for DEBUG at construction time, every rule entry is also
+    logged together with the current token.
+    """
+
+    def __init__(self, logger=logger):
+        self.calls = Counter()
+        self.total_time = defaultdict(float)
+        self.own_time = defaultdict(float)
+        self.logger = logger if logger.isEnabledFor(logging.DEBUG) else None
+        # Time spent in nested rules, one accumulator per active rule call.
+        self.child_time = []
+
+    def wrap(self, parser, rule, method):
+        """Return `method` instrumented to record statistics under `rule`."""
+        calls, total_time, own_time, child_time = self.calls, self.total_time, self.own_time, self.child_time
+        log = self.logger
+
+        def traced(*args, **kwargs):
+            if log is not None:
+                log.debug("%s at %s", rule, parser.current_token)
+            calls[rule] += 1
+            child_time.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = child_time.pop()
+                total_time[rule] += elapsed
+                own_time[rule] += elapsed - nested
+                if child_time:
+                    child_time[-1] += elapsed
+
+        return traced
+
+    def report(self):
+        """Return a table of the recorded rules, most expensive (own time) first."""
+        lines = [f"{'rule':<28}{'calls':>10}{'total ms':>12}{'own ms':>12}"]
+        for rule in sorted(self.calls, key=self.own_time.get, reverse=True):
+            lines.append(f"{rule:<28}{self.calls[rule]:>10}"
+                         f"{self.total_time[rule] * 1000:>12.2f}{self.own_time[rule] * 1000:>12.2f}")
+        return "\n".join(lines)
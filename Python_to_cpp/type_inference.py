@@ -0,0 +1,747 @@
+"""Flow-based type inference over the Program AST, consumed by the code generator."""
+from contextlib import contextmanager
+
+from ast_nodes import (
+    Assignment, FunctionCall, FunctionDef, ListAccess, ListAssignment, MethodCall,
+    ParallelAssignment, RangeCall, Variable
+)
+from visitor import NodeVisitor, walk
+
+class ScalarType:
+    """A non-container type, with the C++ spelling used for it."""
+    __slots__ = ('name', 'ctype')
+    def __init__(self, name, ctype):
+        self.name = name
+        self.ctype = ctype
+
+    def __repr__(self):
+        return self.name
+
+BOOL = ScalarType('bool', 'bool')
+INT = ScalarType('int', 'int')
+FLOAT = ScalarType('float', 'double')
+STRING = ScalarType('str', 'string')
+# Conflicting uses (e.g. a variable holding both a str and an int); emitted as auto.
+ANY = ScalarType('any', 'auto')
+
+# Python's numeric tower: joining two numeric types yields the wider one. A variable that
+# holds both is declared with the wider C++ type, so unlike in Python its narrower values
+# print in that type's format: an int held with floats prints as 1.0, a bool held with ints as 1.
+NUMERIC_RANK = {BOOL: 0, INT: 1, FLOAT: 2}
+
+# Key of the module's top-level statements, which are typed like a function body.
+MODULE = '<module>'
+
+def module_function(program):
+    """The top-level statements of `program` as a parameterless FunctionDef named MODULE."""
+    return FunctionDef(MODULE, [], [stmt for stmt in program.statements if not isinstance(stmt, FunctionDef)])
+
+class ListType:
+    """A list whose elements all share the type held by the `element` cell."""
+    __slots__ = ('element',)
+    def __init__(self, element):
+        self.element = element
+
+    def __repr__(self):
+        return f"list[{element_type(self)}]"
+
+class TypeCell:
+    """A union-find node holding the type inferred so far (None: nothing known yet)."""
+    __slots__ = ('parent', 'type')
+    def __init__(self, type=None):
+        self.parent = None
+        self.type = type
+
+    def find(self):
+        """Return the representative cell, compressing the path to it."""
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        cell = self
+        while cell.parent is not None and cell.parent is not root:
+            cell.parent, cell = root, cell.parent
+        return root
+
+def element_type(list_type):
+    return list_type.element.find().type
+
+def type_key(t):
+    """A hashable value that is equal for equal types: used to compare inference results across runs."""
+    if isinstance(t, ListType):
+        return ('list', type_key(element_type(t)))
+    return t
+
+def from_key(key):
+    """A fresh type equal to the one `key` was made from."""
+    if isinstance(key, tuple):
+        return ListType(TypeCell(from_key(key[1])))
+    return key
+
+def ctype(t):
+    """C++ spelling of an inferred type; unconstrained values default to int."""
+    if t is None:
+        return 'int'
+    if isinstance(t, ListType):
+        return f"vector<{ctype(element_type(t))}>"
+    return t.ctype
+
+class FunctionTypes:
+    """Types inferred for one function: a cell per parameter/local and one for the result."""
+
+    def __init__(self, node):
+        self.node = node
+        self.params = list(node.params)
+        self.cells = {param: TypeCell() for param in self.params}
+        # The variable of each comprehension, by its scope, and the comprehensions
+        # whose element or condition is being looked at (innermost last).
+        self.scoped = {}
+        self.scopes = []
+        self.result = TypeCell()
+        self.returns_value = False
+        # List parameters the function writes through, and ones it rebinds.
+        self.mutated = set()
+        self.rebound = set()
+        # Locals that must be declared at the top of the function body.
+        self.hoisted = []
+        # (callee, argument index, argument type) of every call, and every name called.
+        self.calls = []
+        self.callees = set()
+        # What callers depend on, and what callees were passed, as type keys (see summarize()).
+        self.interface = None
+        self.call_keys = frozenset()
+
+    def summarize(self):
+        """Freeze the inferred signature and call argument types for comparison with a later run."""
+        self.interface = (tuple(type_key(self.type_of(param)) for param in self.params),
+                          type_key(self.result.find().type), self.returns_value,
+                          frozenset(self.mutated), frozenset(self.rebound))
+        self.call_keys = frozenset((callee, index, type_key(t)) for callee, index, t in self.calls)
+
+    def cell(self, name):
+        for comprehension in reversed(self.scopes):
+            if comprehension.var_name == name:
+                return self.scope_cell(comprehension)
+        cell = self.cells.get(name)
+        if cell is None:
+            cell = self.cells[name] = TypeCell()
+        return cell
+
+    def scope_cell(self, comprehension):
+        """The cell of the variable `comprehension` binds, which no other name shares."""
+        cell = self.scoped.get(comprehension.scope)
+        if cell is None:
+            cell = self.scoped[comprehension.scope] = TypeCell()
+        return cell
+
+    def type_of(self, name):
+        for comprehension in reversed(self.scopes):
+            if comprehension.var_name == name:
+                return self.scope_cell(comprehension).find().type
+        cell = self.cells.get(name)
+        return cell.find().type if cell is not None else None
+
+    @contextmanager
+    def inside(self, comprehensions):
+        """Resolve names to the variables of `comprehensions` (outermost first) where they bind them."""
+        depth = len(self.scopes)
+        self.scopes.extend(comprehensions)
+        try:
+            yield
+        finally:
+            del self.scopes[depth:]
+
+class TypeInfo:
+    """The result of infer_types: C++ types for every function's signature and locals."""
+
+    def __init__(self, functions, inferencer):
+        self.functions = functions
+        self.inferencer = inferencer
+        # Functions whose types were (re-)inferred rather than carried over.
+        self.inferred = set(inferencer.visited)
+
+    def expr_type(self, function, expr):
+        """Inferred type of `expr` evaluated inside `function` (None if unknown)."""
+        types = self.functions.get(function)
+        if types is None:
+            return None
+        self.inferencer.current = types
+        return self.inferencer.visit(expr)
+
+    @contextmanager
+    def inside(self, function, *comprehensions):
+        """Look at the element or condition of `comprehensions` (outermost first), where their variables are bound."""
+        types = self.functions.get(function)
+        if types is None or not comprehensions:
+            yield
+            return
+        with types.inside(comprehensions):
+            yield
+
+    def local_type(self, function, name):
+        """Inferred type of the local `name` in `function` (None if unknown)."""
+        types = self.functions.get(function)
+        return types.type_of(name) if types is not None else None
+
+    def local_ctype(self, function, name):
+        """Declared C++ type of the local `name` in `function`."""
+        types = self.functions.get(function)
+        return ctype(types.type_of(name) if types is not None else None)
+
+    def declare(self, function, name, t):
+        """Give the local `name`, which the code generator introduces into `function`, the type `t`."""
+        self.functions[function].cell(name).find().type = t
+
+    def hoisted(self, function):
+        """Locals of `function` that need a declaration before its first statement."""
+        types = self.functions.get(function)
+        return types.hoisted if types is not None else []
+
+    def return_ctype(self, function):
+        types = self.functions[function]
+        return ctype(types.result.find().type) if types.returns_value else 'void'
+
+    def param_decl(self, function, param):
+        """C++ declaration of a parameter: read-only containers are passed by const reference.
+
+        A container the function rebinds is passed by value, since the
+        caller's variable keeps its list; one it only changes in place is
+        passed by reference, so the caller sees the changes.
+        """
+        types = self.functions[function]
+        t = types.type_of(param)
+        if isinstance(t, ListType) or t is STRING:
+            if param in types.rebound:
+                if param in types.mutated and self.changed_before_rebinding(function, param):
+                    raise Exception(f"List parameter '{param}' of {function}() is changed in place before it is rebound")
+                return f"{ctype(t)} {param}"
+            if param in types.mutated:
+                return f"{ctype(t)}& {param}"
+            return f"const {ctype(t)}& {param}"
+        return f"{ctype(t)} {param}"
+
+    def by_reference(self, function, param):
+        """True if the parameter `param` of `function` is a list or string passed by (const) reference."""
+        types = self.functions[function]
+        t = types.type_of(param)
+        return (isinstance(t, ListType) or t is STRING) and param not in types.rebound
+
+    def changed_before_rebinding(self, function, param):
+        """True if `function` may change the caller's list in `param` before an assignment rebinds it.
+
+        Only an assignment at the top level of the body is sure to run; up
+        to the first one, every statement that may write through `param`
+        counts.
+        """
+        for statement in self.functions[function].node.body:
+            if (isinstance(statement, Assignment) and isinstance(statement.name, Variable)
+                    and statement.name.name == param):
+                return False
+            if self.writes_through(statement, param):
+                return True
+        return False
+
+    def writes_through(self, statement, param):
+        """True if `statement` may store to the list in `param`, or hand it to a name or callee that may."""
+        statements = [statement]
+        while statements:
+            statement = statements.pop()
+            if isinstance(statement, list):
+                statements.extend(statement)
+                continue
+            for node in walk(statement):
+                if isinstance(node, ListAssignment):
+                    targets = [node.list_expr]
+                elif isinstance(node, ParallelAssignment):
+                    targets = [target.list_expr for target in node.targets if isinstance(target, ListAccess)]
+                elif isinstance(node, MethodCall):
+                    targets = [node.obj]
+                elif isinstance(node, Assignment):
+                    targets = [node.value]
+                elif isinstance(node, FunctionCall) and node.name in self.functions:
+                    callee = self.functions[node.name]
+                    targets = [arg for name, arg in zip(callee.params, node.args) if name in callee.mutated]
+                else:
+                    continue
+                if any(isinstance(target, Variable) and target.name == param for target in targets):
+                    return True
+        return False
+
+    def signature(self, function, name=None):
+        """`return_type name(params)` for a declaration or definition of `function`."""
+        params = ', '.join(self.param_decl(function, param) for param in self.functions[function].params)
+        return f"{self.return_ctype(function)} {name or function}({params})"
+
+def sum_type(args):
+    """Type of sum() over a list: float for floats, else int (summing bools counts them)."""
+    if not args or not isinstance(args[0], ListType):
+        return None
+    return FLOAT if element_type(args[0]) is FLOAT else INT
+
+# Result types of the builtins the generator understands, by argument types.
+BUILTIN_RESULTS = {
+    'len': lambda args: INT,
+    'int': lambda args: INT,
+    'float': lambda args: FLOAT,
+    'str': lambda args: STRING,
+    'bool': lambda args: BOOL,
+    'abs': lambda args: INT if args and args[0] is BOOL else (args[0] if args else None),
+    'sum': sum_type,
+}
+
+class TypeInferencer(NodeVisitor):
+    """Propagates types through assignments, calls and returns until nothing changes.
+
+    Every variable and function result is a TypeCell. Scalars are joined along
+    the numeric tower (bool < int < float, anything else conflicts to ANY);
+    lists unify their element cells, so aliases, call arguments and parameters
+    end up sharing a single element type. Visiting an expression returns its
+    type given what is known so far; the whole program is revisited until a
+    pass changes no cell.
+    """
+
+    # Passes before giving up on a fixpoint; each pass can only move a cell up the lattice.
+    MAX_PASSES = 64
+
+    def __init__(self, program, previous=None, only=None):
+        self.functions = {stmt.name: FunctionTypes(stmt) for stmt in program.statements if isinstance(stmt, FunctionDef)}
+        module = module_function(program)
+        if module.body:
+            self.functions[MODULE] = FunctionTypes(module)
+        # Functions whose bodies are visited; the others keep their `previous` types.
+        self.visited = set(self.functions) if only is None else set(only) & set(self.functions)
+        self.previous = previous
+        self.current = None
+        self.changed = False
+        # One ListType per list literal or comprehension, so revisiting it does not count as a change.
+        self.literal_types = {}
+        # (caller, callee, parameter index, caller parameter passed there)
+        self.call_edges = set()
+
+    def infer(self):
+        visited = [types for name, types in self.functions.items() if name in self.visited]
+        if self.previous is not None:
+            self.seed_from(self.previous)
+        for _ in range(self.MAX_PASSES):
+            self.changed = False
+            for types in visited:
+                self.current = types
+                types.calls = []
+                types.callees = set()
+                self.visit(types.node.body)
+            if not self.changed:
+                break
+        self.propagate_mutation()
+        for types in visited:
+            types.hoisted = DeclarationScopes(types).hoisted()
+            types.summarize()
+        return TypeInfo(self.functions, self)
+
+    def seed_from(self, previous):
+        """Stand in for the functions that are not visited with what `previous` inferred for them.
+
+        Their signatures are fixed to the previous ones, and the calls they
+        make into visited functions pass the argument types they passed then.
+        """
+        for name, types in self.functions.items():
+            if name in self.visited:
+                continue
+            old = previous.functions[name]
+            for param, key in zip(types.params, old.interface[0]):
+                types.cell(param).type = from_key(key)
+            types.result.type = from_key(old.interface[1])
+            types.returns_value = old.returns_value
+            types.mutated = set(old.mutated)
+            types.rebound = set(old.rebound)
+            for callee, index, key in old.call_keys:
+                target = self.functions.get(callee)
+                if callee in self.visited and target is not None and index < len(target.params):
+                    self.assign(target.cell(target.params[index]), from_key(key))
+
+    def propagate_mutation(self):
+        """A list parameter passed on to a parameter the callee mutates is mutated as well."""
+        changed = True
+        while changed:
+            changed = False
+            for caller, callee, index, param in self.call_edges:
+                target = self.functions[callee]
+                if index < len(target.params) and target.params[index] in target.mutated and param not in caller.mutated:
+                    caller.mutated.add(param)
+                    changed = True
+
+    def join(self, a, b):
+        """Least upper bound of two types; unifies element cells of two lists."""
+        if a is None:
+            return b
+        if b is None or a is b:
+            return a
+        if isinstance(a, ListType) and isinstance(b, ListType):
+            self.unify(a.element, b.element)
+            return a
+        if a in NUMERIC_RANK and b in NUMERIC_RANK:
+            return a if NUMERIC_RANK[a] >= NUMERIC_RANK[b] else b
+        return ANY
+
+    def assign(self, cell, t):
+        """Record that a value of type `t` flows into `cell`."""
+        root = cell.find()
+        new = self.join(root.type, t)
+        if new is not root.type:
+            root.type = new
+            self.changed = True
+
+    def unify(self, a, b):
+        a, b = a.find(), b.find()
+        if a is not b:
+            b.parent = a
+            self.changed = True
+            a.type = self.join(a.type, b.type)
+
+    def visit_FunctionDef(self, node):
+        """Nested definitions are not generated, so they contribute nothing."""
+
+    def visit_Assignment(self, node):
+        value = self.visit(node.value)
+        self.store_variable(node.name.name if isinstance(node.name, Variable) else node.name, node.value, value)
+
+    def visit_ListAssignment(self, node):
+        value = self.visit(node.value)
+        self.store_element(node.list_expr, node.index, value)
+
+    def visit_ParallelAssignment(self, node):
+        values = [(value, self.visit(value)) for value in node.values]
+        for target, (expr, value) in zip(node.targets, values):
+            if isinstance(target, ListAccess):
+                self.store_element(target.list_expr, target.index, value)
+            else:
+                self.store_variable(target.name, expr, value)
+
+    def store_variable(self, name, expr, value):
+        """Record `name = expr`, where `expr` has type `value`."""
+        if name in self.current.params:
+            self.current.rebound.add(name)
+        if isinstance(expr, Variable) and expr.name in self.current.params:
+            # An alias of a list parameter may be written through: be conservative.
+            self.current.mutated.add(expr.name)
+        self.assign(self.current.cell(name), value)
+
+    def store_element(self, list_expr, index, value):
+        """Record `list_expr[index] = <value of type value>`, or an append to `list_expr` if index is None."""
+        if isinstance(list_expr, Variable):
+            name = list_expr.name
+            cell = self.current.cell(name)
+            if cell.find().type is None:
+                self.assign(cell, ListType(TypeCell()))
+            if name in self.current.params:
+                self.current.mutated.add(name)
+        target = self.visit(list_expr)
+        if index is not None:
+            self.visit(index)
+        if isinstance(target, ListType):
+            self.assign(target.element, value)
+
+    def visit_MethodCall(self, node):
+        args = [self.visit(arg) for arg in node.args]
+        if node.method == 'append' and len(args) == 1:
+            self.store_element(node.obj, None, args[0])
+        else:
+            self.visit(node.obj)
+        return None
+
+    def visit_IfStatement(self, node):
+        self.visit(node.condition)
+        self.visit(node.body)
+        if node.else_body:
+            self.visit(node.else_body)
+
+    def visit_WhileLoop(self, node):
+        self.visit(node.condition)
+        self.visit(node.body)
+
+    def visit_ForLoop(self, node):
+        self.bind_loop_variable(self.current.cell(node.var_name), node.iterable)
+        self.visit(node.body)
+
+    def bind_loop_variable(self, cell, iterable):
+        """Record that the variable of `cell` takes the values of `iterable`, a RangeCall or an expression."""
+        if isinstance(iterable, RangeCall):
+            for bound in (iterable.start, iterable.end, iterable.step):
+                if bound is not None:
+                    self.visit(bound)
+            self.assign(cell, INT)
+        else:
+            iterable = self.visit(iterable)
+            if isinstance(iterable, ListType):
+                self.assign(cell, element_type(iterable))
+            elif iterable is STRING:
+                self.assign(cell, STRING)
+            elif iterable is not None:
+                self.assign(cell, ANY)
+
+    def visit_Return(self, node):
+        if node.value is not None:
+            self.current.returns_value = True
+            self.assign(self.current.result, self.visit(node.value))
+
+    def visit_Print(self, node):
+        for expr in node.expressions:
+            self.visit(expr)
+
+    def visit_Number(self, node):
+        return INT
+
+    def visit_Float(self, node):
+        return FLOAT
+
+    def visit_String(self, node):
+        return STRING
+
+    def visit_Boolean(self, node):
+        return BOOL
+
+    def visit_Variable(self, node):
+        return self.current.cell(node.name).find().type
+
+    def visit_BinaryOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = node.op
+        if op in ('<', '>', '<=', '>=', '==', '!=', 'and', 'or'):
+            return BOOL
+        if left is None or right is None:
+            return None
+        if left in NUMERIC_RANK and right in NUMERIC_RANK:
+            if op == '/':
+                return FLOAT
+            # Arithmetic on bools yields ints.
+            return self.join(self.join(left, right), INT)
+        if op == '+' and left is STRING and right is STRING:
+            return STRING
+        return ANY
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if node.operator == 'not':
+            return BOOL
+        if operand in NUMERIC_RANK:
+            return self.join(operand, INT)
+        return None if operand is None else ANY
+
+    def visit_List(self, node):
+        list_type = self.literal_type(node)
+        for element in node.elements:
+            self.assign(list_type.element, self.visit(element))
+        return list_type
+
+    def visit_ListComprehension(self, node):
+        # The iterable is evaluated outside the comprehension's scope, the rest inside it.
+        self.bind_loop_variable(self.current.scope_cell(node), node.iterable)
+        list_type = self.literal_type(node)
+        with self.current.inside([node]):
+            if node.condition is not None:
+                self.visit(node.condition)
+            self.assign(list_type.element, self.visit(node.element))
+        return list_type
+
+    def literal_type(self, node):
+        list_type = self.literal_types.get(node)
+        if list_type is None:
+            list_type = self.literal_types[node] = ListType(TypeCell())
+        return list_type
+
+    def visit_ListAccess(self, node):
+        target = self.visit(node.list_expr)
+        self.visit(node.index)
+        if isinstance(target, ListType):
+            return element_type(target)
+        if target is STRING:
+            return STRING
+        return None if target is None else ANY
+
+    def visit_LenCall(self, node):
+        self.visit(node.arg)
+        return INT
+
+    def visit_RangeCall(self, node):
+        return ListType(TypeCell(INT))
+
+    def visit_FunctionCall(self, node):
+        args = [self.visit(arg) for arg in node.args]
+        callee = self.functions.get(node.name)
+        self.current.callees.add(node.name)
+        if callee is None:
+            builtin = BUILTIN_RESULTS.get(node.name)
+            if builtin is not None:
+                return builtin(args)
+            if node.name in ('min', 'max'):
+                result = None
+                for arg in args:
+                    result = self.join(result, arg)
+                return result
+            return ANY
+        for index, (param, arg) in enumerate(zip(callee.params, args)):
+            self.assign(callee.cell(param), arg)
+            self.current.calls.append((node.name, index, arg))
+            expr = node.args[index]
+            # Changing an element of a list changes the list as well.
+            while isinstance(expr, ListAccess):
+                expr = expr.list_expr
+            if isinstance(expr, Variable) and expr.name in self.current.params:
+                self.call_edges.add((self.current, node.name, index, expr.name))
+        return callee.result.find().type
+
+class DeclarationScopes(NodeVisitor):
+    """Finds locals whose first assignment cannot double as their C++ declaration.
+
+    A local is declared where it is first assigned. That only works if every
+    other use sits later in the same block or in a block nested inside it;
+    otherwise (used before assignment, or used after the block that assigned
+    it) the declaration is hoisted to the top of the function.
+    """
+
+    def __init__(self, types):
+        self.types = types
+        self.path = ()
+        self.blocks = 0
+        # name -> block path of its first assignment
+        self.declared = {}
+        self.escaping = set()
+        # Names bound somewhere in the function; anything else is not a local.
+        self.assigned = set()
+        # Names so far only bound by for-loop headers; every such loop declares its own.
+        self.loop_vars = set()
+
+    def hoisted(self):
+        self.visit(self.types.node.body)
+        return [name for name in self.declared if name in self.escaping and name in self.assigned]
+
+    def enter(self, statements):
+        outer = self.path
+        self.blocks += 1
+        self.path = outer + (self.blocks,)
+        self.visit(statements)
+        self.path = outer
+
+    def use(self, name):
+        if name in self.types.params:
+            return
+        declared = self.declared.get(name)
+        if declared is None:
+            # Read before any assignment: only a declaration up front makes this valid C++.
+            self.declared[name] = ()
+            self.escaping.add(name)
+        elif self.path[:len(declared)] != declared:
+            self.escaping.add(name)
+
+    def define(self, name):
+        if name in self.types.params:
+            return
+        self.assigned.add(name)
+        if name in self.declared:
+            self.use(name)
+            self.loop_vars.discard(name)
+        else:
+            self.declared[name] = self.path
+
+    def visit_FunctionDef(self, node):
+        pass
+
+    def visit_Variable(self, node):
+        self.use(node.name)
+
+    def visit_Assignment(self, node):
+        self.visit(node.value)
+        self.define(node.name.name if isinstance(node.name, Variable) else node.name)
+
+    def visit_ParallelAssignment(self, node):
+        self.visit(node.values)
+        for target in node.targets:
+            if isinstance(target, Variable):
+                self.define(target.name)
+            else:
+                self.visit(target)
+
+    def visit_IfStatement(self, node):
+        self.visit(node.condition)
+        self.enter(node.body)
+        if node.else_body:
+            self.enter(node.else_body)
+
+    def visit_WhileLoop(self, node):
+        self.visit(node.condition)
+        self.enter(node.body)
+
+    def visit_ListComprehension(self, node):
+        """The loop variable is declared by the loop the comprehension is generated as, and ends with it."""
+        self.visit(node.iterable)
+        outer = self.path
+        self.blocks += 1
+        self.path = outer + (self.blocks,)
+        name = node.var_name
+        shadowed = self.declared.get(name)
+        self.declared[name] = self.path
+        if node.condition is not None:
+            self.visit(node.condition)
+        self.visit(node.element)
+        if shadowed is None:
+            del self.declared[name]
+        else:
+            self.declared[name] = shadowed
+        self.path = outer
+
+    def visit_ForLoop(self, node):
+        self.visit(node.iterable)
+        # The loop variable is declared by the loop header, scoped to the loop.
+        outer = self.path
+        self.blocks += 1
+        self.path = outer + (self.blocks,)
+        name = node.var_name
+        self.assigned.add(name)
+        if name not in self.declared or name in self.loop_vars:
+            if name not in self.types.params:
+                self.declared[name] = self.path
+                self.loop_vars.add(name)
+        else:
+            self.use(name)
+        self.visit(node.body)
+        self.path = outer
+
+def infer_types(program, previous=None, changed=None):
+    """Infer types for every function in `program`; returns a TypeInfo.
+
+    Given the TypeInfo of an earlier version of the program as `previous`
+    and the names of the functions whose bodies changed since, only those
+    are re-inferred, together with whatever their changes reach: the
+    callers of a function whose signature changed and the callees of a
+    call whose argument types changed. Every other function keeps its
+    previous types.
+    """
+    if previous is None:
+        return TypeInferencer(program).infer()
+    names = {stmt.name for stmt in program.statements if isinstance(stmt, FunctionDef)} | {MODULE}
+    dirty = set(changed) | {MODULE} | (names - set(previous.functions))
+    # Calls to a function that appeared or disappeared now resolve differently.
+    appeared = names.symmetric_difference(previous.functions)
+    for name, old in previous.functions.items():
+        if name in names and (old.callees & appeared or any(callee in appeared for callee, _, _ in old.call_keys)):
+            dirty.add(name)
+    while True:
+        info = TypeInferencer(program, previous, dirty).infer()
+        functions = info.inferencer.functions
+        reached = set()
+        for name in dirty & set(functions):
+            new = functions[name]
+            old = previous.functions.get(name)
+            if old is None or new.interface != old.interface:
+                reached.update(caller for caller, types in functions.items()
+                               if caller not in dirty and name in previous.functions[caller].callees)
+            old_calls = old.call_keys if old is not None else frozenset()
+            reached.update(callee for callee, _, _ in new.call_keys ^ old_calls)
+        reached = (reached & names) - dirty
+        if not reached:
+            break
+        dirty |= reached
+    # Functions that were not visited keep their complete previous results.
+    for name in functions:
+        if name not in dirty:
+            functions[name] = previous.functions[name]
+    return info
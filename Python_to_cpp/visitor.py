@@ -0,0 +1,106 @@
+"""Helpers for walking the AST and dispatching on node types."""
+from ast_nodes import Node
+
+def iter_child_nodes(node):
+    """Yield the direct child nodes of `node`, looking inside (nested) list fields."""
+    for name in type(node).__slots__:
+        stack = [getattr(node, name)]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, Node):
+                yield value
+            elif isinstance(value, list):
+                stack.extend(reversed(value))
+
+def walk(node):
+    """Yield `node` and every node below it, in no particular order."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(iter_child_nodes(node))
+
+class DispatchTable:
+    """Maps node classes to handlers, looked up by the exact type of a node.
+
+    A subclass without its own entry resolves to the handler of its nearest
+    registered base class; the result is cached, so every later lookup for
+    that type is a single dict access.
+    """
+
+    def __init__(self, handlers):
+        self.handlers = dict(handlers)
+        self.cache = dict(handlers)
+
+    def lookup(self, node_type):
+        """Return the handler for `node_type`, or None if it has none."""
+        try:
+            return self.cache[node_type]
+        except KeyError:
+            handler = next((self.handlers[klass] for klass in node_type.__mro__ if klass in self.handlers), None)
+            self.cache[node_type] = handler
+            return handler
+
+class NodeVisitor:
+    """Walks an AST, calling visit_<ClassName>(node) for each node it visits.
+
+    Like DispatchTable, the method for a node type is resolved through the
+    MRO once and cached per visitor class. A plain list (a block of
+    statements) dispatches to visit_list. Node types without a method fall
+    back to generic_visit, which visits their children.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.visitors = {}
+
+    def visit(self, node):
+        """Visit `node` and return whatever its visit method returns."""
+        node_type = type(node)
+        try:
+            method = self.visitors[node_type]
+        except KeyError:
+            method = self.visitors[node_type] = self.resolve(node_type)
+        return method(self, node)
+
+    @classmethod
+    def resolve(cls, node_type):
+        """Return the unbound visit method used for `node_type`."""
+        for klass in node_type.__mro__:
+            method = getattr(cls, f"visit_{klass.__name__}", None)
+            if method is not None:
+                return method
+        return cls.generic_visit
+
+    def visit_list(self, statements):
+        for statement in statements:
+            self.visit(statement)
+
+    def generic_visit(self, node):
+        for child in iter_child_nodes(node):
+            self.visit(child)
+
+class NodeTransformer(NodeVisitor):
+    """A NodeVisitor whose visit methods return the node to put in place of the one visited.
+
+    generic_visit transforms the children of a node in place. Inside a list,
+    a visit method may return None to drop the node, or a list of statements
+    to stand in for it.
+    """
+
+    def visit_list(self, values):
+        result = []
+        for value in values:
+            if isinstance(value, (Node, list)):
+                value = self.visit(value)
+                if value is None:
+                    continue
+            result.append(value)
+        return result
+
+    def generic_visit(self, node):
+        for name in type(node).__slots__:
+            value = getattr(node, name)
+            if isinstance(value, (Node, list)):
+                setattr(node, name, self.visit(value))
+        return node
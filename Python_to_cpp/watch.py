@@ -0,0 +1,238 @@
+"""Watch Python sources and re-transpile them as soon as they change.
+
+Usage: python watch.py [--poll SECONDS] [--compile] [--cxx g++] [--cxxflags=-O2] PATH [PATH ...]
+
+Each PATH is a Python file or a directory watched recursively for .py files.
+Every source is transpiled once at startup, then again on every change, with
+its C++ written next to it with a .cpp extension. The process stays alive, so
+the transpiler's modules and tables are loaded once, and every file keeps an
+IncrementalTranspiler whose parsed and generated functions are reused across
+edits. With --compile the C++ is also built into an executable beside it.
+For each change the time from the file's modification to the finished
+output (end to end), and the transpile and compile times, are reported.
+
+Changes are detected with inotify where available (Linux); otherwise, or
+with --poll, the tree is scanned for new modification times every SECONDS.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import shlex
+import struct
+import subprocess
+import sys
+import time
+
+from batch import collect_sources, output_path
+from cache import replace_atomically
+from incremental import IncrementalTranspiler
+
+# inotify(7) event bits and the fixed part of struct inotify_event.
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+# Modifications closer together than this are handled as one change.
+SETTLE_SECONDS = 0.05
+
+def is_source(path):
+    return path.endswith(".py")
+
+class InotifyWatcher:
+    """Reports changed .py files under the watched paths using Linux inotify."""
+
+    def __init__(self, paths):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # watch descriptor -> directory it watches
+        self.directories = {}
+        # Watched trees, and single files (watched through their directory).
+        self.roots = [os.path.abspath(path) for path in paths if os.path.isdir(path)]
+        self.files = {os.path.abspath(path) for path in paths if not os.path.isdir(path)}
+        for root in self.roots:
+            self.add_tree(root)
+        for directory in {os.path.dirname(path) for path in self.files}:
+            self.add_tree(directory, recursive=False)
+
+    def add_tree(self, directory, recursive=True):
+        for root, dirs, _ in os.walk(directory):
+            if not recursive:
+                dirs.clear()
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"cannot watch {root}")
+            self.directories[wd] = root
+
+    def wait(self, timeout=None):
+        """Block until something changes; return the set of changed (or removed) source paths."""
+        changed = set()
+        while True:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                return changed
+            data = os.read(self.fd, 64 * 1024)
+            for offset in self.iter_events(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if not self.wanted(path):
+                    continue
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self.add_tree(path)
+                        changed.update(collect_sources([path]))
+                elif is_source(path):
+                    changed.add(path)
+            # Let a burst of events from one save arrive before reporting it.
+            timeout = SETTLE_SECONDS
+
+    def wanted(self, path):
+        return path in self.files or any(path.startswith(root + os.sep) for root in self.roots)
+
+    @staticmethod
+    def iter_events(data):
+        offset = 0
+        while offset < len(data):
+            yield offset
+            offset += EVENT_HEADER.size + EVENT_HEADER.unpack_from(data, offset)[3]
+
+class PollingWatcher:
+    """Reports changed .py files by rescanning the watched paths at a fixed interval."""
+
+    def __init__(self, paths, interval=0.5):
+        self.paths = paths
+        self.interval = interval
+        self.stamps = self.scan()
+
+    def scan(self):
+        stamps = {}
+        for path in collect_sources(self.paths):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stamps[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval)
+            stamps = self.scan()
+            changed = {path for path in stamps.keys() | self.stamps.keys()
+                       if stamps.get(path) != self.stamps.get(path)}
+            self.stamps = stamps
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+class Watcher:
+    """Keeps one warm IncrementalTranspiler per source file and rebuilds changed files."""
+
+    def __init__(self, compile=False, cxx="g++", cxxflags=("-O2",), report=print):
+        self.transpilers = {}
+        self.compile = compile
+        self.cxx = cxx
+        self.cxxflags = list(cxxflags)
+        self.report = report
+
+    def rebuild(self, path, changed=True):
+        """Transpile (and optionally compile) `path`; report its timings. Returns True on success.
+
+        End-to-end latency is only reported for a `changed` file, whose
+        modification time marks when the change was made.
+        """
+        path = os.path.abspath(path)
+        try:
+            modified = os.stat(path).st_mtime
+            with open(path) as f:
+                source = f.read()
+        except FileNotFoundError:
+            if self.transpilers.pop(path, None) is not None:
+                self.report(f"removed  {path}")
+            return True
+        transpiler = self.transpilers.setdefault(path, IncrementalTranspiler())
+        output = output_path(path)
+        start = time.perf_counter()
+        try:
+            code = transpiler.transpile(source)
+        except Exception as e:
+            self.report(f"FAILED   {path}: {type(e).__name__}: {e}")
+            return False
+        self.write_if_changed(output, code)
+        transpiled = time.perf_counter()
+        timings = f"transpile {(transpiled - start) * 1000:7.1f} ms"
+        if self.compile:
+            binary = os.path.splitext(output)[0]
+            result = subprocess.run([self.cxx, *self.cxxflags, "-o", binary, output], capture_output=True, text=True)
+            timings += f"  compile {(time.perf_counter() - transpiled) * 1000:7.1f} ms"
+            if result.returncode != 0:
+                self.report(f"FAILED   {output}: {self.cxx} exited with {result.returncode}\n{result.stderr}")
+                return False
+        stats = transpiler.stats
+        latency = f"{(time.time() - modified) * 1000:9.1f} ms end to end" if changed else f"{'initial build':>23}"
+        self.report(f"ok {latency}  {timings}  "
+                    f"({stats['parsed']}/{stats['units']} units parsed, {stats['generated']} functions generated)  {path}")
+        return True
+
+    @staticmethod
+    def write_if_changed(path, code):
+        """Write `code` unless the file already holds it, so a no-op save triggers no rebuild downstream."""
+        try:
+            with open(path) as f:
+                if f.read() == code:
+                    return
+        except FileNotFoundError:
+            pass
+
+        def fill(tmp_path):
+            with open(tmp_path, "w") as f:
+                f.write(code)
+        replace_atomically(path, fill)
+
+def make_watcher(paths, poll=None):
+    """An inotify watcher, or a polling one if `poll` is given or inotify is unavailable."""
+    if poll is None:
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            poll = 0.5
+    return PollingWatcher(paths, poll)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Watch Python files and re-transpile them to C++ on every change.")
+    arg_parser.add_argument("paths", nargs="+", help="Python files or directories to watch")
+    arg_parser.add_argument("--poll", type=float, metavar="SECONDS", help="poll for changes instead of using inotify")
+    arg_parser.add_argument("--compile", action="store_true", help="also compile the generated C++")
+    arg_parser.add_argument("--cxx", default="g++")
+    arg_parser.add_argument("--cxxflags", default="-O2")
+    args = arg_parser.parse_args(argv)
+
+    watcher = make_watcher(args.paths, args.poll)
+    builder = Watcher(args.compile, args.cxx, shlex.split(args.cxxflags))
+    for path in collect_sources(args.paths):
+        builder.rebuild(path, changed=False)
+    print(f"watching {', '.join(args.paths)} ({type(watcher).__name__}); press Ctrl-C to stop", flush=True)
+    try:
+        while True:
+            for path in sorted(watcher.wait()):
+                builder.rebuild(path)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())